@@ -6,43 +6,66 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from config import config
+from app.engine import RoutingSession
 import os
 
 # Initialize Flask extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 
 
 
-def create_app(config_name='default'):
+def create_app(config_name='default', overrides=None):
     """
     Flask application factory pattern
+    overrides (a dict) is applied on top of the config class, e.g. by tests
     """
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+    if app.config.get('PROXY_FIX_X_FOR'):
+        # request.remote_addr becomes the client's address (login rate limits)
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     instance_path = os.path.join(app.root_path, '..', 'instance')
     os.makedirs(instance_path, exist_ok=True)
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    from app.engine import engine_options, install_engine_events, init_read_routing
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
+    from app.admission import init_admission
+    init_admission(app)
+    from app.cache import init_cache
+    init_cache(app)
+    from app.fragment_cache import init_fragment_cache
+    init_fragment_cache(app)
+    from app.compression import init_compression
+    init_compression(app)
 
     # Register blueprints
     from app.auth import auth_bp
     from app.admin import admin_bp
     from app.company import company_bp
     from app.student import student_bp
+    from app.api import api_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(company_bp)
     app.register_blueprint(student_bp)
+    app.register_blueprint(api_bp)
 
-    # Create tables and default admin
+    # Engine wiring only; schema creation, migrations and the default admin
+    # are handled once per deploy by `flask bootstrap` (app/migrations.py)
     with app.app_context():
-        from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application, AdminAction
-        db.create_all()
-        from app.utils import create_default_admin
-        create_default_admin()
+        install_engine_events(db.engine, app.config)
+        init_read_routing(app, db.engine)
+    from app.tenants import init_tenants
+    init_tenants(app)
+
+    from app.commands import register_commands
+    register_commands(app)
 
     @login_manager.user_loader
     def load_user(user_id):
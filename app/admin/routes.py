@@ -2,11 +2,18 @@
 Admin routes for Placement Portal
 Handles dashboard, approvals, blacklisting, and data views
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from app.utils import role_required, log_admin_action
+from app.engine import read_only
+from app.utils import role_required, log_admin_action, bump_version, stream_csv
+from app.notifications import enqueue_event, outbox_stats
+from app.archive import archive_company, archive_drive
+from app.cube import mark_cube_dirty
+from app.analytics import bump_company_analytics
+from app.changes import record_deletions
 from app import db
 from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+from app.projections import company_rows, student_rows, drive_rows, application_rows
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -14,6 +21,7 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 @admin_bp.route('/dashboard')
 @login_required
 @role_required('admin')
+@read_only
 def dashboard():
     stats = {
         'students': User.query.filter_by(role='student').count(),
@@ -25,22 +33,50 @@ def dashboard():
     }
     return render_template('admin/dashboard.html', stats=stats)
 
+# Runtime metrics (database pool, lock contention and load shedding)
+@admin_bp.route('/metrics')
+@login_required
+@role_required('admin')
+def metrics():
+    from flask import jsonify
+    from app.engine import engine_stats
+    from app.compression import compression_stats
+    from app.admission import admission_stats
+    from app.jobs import jobs_stats
+    from app.cache import cache_stats
+    metrics = {'engine': engine_stats(db.engine), 'outbox': outbox_stats(), 'compression': compression_stats(),
+               'admission': admission_stats(), 'jobs': jobs_stats(), 'cache': cache_stats()}
+    # Per-worker counters when running under serve.py
+    server_stats = current_app.extensions.get('server_stats')
+    if server_stats is not None:
+        metrics['workers'] = server_stats()
+    return jsonify(metrics)
+
+# Cross-tenant summary (central portal only)
+@admin_bp.route('/tenants')
+@login_required
+@role_required('admin')
+def tenants():
+    from flask import jsonify
+    from app.tenants import cross_tenant_report, require_default_tenant
+    require_default_tenant()
+    return jsonify(cross_tenant_report(current_app._get_current_object()))
+
 # List and approve/reject companies
 @admin_bp.route('/companies')
 @login_required
 @role_required('admin')
+@read_only
 def companies():
     q = request.args.get('q', '')
-    query = User.query.filter_by(role='company')
-    if q:
-        query = query.join(CompanyProfile).filter(CompanyProfile.company_name.ilike(f'%{q}%'))
-    companies = query.all()
+    companies = company_rows(q)
     return render_template('admin/companies.html', companies=companies, q=q)
 
 # Company detail view
 @admin_bp.route('/companies/<int:user_id>')
 @login_required
 @role_required('admin')
+@read_only
 def company_detail(user_id):
     user = User.query.get_or_404(user_id)
     if user.role != 'company':
@@ -54,9 +90,13 @@ def company_detail(user_id):
 @admin_bp.route('/companies/pending')
 @login_required
 @role_required('admin')
+@read_only
 def pending_companies():
-    companies = User.query.filter_by(role='company', is_approved=False).all()
-    return render_template('admin/pending_companies.html', companies=companies)
+    from app.duplicates import find_duplicates
+    companies = company_rows(pending_only=True)
+    # Likely re-registrations, from one lookup on the trigram index
+    duplicates = find_duplicates(c.company_id for c in companies if c.company_id)
+    return render_template('admin/pending_companies.html', companies=companies, duplicates=duplicates)
 
 @admin_bp.route('/companies/<int:user_id>/approve', methods=['POST'])
 @login_required
@@ -74,7 +114,14 @@ def approve_company(user_id):
 @role_required('admin')
 def reject_company(user_id):
     user = User.query.get_or_404(user_id)
+    if current_app.config['ARCHIVE_ON_REJECT']:
+        archive_company(user.id, 'reject_company')
+    drive_ids = db.select(PlacementDrive.id).join(CompanyProfile).filter(CompanyProfile.user_id == user.id)
+    mark_cube_dirty(drive_ids)
+    record_deletions(Application, Application.drive_id.in_(drive_ids), 'reject_company')
+    # ON DELETE CASCADE removes the profile, drives and applications in the database
     db.session.delete(user)
+    bump_version('drives')
     db.session.commit()
     log_admin_action(current_user.id, 'reject_company', user_id, 'company')
     flash('Company rejected and deleted.', 'info')
@@ -95,19 +142,18 @@ def blacklist_company(user_id):
 @admin_bp.route('/drives')
 @login_required
 @role_required('admin')
+@read_only
 def drives():
     q = request.args.get('q', '')
-    query = PlacementDrive.query
-    if q:
-        query = query.filter(PlacementDrive.title.ilike(f'%{q}%'))
-    drives = query.all()
+    drives = drive_rows(q)
     return render_template('admin/drives.html', drives=drives, q=q)
 
 @admin_bp.route('/drives/pending')
 @login_required
 @role_required('admin')
+@read_only
 def pending_drives():
-    drives = PlacementDrive.query.filter_by(is_approved=False).all()
+    drives = drive_rows(pending_only=True)
     return render_template('admin/pending_drives.html', drives=drives)
 
 @admin_bp.route('/drives/<int:drive_id>/approve', methods=['POST'])
@@ -115,7 +161,12 @@ def pending_drives():
 @role_required('admin')
 def approve_drive(drive_id):
     drive = PlacementDrive.query.get_or_404(drive_id)
+    if not drive.is_approved:
+        # Written in the same commit; the outbox worker notifies students
+        enqueue_event('drive_approved', {'drive_id': drive.id}, f'drive_approved:{drive.id}')
     drive.is_approved = True
+    bump_version('drives')
+    bump_company_analytics(drive.company_id)
     db.session.commit()
     log_admin_action(current_user.id, 'approve_drive', drive_id, 'drive')
     flash('Drive approved.', 'success')
@@ -126,7 +177,14 @@ def approve_drive(drive_id):
 @role_required('admin')
 def reject_drive(drive_id):
     drive = PlacementDrive.query.get_or_404(drive_id)
+    if current_app.config['ARCHIVE_ON_REJECT']:
+        archive_drive(drive.id, 'reject_drive')
+    mark_cube_dirty([drive.id])
+    record_deletions(Application, Application.drive_id == drive.id, 'reject_drive')
+    # ON DELETE CASCADE removes the drive's applications in the database
     db.session.delete(drive)
+    bump_version('drives')
+    bump_company_analytics(drive.company_id)
     db.session.commit()
     log_admin_action(current_user.id, 'reject_drive', drive_id, 'drive')
     flash('Drive rejected and deleted.', 'info')
@@ -136,18 +194,18 @@ def reject_drive(drive_id):
 @admin_bp.route('/students')
 @login_required
 @role_required('admin')
+@read_only
 def students():
     q = request.args.get('q', '')
-    query = User.query.filter_by(role='student')
-    if q:
-        query = query.join(StudentProfile).filter(StudentProfile.full_name.ilike(f'%{q}%'))
-    students = query.all()
-    return render_template('admin/students.html', students=students, q=q)
+    include_archived = bool(request.args.get('include_archived'))
+    students = student_rows(q, include_archived)
+    return render_template('admin/students.html', students=students, q=q, include_archived=include_archived)
 
 # Student detail view
 @admin_bp.route('/students/<int:user_id>')
 @login_required
 @role_required('admin')
+@read_only
 def student_detail(user_id):
     user = User.query.get_or_404(user_id)
     if user.role != 'student':
@@ -172,13 +230,13 @@ def blacklist_student(user_id):
 @admin_bp.route('/applications')
 @login_required
 @role_required('admin')
+@read_only
 def applications():
     q = request.args.get('q', '')
-    query = Application.query
-    if q:
-        query = query.join(StudentProfile).filter(StudentProfile.full_name.ilike(f'%{q}%'))
-    applications = query.all()
-    return render_template('admin/applications.html', applications=applications, q=q)
+    include_archived = bool(request.args.get('include_archived'))
+    applications = application_rows(q, include_archived=include_archived)
+    return render_template('admin/applications.html', applications=applications, q=q,
+                           include_archived=include_archived)
 
 # Close a drive (admin action)
 @admin_bp.route('/drives/<int:drive_id>/close', methods=['POST'])
@@ -187,6 +245,8 @@ def applications():
 def close_drive(drive_id):
     drive = PlacementDrive.query.get_or_404(drive_id)
     drive.is_active = False
+    bump_version('drives')
+    bump_company_analytics(drive.company_id)
     db.session.commit()
     log_admin_action(current_user.id, 'close_drive', drive_id, 'drive')
     flash('Drive closed.', 'info')
@@ -196,6 +256,7 @@ def close_drive(drive_id):
 @admin_bp.route('/statistics')
 @login_required
 @role_required('admin')
+@read_only
 def statistics():
     from app.models import AdminAction
     from sqlalchemy import func
@@ -251,78 +312,200 @@ def statistics():
                            dept_stats=dept_stats,
                            recent_actions=recent_actions)
 
+# Placement cube: slice/dice application counts (JSON)
+# Served as last refreshed (`flask cube-refresh` or the cube_refresh job);
+# pending_drives counts the drives changed since
+@admin_bp.route('/cube')
+@login_required
+@role_required('admin')
+@read_only
+def cube():
+    from flask import jsonify
+    from app.cube import DIMENSIONS, INTEGER_DIMENSIONS, cube_query, cube_pending, pivot
+    by = [name for name in request.args.get('by', 'department,graduation_year').split(',') if name]
+    filters = {}
+    for name in DIMENSIONS:
+        if request.args.get(name):
+            values = request.args[name].split(',')
+            try:
+                filters[name] = [int(v) for v in values] if name in INTEGER_DIMENSIONS else values
+            except ValueError:
+                return jsonify({'error': f'{name} must be a list of integers'}), 400
+    try:
+        rows = cube_query(by, filters)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'dimensions': list(DIMENSIONS)}), 400
+    pending = cube_pending()
+    if request.args.get('pivot') and len(by) == 2:
+        return jsonify({'by': by, 'filters': filters, 'pending_drives': pending,
+                        'pivot': pivot(rows, by[0], by[1])})
+    return jsonify({'by': by, 'filters': filters, 'pending_drives': pending, 'rows': rows})
+
 # Export students to CSV
 @admin_bp.route('/export/students')
 @login_required
 @role_required('admin')
+@read_only
 def export_students():
-    import csv
-    from io import StringIO
-    from flask import Response
-    
-    students = StudentProfile.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    writer.writerow(['ID', 'Full Name', 'Roll Number', 'Department', 'CGPA', 'Email', 'Phone'])
-    
-    for s in students:
-        user = User.query.get(s.user_id)
-        writer.writerow([s.id, s.full_name, s.roll_number, s.department, s.cgpa, user.email if user else '', s.phone or ''])
-    
-    output = si.getvalue()
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=students.csv'})
+    return _stream_export('students')
 
 # Export applications to CSV
 @admin_bp.route('/export/applications')
 @login_required
 @role_required('admin')
+@read_only
 def export_applications():
-    import csv
-    from io import StringIO
-    from flask import Response
-    
-    applications = Application.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    writer.writerow(['ID', 'Student Name', 'Roll Number', 'Drive Title', 'Company', 'Status', 'Applied At'])
-    
-    for app in applications:
-        writer.writerow([
-            app.id,
-            app.student.full_name if app.student else '',
-            app.student.roll_number if app.student else '',
-            app.drive.title if app.drive else '',
-            app.drive.company.company_name if app.drive and app.drive.company else '',
-            app.status,
-            app.applied_at.strftime('%Y-%m-%d %H:%M') if app.applied_at else ''
-        ])
-    
-    output = si.getvalue()
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=applications.csv'})
+    return _stream_export('applications')
 
 # Export companies to CSV
 @admin_bp.route('/export/companies')
 @login_required
 @role_required('admin')
+@read_only
 def export_companies():
-    import csv
-    from io import StringIO
-    from flask import Response
-    
-    companies = CompanyProfile.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    writer.writerow(['ID', 'Company Name', 'Industry', 'Location', 'Email', 'Contact Person', 'Status'])
-    
-    for c in companies:
-        user = User.query.get(c.user_id)
-        status = 'Approved' if user and user.is_approved else 'Pending'
-        if user and user.is_blacklisted:
-            status = 'Blacklisted'
-        writer.writerow([c.id, c.company_name, c.industry or '', c.location or '', user.email if user else '', c.contact_person or '', status])
-    
-    output = si.getvalue()
-    return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=companies.csv'})
+    return _stream_export('companies')
+
+def _stream_export(name):
+    """Streams one export (one joined query, see app/exports.py) as the response"""
+    from app.exports import EXPORTS, export_rows
+    export = EXPORTS[name]
+    return stream_csv(export.filename, export.header, export_rows(name))
+
+# Background jobs: queued, running, failed and recently finished
+@admin_bp.route('/jobs')
+@login_required
+@role_required('admin')
+def jobs():
+    from app.jobs import JOB_TYPES, ACTIVE_STATUSES
+    from app.models import Job
+    active = Job.query.filter(Job.status.in_(ACTIVE_STATUSES)).order_by(Job.id).all()
+    failed = Job.query.filter_by(status='failed').order_by(Job.id.desc()).limit(50).all()
+    finished = Job.query.filter(Job.status.in_(['done', 'cancelled'])).order_by(Job.id.desc()).limit(20).all()
+    return render_template('admin/jobs.html', active=active, failed=failed, finished=finished, job_types=JOB_TYPES)
+
+# Queue a background job; answers with the job id
+@admin_bp.route('/jobs', methods=['POST'])
+@login_required
+@role_required('admin')
+def start_job():
+    from flask import jsonify
+    from app.jobs import JOB_TYPES, enqueue_job, parse_params
+    job_type = request.form.get('job_type', '')
+    if job_type not in JOB_TYPES:
+        flash('Unknown job type.', 'danger')
+        return redirect(url_for('admin.jobs'))
+    try:
+        params = parse_params(job_type, request.form)
+    except ValueError:
+        flash('Invalid job parameters.', 'danger')
+        return redirect(url_for('admin.jobs'))
+    job = enqueue_job(job_type, params, current_user.id)
+    db.session.commit()
+    log_admin_action(current_user.id, 'start_job', job.id, 'job', job_type)
+    if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+        return jsonify({'job_id': job.id, 'status': job.status,
+                        'status_url': url_for('admin.job_detail', job_id=job.id, format='json')}), 202
+    flash(f'{JOB_TYPES[job_type].label} queued as job #{job.id}.', 'info')
+    return redirect(url_for('admin.job_detail', job_id=job.id))
+
+# Job progress (HTML, or JSON with ?format=json for polling)
+@admin_bp.route('/jobs/<int:job_id>')
+@login_required
+@role_required('admin')
+def job_detail(job_id):
+    from flask import jsonify
+    from app.jobs import JOB_TYPES, job_dict, result_path
+    from app.models import Job
+    job = Job.query.get_or_404(job_id)
+    if request.args.get('format') == 'json':
+        return jsonify(job_dict(job) | {'download_url': url_for('admin.job_download', job_id=job.id)
+                                        if result_path(job) else None})
+    return render_template('admin/job_detail.html', job=job, job_type=JOB_TYPES.get(job.job_type),
+                           downloadable=result_path(job) is not None)
+
+# Download a finished job's result file
+@admin_bp.route('/jobs/<int:job_id>/download')
+@login_required
+@role_required('admin')
+def job_download(job_id):
+    from flask import send_file, abort
+    from app.jobs import result_path
+    from app.models import Job
+    job = Job.query.get_or_404(job_id)
+    path = result_path(job)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype=job.result_mimetype, as_attachment=True, download_name=job.result_name)
+
+# Cancel a queued or running job
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+@role_required('admin')
+def cancel_job(job_id):
+    from app.jobs import cancel_job as cancel
+    if cancel(job_id):
+        db.session.commit()
+        log_admin_action(current_user.id, 'cancel_job', job_id, 'job')
+        flash(f'Job #{job_id} cancelled.', 'info')
+    else:
+        flash(f'Job #{job_id} has already finished.', 'warning')
+    return redirect(url_for('admin.job_detail', job_id=job_id))
+
+# Queue a failed or cancelled job again with the same parameters
+@admin_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@role_required('admin')
+def retry_job(job_id):
+    import json
+    from app.jobs import JOB_TYPES, enqueue_job
+    from app.models import Job
+    job = Job.query.get_or_404(job_id)
+    if job.status not in ('failed', 'cancelled') or job.job_type not in JOB_TYPES:
+        flash('Only failed or cancelled jobs can be retried.', 'warning')
+        return redirect(url_for('admin.job_detail', job_id=job_id))
+    retry = enqueue_job(job.job_type, json.loads(job.params), current_user.id)
+    db.session.commit()
+    log_admin_action(current_user.id, 'retry_job', retry.id, 'job', f'retry of job {job_id}')
+    flash(f'Queued again as job #{retry.id}.', 'info')
+    return redirect(url_for('admin.job_detail', job_id=retry.id))
+
+# Incremental export for ERP sync: rows changed or deleted after a cursor
+@admin_bp.route('/export/<feed>/changes')
+@login_required
+@role_required('admin')
+@read_only
+def export_changes(feed):
+    import json
+    from datetime import datetime
+    from flask import Response, jsonify, abort
+    from app.changes import get_feed, changes
+    try:
+        fields = get_feed(feed).fields
+    except KeyError:
+        abort(404)
+    config = current_app.config
+    limit = min(request.args.get('limit', config['CHANGE_FEED_PAGE_SIZE'], type=int), config['CHANGE_FEED_MAX_PAGE_SIZE'])
+    output = request.args.get('format', 'csv')
+    try:
+        since = request.args.get('since')
+        since = datetime.fromisoformat(since) if since else None
+        page = changes(feed, request.args.get('cursor'), since, max(limit, 1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def value(v):
+        return v.isoformat() if isinstance(v, datetime) else v
+
+    if output == 'jsonl':
+        body = ''.join(json.dumps({k: value(v) for k, v in record.items()}) + '\n' for record in page.records)
+        response = Response(body, mimetype='application/x-ndjson')
+    elif output == 'csv':
+        header = ['op', 'changed_at'] + [f for f in fields if f != 'updated_at'] + ['reason']
+        rows = ([value(record.get(f)) for f in header] for record in page.records)
+        response = stream_csv(f'{feed}_changes.csv', header, rows)
+    else:
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    # The client stores X-Next-Cursor and passes it back as ?cursor= on the next sync
+    response.headers['X-Next-Cursor'] = page.cursor or ''
+    response.headers['X-Has-More'] = 'true' if page.has_more else 'false'
+    return response
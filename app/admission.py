@@ -0,0 +1,198 @@
+"""
+Admission control for Placement Portal
+Each request is classed by endpoint (critical, write, read, heavy) and shed
+with a fast 503 when its class is at its concurrency limit or the server is
+too busy for its priority; login attempts are rate limited per client and
+account (429)
+"""
+import math
+import threading
+import time
+import zlib
+from fnmatch import fnmatchcase
+
+from flask import request, current_app, g, Response
+
+# Highest priority first; a class is shed once the requests already in
+# flight reach its share of ADMISSION_CAPACITY
+CLASSES = ('critical', 'write', 'read', 'heavy')
+COUNTERS = ('in_flight', 'admitted', 'shed')
+# Row of one worker: COUNTERS per class, then login attempts refused
+ROW_SIZE = len(CLASSES) * len(COUNTERS) + 1
+
+
+class AdmissionState:
+    """
+    Counters and login token buckets behind the admission checks
+    In one process they are plain lists; share() moves them into shared
+    memory before serve.py forks, with one counter row per worker slot
+    """
+
+    def __init__(self, buckets):
+        self.lock = threading.Lock()
+        self.slots = 1
+        self.slot = 0
+        self.counters = [0] * ROW_SIZE
+        # (tokens, last refill time) per bucket; a client hashes to one bucket
+        self.buckets = [0.0] * (2 * buckets)
+
+    def share(self, slots):
+        """Replaces the counters with process-shared arrays (call before forking)"""
+        from multiprocessing import Array, Lock
+        self.lock = Lock()
+        self.slots = slots
+        self.counters = Array('q', slots * ROW_SIZE, lock=False)
+        self.buckets = Array('d', len(self.buckets), lock=False)
+
+    def bind_slot(self, slot):
+        """Makes this process count into its worker slot's row"""
+        self.slot = slot
+
+    def reset_slot(self, slot):
+        """Clears the in-flight counts of a worker that exited (totals are kept)"""
+        with self.lock:
+            for index in range(len(CLASSES)):
+                self.counters[slot * ROW_SIZE + index * len(COUNTERS)] = 0
+
+    def _index(self, slot, name, counter):
+        return slot * ROW_SIZE + CLASSES.index(name) * len(COUNTERS) + COUNTERS.index(counter)
+
+    def _total(self, name, counter):
+        return sum(self.counters[self._index(slot, name, counter)] for slot in range(self.slots))
+
+    def admit(self, name, limit, ceiling):
+        """
+        Takes a place for a request of class name; False when it must be shed
+        limit caps the class itself, ceiling (None = never) all requests in flight
+        """
+        with self.lock:
+            busy = sum(self._total(other, 'in_flight') for other in CLASSES)
+            if ((limit is not None and self._total(name, 'in_flight') >= limit)
+                    or (ceiling is not None and busy >= ceiling)):
+                self.counters[self._index(self.slot, name, 'shed')] += 1
+                return False
+            self.counters[self._index(self.slot, name, 'in_flight')] += 1
+            self.counters[self._index(self.slot, name, 'admitted')] += 1
+            return True
+
+    def shed(self, name):
+        """Counts a request shed before it asked for a place"""
+        with self.lock:
+            self.counters[self._index(self.slot, name, 'shed')] += 1
+
+    def release(self, name):
+        with self.lock:
+            index = self._index(self.slot, name, 'in_flight')
+            if self.counters[index] > 0:
+                self.counters[index] -= 1
+
+    def take_token(self, client, burst, per_second):
+        """
+        Token bucket per client: burst attempts at once, refilled at per_second
+        Returns 0 when a token was taken, else the seconds until the next one
+        """
+        bucket = 2 * (zlib.crc32(client.encode('utf-8')) % (len(self.buckets) // 2))
+        now = time.time()
+        with self.lock:
+            tokens, last = self.buckets[bucket], self.buckets[bucket + 1]
+            # An unused bucket (last == 0) starts full
+            tokens = burst if not last else min(burst, tokens + (now - last) * per_second)
+            if tokens >= 1:
+                self.buckets[bucket], self.buckets[bucket + 1] = tokens - 1, now
+                return 0
+            self.buckets[bucket], self.buckets[bucket + 1] = tokens, now
+            self.counters[self.slot * ROW_SIZE + ROW_SIZE - 1] += 1
+            return (1 - tokens) / per_second
+
+    def stats(self):
+        with self.lock:
+            classes = {name: {counter: self._total(name, counter) for counter in COUNTERS} for name in CLASSES}
+            login_limited = sum(self.counters[slot * ROW_SIZE + ROW_SIZE - 1] for slot in range(self.slots))
+        return classes, login_limited
+
+
+def classify(endpoint, method):
+    """Admission class of a request: ADMISSION_ENDPOINTS patterns, else by method"""
+    for pattern, name in current_app.config['ADMISSION_ENDPOINTS'].items():
+        if endpoint and fnmatchcase(endpoint, pattern):
+            return name
+    return 'read' if method in ('GET', 'HEAD', 'OPTIONS') else 'write'
+
+
+def _refuse(status, message, retry_after):
+    response = Response(message + '\n', status=status, mimetype='text/plain')
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _queued_seconds():
+    """Time spent waiting in front of the app, from a proxy's X-Request-Start (t=<epoch ms or us>)"""
+    stamp = request.headers.get('X-Request-Start', '').removeprefix('t=')
+    try:
+        started = float(stamp)
+    except ValueError:
+        return None
+    # nginx sends seconds with a fraction, HAProxy/Heroku milliseconds or microseconds
+    while started > 1e11:
+        started /= 1000
+    return time.time() - started
+
+
+def admit_request():
+    """before_request hook: sheds or rate limits the request, else takes a place for it"""
+    config = current_app.config
+    if not config.get('ADMISSION_ENABLED'):
+        return None
+    state = current_app.extensions['admission']
+    if request.endpoint == 'auth.login' and request.method == 'POST':
+        rate = config['LOGIN_RATE_PER_MINUTE'] / 60
+        # Per account as well as per address: students behind one campus NAT
+        # (or a proxy without PROXY_FIX_X_FOR) do not throttle each other
+        account = request.form.get('email', '').strip().lower()
+        client = f"{request.remote_addr or 'unknown'}|{account}"
+        wait = state.take_token(client, config['LOGIN_BURST'], rate)
+        if wait:
+            return _refuse(429, 'Too many login attempts. Please wait and try again.', wait)
+
+    name = classify(request.endpoint, request.method)
+    retry_after = config['ADMISSION_RETRY_AFTER']
+    max_queued = config.get('ADMISSION_MAX_QUEUE_SECONDS')
+    if max_queued and name != 'critical':
+        # The client has most likely given up on a request this old
+        queued = _queued_seconds()
+        if queued is not None and queued > max_queued:
+            state.shed(name)
+            return _refuse(503, 'The portal is busy. Please try again shortly.', retry_after)
+    limit, share = config['ADMISSION_CLASSES'][name]
+    capacity = current_app.extensions.get('admission_capacity') or config['ADMISSION_CAPACITY']
+    if not state.admit(name, limit, None if share is None else capacity * share):
+        return _refuse(503, 'The portal is busy. Please try again shortly.', retry_after)
+    g.admission_class = name
+    return None
+
+
+def release_request(exc=None):
+    """teardown_request hook: gives the place back (after a streamed body ends)"""
+    name = g.pop('admission_class', None)
+    if name is not None:
+        current_app.extensions['admission'].release(name)
+
+
+def init_admission(app):
+    """Registers the hooks; admission runs before every other before_request"""
+    app.extensions['admission'] = AdmissionState(app.config['LOGIN_BUCKETS'])
+    app.before_request_funcs.setdefault(None, []).insert(0, admit_request)
+    app.teardown_request(release_request)
+
+
+def admission_stats(app=None):
+    """Per-class in-flight, admitted and shed counts (all workers) and login refusals"""
+    app = app or current_app
+    classes, login_limited = app.extensions['admission'].stats()
+    return {
+        'capacity': app.extensions.get('admission_capacity') or app.config['ADMISSION_CAPACITY'],
+        'classes': classes,
+        'shed_total': sum(counts['shed'] for counts in classes.values()),
+        'login_limited': login_limited,
+    }
@@ -0,0 +1,154 @@
+"""
+Company recruitment analytics for Placement Portal
+Per-drive totals, the applied -> shortlisted -> selected funnel, time to
+decision and time-bucketed application inflow, all from grouped SQL queries.
+Results are cached per company and invalidated through a version counter
+bumped by company and admin actions; student applications and withdrawals
+show up once the entry expires (ANALYTICS_MAX_AGE_SECONDS).
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, case
+
+from app import db
+from app.cache import get_cache
+from app.models import PlacementDrive, Application
+from app.utils import bump_version, get_version
+
+BUCKETS = ('day', 'week')
+
+# Statuses that count as having passed each funnel stage
+FUNNEL = [
+    ('applied', ('pending', 'shortlisted', 'selected', 'rejected', 'withdrawn')),
+    ('shortlisted', ('shortlisted', 'selected')),
+    ('selected', ('selected',)),
+]
+
+
+def _version_name(company_id):
+    return f'company_analytics:{company_id}'
+
+
+def bump_company_analytics(company_id):
+    """Invalidates a company's cached analytics (inside the caller's transaction)"""
+    bump_version(_version_name(company_id))
+
+
+def _bucket(column, bucket):
+    """Expression truncating a timestamp to the start of its day or ISO week"""
+    if db.engine.dialect.name == 'sqlite':
+        if bucket == 'week':
+            # Monday of the timestamp's week
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.date(column)
+    return func.date(func.date_trunc(bucket, column))
+
+
+def _days_between(start, end):
+    if db.engine.dialect.name == 'sqlite':
+        return func.julianday(end) - func.julianday(start)
+    return func.extract('epoch', end - start) / 86400.0
+
+
+def _count_status(statuses):
+    return func.sum(case((Application.status.in_(statuses), 1), else_=0))
+
+
+def compute_company_analytics(company_id, bucket='day', days=90, today=None):
+    """
+    Runs the analytics queries for one company (uncached)
+    The inflow window is the `days` whole days before `today` (UTC) plus today
+    Returns a dict of plain values so it can be cached and serialized
+    """
+    decided = Application.status.in_(('selected', 'rejected'))
+    per_drive = db.session.query(
+        PlacementDrive.id, PlacementDrive.title, PlacementDrive.is_approved, PlacementDrive.is_active,
+        PlacementDrive.application_deadline,
+        func.count(Application.id),
+        *[_count_status(statuses) for _, statuses in FUNNEL[1:]],
+        func.sum(case((Application.status == 'rejected', 1), else_=0)),
+        func.avg(case((decided, _days_between(Application.applied_at, Application.decided_at)))),
+    ).outerjoin(
+        Application, Application.drive_id == PlacementDrive.id
+    ).filter(
+        PlacementDrive.company_id == company_id
+    ).group_by(PlacementDrive.id).order_by(PlacementDrive.id).all()
+
+    drives = []
+    for (drive_id, title, is_approved, is_active, deadline,
+         applied, shortlisted, selected, rejected, decision_days) in per_drive:
+        drives.append({
+            'id': drive_id, 'title': title, 'is_approved': is_approved, 'is_active': is_active,
+            'application_deadline': deadline,
+            'applied': applied, 'shortlisted': shortlisted or 0, 'selected': selected or 0,
+            'rejected': rejected or 0,
+            'days_to_decision': round(decision_days, 1) if decision_days is not None else None,
+        })
+
+    totals = {stage: sum(drive[stage] for drive in drives) for stage, _ in FUNNEL}
+    funnel = []
+    for i, (stage, _) in enumerate(FUNNEL):
+        previous = totals[FUNNEL[i - 1][0]] if i else totals[stage]
+        funnel.append({
+            'stage': stage,
+            'count': totals[stage],
+            'conversion': round(totals[stage] / previous * 100, 1) if previous else 0.0,
+        })
+    decision_days = db.session.query(
+        func.avg(_days_between(Application.applied_at, Application.decided_at))
+    ).join(PlacementDrive, PlacementDrive.id == Application.drive_id).filter(
+        PlacementDrive.company_id == company_id, decided
+    ).scalar()
+
+    today = today or datetime.utcnow().date()
+    since = datetime.combine(today - timedelta(days=days), datetime.min.time())
+    period = _bucket(Application.applied_at, bucket).label('period')
+    inflow_rows = db.session.query(
+        Application.drive_id, period, func.count(Application.id)
+    ).join(PlacementDrive, PlacementDrive.id == Application.drive_id).filter(
+        PlacementDrive.company_id == company_id, Application.applied_at >= since
+    ).group_by(Application.drive_id, period).order_by(period).all()
+    periods = sorted({str(row[1]) for row in inflow_rows})
+    position = {value: i for i, value in enumerate(periods)}
+    inflow = {}
+    for drive_id, value, count in inflow_rows:
+        inflow.setdefault(drive_id, [0] * len(periods))[position[str(value)]] = count
+
+    return {
+        'bucket': bucket,
+        'days': days,
+        'drives': drives,
+        'stats': {
+            'total_drives': len(drives),
+            'active_drives': sum(1 for d in drives if d['is_active'] and d['is_approved']),
+            'pending_drives': sum(1 for d in drives if not d['is_approved']),
+            'total_applications': totals['applied'],
+        },
+        'funnel': funnel,
+        'days_to_decision': round(decision_days, 1) if decision_days is not None else None,
+        'periods': periods,
+        'inflow': inflow,
+        'computed_at': datetime.utcnow(),
+    }
+
+
+def company_analytics(company_id, bucket='day', days=90):
+    """
+    Cached company analytics: one version lookup when nothing changed
+    Company and admin changes to the drives or applications bump the version;
+    the key also carries the date, so the days window moves on daily, and a
+    time slot, so students applying or withdrawing are seen within
+    ANALYTICS_MAX_AGE_SECONDS without each of them writing the version row
+    """
+    if bucket not in BUCKETS:
+        bucket = 'day'
+    version, _ = get_version(_version_name(company_id))
+    # The version is bumped in the same commit as the change, so it stays in
+    # the database; the date moves the sliding window on even without writes
+    now = datetime.utcnow()
+    today = now.date()
+    slot = int((now - datetime.min).total_seconds() // current_app.config['ANALYTICS_MAX_AGE_SECONDS'])
+    key = f'company:{company_id}:{bucket}:{days}:{today.isoformat()}:t{slot}:v{version}'
+    return get_cache('analytics').get_or_set(
+        key, lambda: compute_company_analytics(company_id, bucket, days, today))
@@ -0,0 +1 @@
+from .routes import api_bp
\ No newline at end of file
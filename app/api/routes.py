@@ -0,0 +1,271 @@
+"""
+JSON API (v1) for Placement Portal
+Read-only endpoints for the mobile app and the college ERP with cursor
+pagination, sparse fieldsets and column-level queries (no ORM hydration)
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from flask import Blueprint, Response, request, current_app, abort
+from flask_login import current_user
+from sqlalchemy import select
+
+from app import db
+from app.engine import read_only
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+# Field registry per resource: public name -> (column, join needed to reach it)
+# Only the requested columns are selected and only the joins they need are added
+RESOURCES = {
+    'drives': {
+        'model': PlacementDrive,
+        'fields': {
+            'id': (PlacementDrive.id, None),
+            'title': (PlacementDrive.title, None),
+            'company_id': (PlacementDrive.company_id, None),
+            'company_name': (CompanyProfile.company_name, 'company'),
+            'job_type': (PlacementDrive.job_type, None),
+            'location': (PlacementDrive.location, None),
+            'package': (PlacementDrive.package, None),
+            'description': (PlacementDrive.description, None),
+            'eligibility_criteria': (PlacementDrive.eligibility_criteria, None),
+            'required_skills': (PlacementDrive.required_skills, None),
+            'application_deadline': (PlacementDrive.application_deadline, None),
+            'is_approved': (PlacementDrive.is_approved, None),
+            'is_active': (PlacementDrive.is_active, None),
+            'created_at': (PlacementDrive.created_at, None),
+            'updated_at': (PlacementDrive.updated_at, None),
+        },
+        'joins': {
+            'company': (CompanyProfile, CompanyProfile.id == PlacementDrive.company_id),
+        },
+        'default_fields': ['id', 'title', 'company_name', 'job_type', 'location', 'package', 'application_deadline'],
+    },
+    'applications': {
+        'model': Application,
+        'fields': {
+            'id': (Application.id, None),
+            'student_id': (Application.student_id, None),
+            'drive_id': (Application.drive_id, None),
+            'status': (Application.status, None),
+            'remarks': (Application.remarks, None),
+            'applied_at': (Application.applied_at, None),
+            'updated_at': (Application.updated_at, None),
+            'student_name': (StudentProfile.full_name, 'student'),
+            'roll_number': (StudentProfile.roll_number, 'student'),
+            'drive_title': (PlacementDrive.title, 'drive'),
+            'company_name': (CompanyProfile.company_name, 'company'),
+        },
+        'joins': {
+            'student': (StudentProfile, StudentProfile.id == Application.student_id),
+            'drive': (PlacementDrive, PlacementDrive.id == Application.drive_id),
+            'company': (CompanyProfile, CompanyProfile.id == PlacementDrive.company_id),
+        },
+        # Joins that must come first when another join is requested
+        'join_requires': {'company': 'drive'},
+        'default_fields': ['id', 'student_id', 'drive_id', 'status', 'applied_at', 'updated_at'],
+    },
+    'students': {
+        'model': StudentProfile,
+        'fields': {
+            'id': (StudentProfile.id, None),
+            'user_id': (StudentProfile.user_id, None),
+            'email': (User.email, 'user'),
+            'full_name': (StudentProfile.full_name, None),
+            'roll_number': (StudentProfile.roll_number, None),
+            'department': (StudentProfile.department, None),
+            'graduation_year': (StudentProfile.graduation_year, None),
+            'year': (StudentProfile.year, None),
+            'cgpa': (StudentProfile.cgpa, None),
+            'tenth_marks': (StudentProfile.tenth_marks, None),
+            'twelfth_marks': (StudentProfile.twelfth_marks, None),
+            'phone': (StudentProfile.phone, None),
+            'skills': (StudentProfile.skills, None),
+            'created_at': (StudentProfile.created_at, None),
+        },
+        'joins': {
+            'user': (User, User.id == StudentProfile.user_id),
+        },
+        'default_fields': ['id', 'full_name', 'roll_number', 'department', 'graduation_year', 'cgpa'],
+    },
+    'companies': {
+        'model': CompanyProfile,
+        'fields': {
+            'id': (CompanyProfile.id, None),
+            'user_id': (CompanyProfile.user_id, None),
+            'email': (User.email, 'user'),
+            'is_approved': (User.is_approved, 'user'),
+            'company_name': (CompanyProfile.company_name, None),
+            'industry': (CompanyProfile.industry, None),
+            'location': (CompanyProfile.location, None),
+            'website': (CompanyProfile.website, None),
+            'contact_person': (CompanyProfile.contact_person, None),
+            'contact_phone': (CompanyProfile.contact_phone, None),
+            'description': (CompanyProfile.description, None),
+            'created_at': (CompanyProfile.created_at, None),
+            'updated_at': (CompanyProfile.updated_at, None),
+        },
+        'joins': {
+            'user': (User, User.id == CompanyProfile.user_id),
+        },
+        'default_fields': ['id', 'company_name', 'industry', 'location', 'website'],
+    },
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def _json(payload, status=200):
+    # Compact separators: no whitespace in large pages
+    body = json.dumps(payload, separators=(',', ':'), default=_json_default)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _error(message, status):
+    abort(_json({'error': message}, status))
+
+
+def _encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({'after': last_id}).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))['after'])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        _error('Invalid cursor.', 400)
+
+
+def _requested_fields(resource):
+    fields = request.args.get('fields')
+    if not fields:
+        names = list(resource['default_fields'])
+    else:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in names if name not in resource['fields']]
+        if unknown:
+            _error(f'Unknown fields: {", ".join(unknown)}', 400)
+    # id is always returned and selected first; it is the pagination key
+    return ['id'] + [name for name in names if name != 'id']
+
+
+def _page(name, scope=None, filters=()):
+    """
+    Runs one keyset page for a resource and returns the JSON response
+    scope/filters are extra WHERE clauses on the resource's base table
+    """
+    resource = RESOURCES[name]
+    model = resource['model']
+    names = _requested_fields(resource)
+    limit = request.args.get('limit', current_app.config['API_DEFAULT_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+    needed = []
+    for field in names:
+        join = resource['fields'][field][1]
+        prerequisite = resource.get('join_requires', {}).get(join)
+        for key in (prerequisite, join):
+            if key and key not in needed:
+                needed.append(key)
+
+    stmt = select(*[resource['fields'][field][0] for field in names]).select_from(model)
+    for key in needed:
+        target, onclause = resource['joins'][key]
+        stmt = stmt.join(target, onclause)
+    if scope is not None:
+        stmt = stmt.where(scope)
+    for clause in filters:
+        stmt = stmt.where(clause)
+    cursor = request.args.get('cursor')
+    if cursor:
+        stmt = stmt.where(model.id > _decode_cursor(cursor))
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(model.id).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = [dict(zip(names, row)) for row in rows]
+    return _json({
+        'data': data,
+        'next_cursor': _encode_cursor(rows[-1][0]) if has_more else None,
+    })
+
+
+@api_bp.before_request
+def require_api_user():
+    if not current_user.is_authenticated:
+        _error('Authentication required.', 401)
+    if not current_user.is_active_user():
+        _error('Account is deactivated or blacklisted.', 403)
+    if current_user.role == 'company' and not current_user.is_approved:
+        _error('Company account pending admin approval.', 403)
+
+
+def _require_admin():
+    if current_user.role != 'admin':
+        _error('Admin access required.', 403)
+
+
+# Placement drives (students see open drives, companies their own)
+@api_bp.route('/drives')
+@read_only
+def drives():
+    scope = None
+    if current_user.role == 'student':
+        scope = (PlacementDrive.is_approved == True) & (PlacementDrive.is_active == True)
+    elif current_user.role == 'company':
+        scope = PlacementDrive.company_id == current_user.company_profile.id
+    filters = []
+    if request.args.get('job_type'):
+        filters.append(PlacementDrive.job_type == request.args['job_type'])
+    return _page('drives', scope, filters)
+
+
+# Applications (scoped to the student's own or the company's drives)
+@api_bp.route('/applications')
+@read_only
+def applications():
+    scope = None
+    if current_user.role == 'student':
+        scope = Application.student_id == current_user.student_profile.id
+    elif current_user.role == 'company':
+        own_drives = select(PlacementDrive.id).where(PlacementDrive.company_id == current_user.company_profile.id)
+        scope = Application.drive_id.in_(own_drives)
+    filters = []
+    if request.args.get('status'):
+        filters.append(Application.status == request.args['status'])
+    if request.args.get('drive_id', type=int):
+        filters.append(Application.drive_id == request.args.get('drive_id', type=int))
+    return _page('applications', scope, filters)
+
+
+# Student profiles (admin only)
+@api_bp.route('/students')
+@read_only
+def students():
+    _require_admin()
+    filters = []
+    if request.args.get('department'):
+        filters.append(StudentProfile.department == request.args['department'])
+    if request.args.get('graduation_year', type=int):
+        filters.append(StudentProfile.graduation_year == request.args.get('graduation_year', type=int))
+    return _page('students', filters=filters)
+
+
+# Company profiles (admin only)
+@api_bp.route('/companies')
+@read_only
+def companies():
+    _require_admin()
+    return _page('companies')
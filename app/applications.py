@@ -0,0 +1,79 @@
+"""
+Application status changes for Placement Portal
+Set-based updates shared by the single and bulk company views: ownership is
+checked with one join and the change is applied with one UPDATE
+"""
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Application, PlacementDrive, StudentProfile
+from app.notifications import enqueue_event
+from app.cube import mark_cube_dirty
+from app.analytics import bump_company_analytics
+from app.interviews import schedule_interviews, release_interviews
+from app.policies import enforce_policies
+
+VALID_STATUSES = ['pending', 'shortlisted', 'selected', 'rejected']
+
+
+def update_statuses(company_id, status, application_ids=None, drive_id=None,
+                    current_status=None, max_cgpa=None):
+    """
+    Sets `status` on every matching application of the company's drives
+    Matches explicit application_ids and/or a filter (drive, current status,
+    CGPA below max_cgpa). Applications already in `status` are left alone.
+    Newly shortlisted candidates are scheduled for interviews and seats held
+    by candidates leaving the shortlist are given to others. Selecting
+    students applies the placement policies to their other applications.
+    Adds the notification event to the transaction; the caller commits.
+    Returns the ids that changed.
+    """
+    owned = select(Application.id).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).where(
+        PlacementDrive.company_id == company_id,
+        Application.status != status,
+        # Withdrawn by a placement policy; companies cannot reopen these
+        Application.status != 'withdrawn',
+    )
+    if application_ids is not None:
+        owned = owned.where(Application.id.in_(application_ids))
+    if drive_id is not None:
+        owned = owned.where(Application.drive_id == drive_id)
+    if current_status:
+        owned = owned.where(Application.status == current_status)
+    if max_cgpa is not None:
+        owned = owned.join(StudentProfile, StudentProfile.id == Application.student_id).where(StudentProfile.cgpa < max_cgpa)
+
+    now = datetime.utcnow()
+    values = {'status': status, 'updated_at': now}
+    if status == 'selected':
+        values['selected_at'] = now
+    if status in ('selected', 'rejected'):
+        values['decided_at'] = now
+    stmt = update(Application).where(Application.id.in_(owned)).values(
+        **values
+    ).execution_options(synchronize_session=False)
+    if db.engine.dialect.update_returning:
+        changed = list(db.session.scalars(stmt.returning(Application.id)))
+    else:
+        changed = list(db.session.scalars(owned))
+        if changed:
+            db.session.execute(stmt)
+    if changed:
+        mark_cube_dirty(select(Application.drive_id).where(Application.id.in_(changed)).distinct())
+        bump_company_analytics(company_id)
+        enqueue_event('application_status_changed', {'application_ids': changed, 'status': status})
+        if status == 'shortlisted':
+            drive_ids = list(db.session.scalars(
+                select(Application.drive_id).where(Application.id.in_(changed)).distinct()))
+            schedule_interviews(drive_ids=drive_ids)
+        else:
+            freed = release_interviews(changed)
+            if freed:
+                schedule_interviews(drive_ids=freed)
+        if status == 'selected':
+            enforce_policies(select(Application.student_id).where(Application.id.in_(changed)))
+    return changed
@@ -0,0 +1,134 @@
+"""
+Archive tables for Placement Portal
+archived_<table> mirrors a hot table's columns (without constraints) plus
+archive metadata; rows are moved in with set-based INSERT ... SELECT
+"""
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import select, literal, delete, func
+
+from app import db
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application, AdminAction
+
+
+def _archive_table(source):
+    """
+    Builds archived_<name> for a model's table
+    Ids can be reused by SQLite, so the archive has its own surrogate key
+    """
+    columns = [db.Column('archive_id', db.Integer, primary_key=True, autoincrement=True)]
+    for column in source.columns:
+        columns.append(db.Column(column.name, column.type, nullable=True, index=column.name == 'id'))
+    columns.append(db.Column('archived_at', db.DateTime, nullable=False))
+    columns.append(db.Column('archive_reason', db.String(50)))
+    return db.Table(f'archived_{source.name}', db.metadata, *columns)
+
+
+ARCHIVE_TABLES = {
+    model.__table__.name: _archive_table(model.__table__)
+    for model in (User, CompanyProfile, StudentProfile, PlacementDrive, Application, AdminAction)
+}
+
+
+def archive_rows(model, where, reason, now=None):
+    """
+    Copies the rows of `model` matching `where` into its archive table
+    One INSERT ... SELECT; the caller deletes the originals and commits
+    """
+    source = model.__table__
+    target = ARCHIVE_TABLES[source.name]
+    names = [column.name for column in source.columns]
+    rows = select(
+        *source.columns,
+        literal(now or datetime.utcnow(), db.DateTime).label('archived_at'),
+        literal(reason, db.String(50)).label('archive_reason'),
+    ).where(where)
+    return db.session.execute(target.insert().from_select(names + ['archived_at', 'archive_reason'], rows)).rowcount
+
+
+def archive_drive(drive_id, reason):
+    """Archives a drive and its applications (children first)"""
+    now = datetime.utcnow()
+    archive_rows(Application, Application.drive_id == drive_id, reason, now)
+    archive_rows(PlacementDrive, PlacementDrive.id == drive_id, reason, now)
+
+
+def archive_company(user_id, reason):
+    """Archives a company user with its profile, drives and their applications"""
+    now = datetime.utcnow()
+    company_ids = select(CompanyProfile.id).where(CompanyProfile.user_id == user_id)
+    drive_ids = select(PlacementDrive.id).where(PlacementDrive.company_id.in_(company_ids))
+    archive_rows(Application, Application.drive_id.in_(drive_ids), reason, now)
+    archive_rows(PlacementDrive, PlacementDrive.company_id.in_(company_ids), reason, now)
+    archive_rows(CompanyProfile, CompanyProfile.user_id == user_id, reason, now)
+    archive_rows(User, User.id == user_id, reason, now)
+
+
+def archive_graduated_students(years_after_graduation, batch_size=500, dry_run=False, progress=None):
+    """
+    Moves students whose graduation_year + years_after_graduation has passed,
+    with their user rows and applications, into the archive tables
+    Each batch is copied and deleted in one transaction, so an interrupted
+    run resumes with the students still left. progress(moved) is called after
+    each batch commits. Returns the students moved
+    """
+    from app.cube import mark_cube_dirty
+    from app.analytics import bump_company_analytics
+    from app.changes import record_deletions
+    cutoff_year = date.today().year - years_after_graduation
+    eligible = select(StudentProfile.id, StudentProfile.user_id).where(
+        StudentProfile.graduation_year < cutoff_year)
+    if dry_run:
+        return db.session.query(func.count()).select_from(eligible.subquery()).scalar()
+
+    moved, last_id = 0, 0
+    while True:
+        batch = db.session.execute(
+            eligible.where(StudentProfile.id > last_id).order_by(StudentProfile.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return moved
+        student_ids = [row.id for row in batch]
+        user_ids = [row.user_id for row in batch]
+        now = datetime.utcnow()
+        affected_drives = select(Application.drive_id).where(Application.student_id.in_(student_ids)).distinct()
+        company_ids = [row[0] for row in db.session.execute(
+            select(PlacementDrive.company_id).where(PlacementDrive.id.in_(affected_drives)).distinct())]
+        mark_cube_dirty(affected_drives)
+        for company_id in company_ids:
+            bump_company_analytics(company_id)
+        archive_rows(Application, Application.student_id.in_(student_ids), 'cohort_archival', now)
+        archive_rows(StudentProfile, StudentProfile.id.in_(student_ids), 'cohort_archival', now)
+        archive_rows(User, User.id.in_(user_ids), 'cohort_archival', now)
+        record_deletions(Application, Application.student_id.in_(student_ids), 'cohort_archival', now)
+        record_deletions(StudentProfile, StudentProfile.id.in_(student_ids), 'cohort_archival', now)
+        # ON DELETE CASCADE removes the profiles and applications
+        db.session.execute(delete(User).where(User.id.in_(user_ids)))
+        db.session.commit()
+        moved += len(batch)
+        last_id = student_ids[-1]
+        if progress is not None:
+            progress(moved)
+
+
+def archive_admin_actions(older_than_days, batch_size=1000, dry_run=False, progress=None):
+    """
+    Moves admin audit rows older than the given age into archived_admin_actions
+    in batched transactions, calling progress(moved) after each. Returns the rows moved
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    old = select(AdminAction.id).where(AdminAction.timestamp < cutoff)
+    if dry_run:
+        return db.session.query(func.count()).select_from(old.subquery()).scalar()
+
+    moved = 0
+    while True:
+        ids = list(db.session.scalars(old.order_by(AdminAction.id).limit(batch_size)))
+        if not ids:
+            return moved
+        archive_rows(AdminAction, AdminAction.id.in_(ids), 'age', datetime.utcnow())
+        db.session.execute(delete(AdminAction).where(AdminAction.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+        if progress is not None:
+            progress(moved)
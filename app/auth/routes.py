@@ -106,7 +106,14 @@ def company_register():
         db.session.commit()
         profile = CompanyProfile(user_id=user.id, company_name=company_name)
         db.session.add(profile)
+        # Trigram index for duplicate detection; admins see matches on the pending list
+        from app.duplicates import index_company, find_duplicates
+        index_company(profile)
+        duplicates = find_duplicates([profile.id])
         db.session.commit()
+        if duplicates:
+            flash('A company with a similar name or domain is already registered. '
+                  'If your organisation has an account, please sign in with it instead.', 'warning')
         flash('Registration successful. Await admin approval.', 'info')
         return redirect(url_for('auth.login'))
     return render_template('company_register.html')
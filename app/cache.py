@@ -0,0 +1,354 @@
+"""
+Application cache for Placement Portal
+Views and helpers call get_cache() for a namespaced view of one pluggable
+backend. SQLiteCache keeps entries in a local SQLite file, so every worker
+process on the host shares one warm cache and sees the same invalidations;
+MemoryCache is a private in-process LRU for tests and single-process runs
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from werkzeug.utils import import_string
+
+# Process-wide counters, read through cache_stats()
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'sets': 0,
+    'evictions': 0,
+    'errors': 0,
+}
+
+
+def _record(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class MemoryCache:
+    """
+    In-process store with least-recently-used eviction (the fake backend for tests)
+    Every backend provides get / set / delete / evict / clear and the
+    get_version / bump_version pair behind namespace invalidation
+    """
+    name = 'memory'
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._groups = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, groups=()):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            for group in groups:
+                self._groups.setdefault(group, set()).add(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                _record('evictions')
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def evict(self, group):
+        """Drops every entry stored under the given group"""
+        with self._lock:
+            for key in self._groups.pop(group, ()):
+                self._items.pop(key, None)
+
+    def get_version(self, namespace):
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._groups.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteCache:
+    """
+    Store shared by every process on the host, in one SQLite file (WAL mode)
+    Values are pickled. Eviction is least recently used, with access times
+    refreshed at most every TOUCH_SECONDS so that hits rarely write. Any
+    SQLite error (e.g. a lock held past CACHE_TIMEOUT_MS) is a miss, never a
+    failure, except in bump_version(): a lost bump would leave stale entries
+    live in every other process, so it retries and then raises
+    """
+    name = 'sqlite'
+    TOUCH_SECONDS = 5
+    BUMP_ATTEMPTS = 5
+    # Sets between two size checks in one process
+    CHECK_EVERY = 100
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cache_entries ('
+        ' key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed)',
+        'CREATE TABLE IF NOT EXISTS cache_groups ('
+        ' grp TEXT NOT NULL, key TEXT NOT NULL REFERENCES cache_entries (key) ON DELETE CASCADE,'
+        ' PRIMARY KEY (grp, key))',
+        'CREATE INDEX IF NOT EXISTS ix_cache_groups_key ON cache_groups (key)',
+        'CREATE TABLE IF NOT EXISTS cache_versions (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)',
+    )
+
+    def __init__(self, path, maxsize=20000, timeout_ms=200):
+        self.path = path
+        self.maxsize = maxsize
+        self.timeout_ms = timeout_ms
+        self._local = threading.local()
+        self._sets = 0
+
+    def _connection(self):
+        # One connection per thread, and never one inherited across a fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout_ms / 1000, isolation_level=None)
+            # A cache can lose its last writes on power loss; it only needs to stay consistent
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('PRAGMA foreign_keys=ON')
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _run(self, work, default=None):
+        try:
+            return work(self._connection())
+        except sqlite3.Error as e:
+            _record('errors')
+            if has_app_context():
+                current_app.logger.warning('Cache %s unavailable: %s', self.path, e)
+            return default
+
+    def get(self, key):
+        row = self._run(lambda connection: connection.execute(
+            'SELECT value, accessed FROM cache_entries WHERE key = ?', (key,)).fetchone())
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.TOUCH_SECONDS:
+            # Best effort: with the write lock busy the entry just ages a little
+            # faster, and the value already read is still a hit
+            try:
+                self._connection().execute('UPDATE cache_entries SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.Error:
+                pass
+        return pickle.loads(row[0])
+
+    def set(self, key, value, groups=()):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        def work(connection):
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'INSERT INTO cache_entries (key, value, accessed) VALUES (?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, accessed = excluded.accessed',
+                    (key, data, time.time()))
+                connection.executemany('INSERT OR IGNORE INTO cache_groups (grp, key) VALUES (?, ?)',
+                                       [(group, key) for group in groups])
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            self._sets += 1
+            if self._sets % self.CHECK_EVERY == 1:
+                self._trim(connection)
+        self._run(work)
+
+    def _trim(self, connection):
+        """Evicts the least recently used tenth once the store is over maxsize"""
+        size = connection.execute('SELECT count(*) FROM cache_entries').fetchone()[0]
+        if size <= self.maxsize:
+            return
+        excess = size - int(self.maxsize * 0.9)
+        connection.execute('DELETE FROM cache_entries WHERE key IN '
+                           '(SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)', (excess,))
+        _record('evictions', excess)
+
+    def delete(self, key):
+        self._run(lambda connection: connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,)))
+
+    def evict(self, group):
+        """Drops every entry stored under the given group, in every process"""
+        self._run(lambda connection: connection.execute(
+            'DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_groups WHERE grp = ?)', (group,)))
+
+    def get_version(self, namespace):
+        """The namespace's version stamp, or None when the store cannot be read"""
+        def work(connection):
+            row = connection.execute('SELECT version FROM cache_versions WHERE namespace = ?',
+                                     (namespace,)).fetchone()
+            return row[0] if row else 0
+        return self._run(work)
+
+    def bump_version(self, namespace):
+        """Increments the version stamp; raises sqlite3.Error if the lock stays busy"""
+        def work(connection):
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT INTO cache_versions (namespace, version) VALUES (?, 1) '
+                                   'ON CONFLICT (namespace) DO UPDATE SET version = version + 1', (namespace,))
+                version = connection.execute('SELECT version FROM cache_versions WHERE namespace = ?',
+                                             (namespace,)).fetchone()[0]
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            return version
+
+        for attempt in range(self.BUMP_ATTEMPTS):
+            try:
+                return work(self._connection())
+            except sqlite3.OperationalError:
+                _record('errors')
+                if attempt == self.BUMP_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.05 * 2 ** attempt)
+
+    def clear(self):
+        def work(connection):
+            connection.execute('DELETE FROM cache_entries')
+            connection.execute('DELETE FROM cache_versions')
+        self._run(work)
+
+    def __len__(self):
+        row = self._run(lambda connection: connection.execute('SELECT count(*) FROM cache_entries').fetchone())
+        return row[0] if row else 0
+
+
+class CacheNamespace:
+    """
+    A namespace of the app cache: keys are prefixed with the tenant and the
+    namespace, plus the namespace's version stamp. invalidate() bumps the
+    stamp in the backend, so every process stops finding the old entries at
+    once (they age out through LRU eviction). While the stamp cannot be read
+    the namespace is bypassed: every get misses and set does nothing
+    """
+
+    def __init__(self, backend, namespace):
+        from app.tenants import current_tenant
+        self.backend = backend
+        self.namespace = namespace
+        self.prefix = f"{current_tenant() or ''}|{namespace}|"
+
+    def version(self):
+        # Read once per request; a bump in another process applies from the next one
+        if not has_request_context():
+            return self.backend.get_version(self.prefix)
+        versions = g.setdefault('cache_versions', {})
+        if self.prefix not in versions:
+            version = self.backend.get_version(self.prefix)
+            if version is None:
+                return None
+            versions[self.prefix] = version
+        return versions[self.prefix]
+
+    def _key(self, name):
+        """Full backend key, or None while the version stamp is unknown"""
+        version = self.version()
+        return None if version is None else f'{self.prefix}v{version}|{name}'
+
+    def get(self, name, default=None):
+        key = self._key(name)
+        value = None if key is None else self.backend.get(key)
+        _record('misses' if value is None else 'hits')
+        return default if value is None else value
+
+    def set(self, name, value, groups=()):
+        """Stores value (None cannot be cached); groups name entities for evict()"""
+        key = self._key(name)
+        if key is None:
+            return
+        _record('sets')
+        self.backend.set(key, value, [self.prefix + group for group in groups])
+
+    def get_or_set(self, name, compute):
+        value = self.get(name)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(name, value)
+        return value
+
+    def delete(self, name):
+        key = self._key(name)
+        if key is not None:
+            self.backend.delete(key)
+
+    def evict(self, group):
+        self.backend.evict(self.prefix + group)
+
+    def invalidate(self):
+        """
+        Drops the whole namespace, for every process sharing the backend
+        Raises the backend's error rather than lose the invalidation
+        """
+        version = self.backend.bump_version(self.prefix)
+        if has_request_context():
+            g.setdefault('cache_versions', {})[self.prefix] = version
+
+
+def create_backend(app):
+    """Backend named by CACHE_BACKEND: 'sqlite', 'memory' or 'package.module:Class' taking the app"""
+    config = app.config
+    backend = config.get('CACHE_BACKEND') or 'memory'
+    if backend == 'memory':
+        return MemoryCache(config['CACHE_MAX_ENTRIES'])
+    if backend == 'sqlite':
+        return SQLiteCache(config['CACHE_PATH'], config['CACHE_MAX_ENTRIES'], config['CACHE_TIMEOUT_MS'])
+    return import_string(backend)(app)
+
+
+def init_cache(app):
+    app.extensions['cache'] = create_backend(app)
+
+
+def get_cache(namespace=None, app=None):
+    """The app cache under a namespace (default: the current blueprint, else 'app')"""
+    app = app or current_app
+    if namespace is None:
+        namespace = (request.blueprint if has_request_context() else None) or 'app'
+    return CacheNamespace(app.extensions['cache'], namespace)
+
+
+def cache_stats(app=None):
+    """Hit/miss counters of this process plus the backend and its size"""
+    app = app or current_app
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    backend = app.extensions['cache']
+    stats['backend'] = getattr(backend, 'name', type(backend).__name__)
+    stats['entries'] = len(backend) if hasattr(backend, '__len__') else None
+    return stats
@@ -0,0 +1,197 @@
+"""
+Incremental change feed for Placement Portal (ERP synchronisation)
+Rows changed since a cursor, in (changed_at, id) keyset order: updates come
+from updated_at, deletes from the tombstones table written next to each delete
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update, literal, and_, or_, true, event, inspect
+
+from app import db
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application, Tombstone
+
+# Deletes sort before updates sharing a timestamp, so a reused id is deleted
+# and then re-created rather than the other way round
+DELETE, UPSERT = 0, 1
+
+Feed = namedtuple('Feed', ['table', 'updated_at', 'id', 'stmt', 'fields'])
+
+ChangePage = namedtuple('ChangePage', ['records', 'cursor', 'has_more'])
+
+
+def _student_feed():
+    stmt = select(
+        StudentProfile.id, StudentProfile.user_id, StudentProfile.full_name, StudentProfile.roll_number,
+        StudentProfile.department, StudentProfile.graduation_year, StudentProfile.cgpa,
+        User.email, StudentProfile.phone, StudentProfile.updated_at,
+    ).join(User, User.id == StudentProfile.user_id)
+    return Feed('student_profiles', StudentProfile.updated_at, StudentProfile.id, stmt,
+                [column.name for column in stmt.selected_columns])
+
+
+@event.listens_for(User, 'after_update')
+def _touch_student_profile(mapper, connection, target):
+    """
+    The students feed also carries users columns (email) but follows
+    student_profiles.updated_at, so a changed users row moves its profile
+    along in the same flush
+    """
+    if target.role != 'student':
+        return
+    state = inspect(target)
+    if not any(state.attrs[column.key].history.has_changes() for column in mapper.column_attrs):
+        return
+    connection.execute(update(StudentProfile.__table__).where(
+        StudentProfile.__table__.c.user_id == target.id).values(updated_at=datetime.utcnow()))
+
+
+def _changed(target, *columns):
+    state = inspect(target)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+def _touch_applications(connection, where):
+    applications = Application.__table__
+    connection.execute(update(applications).where(where).values(updated_at=datetime.utcnow()))
+
+
+# The applications feed joins in these columns; a change to one moves the
+# affected applications along in the same flush, as for users -> profiles
+# (time to decision reads decided_at, so it is not shifted by this)
+@event.listens_for(StudentProfile, 'after_update')
+def _touch_student_applications(mapper, connection, target):
+    if _changed(target, 'roll_number'):
+        _touch_applications(connection, Application.__table__.c.student_id == target.id)
+
+
+@event.listens_for(PlacementDrive, 'after_update')
+def _touch_drive_applications(mapper, connection, target):
+    if _changed(target, 'title'):
+        _touch_applications(connection, Application.__table__.c.drive_id == target.id)
+
+
+@event.listens_for(CompanyProfile, 'after_update')
+def _touch_company_applications(mapper, connection, target):
+    if _changed(target, 'company_name'):
+        drives = select(PlacementDrive.__table__.c.id).where(PlacementDrive.__table__.c.company_id == target.id)
+        _touch_applications(connection, Application.__table__.c.drive_id.in_(drives))
+
+
+def _application_feed():
+    stmt = select(
+        Application.id, Application.student_id, StudentProfile.roll_number, Application.drive_id,
+        PlacementDrive.title.label('drive_title'), CompanyProfile.company_name,
+        Application.status, Application.applied_at, Application.updated_at,
+    ).join(
+        StudentProfile, StudentProfile.id == Application.student_id
+    ).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).join(
+        CompanyProfile, CompanyProfile.id == PlacementDrive.company_id
+    )
+    return Feed('applications', Application.updated_at, Application.id, stmt,
+                [column.name for column in stmt.selected_columns])
+
+
+FEEDS = {
+    'students': _student_feed,
+    'applications': _application_feed,
+}
+
+
+def get_feed(name):
+    if name not in FEEDS:
+        raise KeyError(f'Unknown change feed: {name}')
+    return FEEDS[name]()
+
+
+def record_deletions(model, where, reason='deleted', now=None):
+    """
+    Writes a tombstone for every row of `model` matching `where`
+    One INSERT ... SELECT; call it before the delete, in the same transaction
+    (ON DELETE CASCADE children need their own call)
+    """
+    source = model.__table__
+    rows = select(
+        literal(source.name, db.String(50)), source.c.id,
+        literal(reason, db.String(50)), literal(now or datetime.utcnow(), db.DateTime),
+    ).where(where)
+    stmt = Tombstone.__table__.insert().from_select(['table_name', 'row_id', 'reason', 'deleted_at'], rows)
+    return db.session.execute(stmt).rowcount
+
+
+def encode_cursor(changed_at, kind, row_id):
+    raw = json.dumps([changed_at.isoformat(), kind, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(changed_at, kind, id) from a cursor string; ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        changed_at, kind, row_id = json.loads(raw)
+        return datetime.fromisoformat(changed_at), int(kind), int(row_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
+
+
+def _after(changed_at, row_id, kind, position):
+    """Keyset condition: (changed_at, kind, row_id) > position"""
+    if position is None:
+        return true()
+    at, at_kind, at_id = position
+    if kind > at_kind:
+        return changed_at >= at
+    if kind < at_kind:
+        return changed_at > at
+    return or_(changed_at > at, and_(changed_at == at, row_id > at_id))
+
+
+def changes(name, cursor=None, since=None, limit=1000):
+    """
+    One page of changes for a feed, oldest first
+    Resume from `cursor` (the previous page's) or start at the `since`
+    datetime; with neither, the feed starts from the first row. Rows younger
+    than CHANGE_FEED_LAG_SECONDS are held back so a transaction that commits
+    late cannot slip in behind a cursor that has already moved past it.
+    Returns a ChangePage; records are dicts with 'op' and 'changed_at'
+    """
+    feed = get_feed(name)
+    if cursor:
+        position = decode_cursor(cursor)
+    elif since is not None:
+        position = (since, DELETE - 1, 0)
+    else:
+        position = None
+    horizon = datetime.utcnow() - timedelta(seconds=current_app.config['CHANGE_FEED_LAG_SECONDS'])
+
+    upserts = db.session.execute(
+        feed.stmt.where(feed.updated_at <= horizon, _after(feed.updated_at, feed.id, UPSERT, position))
+        .order_by(feed.updated_at, feed.id).limit(limit + 1)
+    ).all()
+    deletes = db.session.execute(
+        select(Tombstone.id, Tombstone.row_id, Tombstone.reason, Tombstone.deleted_at).where(
+            Tombstone.table_name == feed.table, Tombstone.deleted_at <= horizon,
+            _after(Tombstone.deleted_at, Tombstone.id, DELETE, position),
+        ).order_by(Tombstone.deleted_at, Tombstone.id).limit(limit + 1)
+    ).all()
+
+    merged = [((row.updated_at, UPSERT, row.id), dict(row._mapping, op='upsert')) for row in upserts]
+    merged += [((row.deleted_at, DELETE, row.id), {'op': 'delete', 'id': row.row_id, 'reason': row.reason})
+               for row in deletes]
+    merged.sort(key=lambda item: item[0])
+    page = merged[:limit]
+    records = []
+    for (changed_at, _, _), record in page:
+        record['changed_at'] = changed_at
+        records.append(record)
+    if page:
+        next_cursor = encode_cursor(*page[-1][0])
+    else:
+        next_cursor = encode_cursor(*position) if position else None
+    return ChangePage(records, next_cursor, len(merged) > limit)
@@ -0,0 +1,213 @@
+"""
+Command-line tasks for Placement Portal
+Registered on the app as `flask <command>`; imports stay inside each command
+so that creating the app does not load them
+"""
+import time
+from functools import wraps
+
+import click
+from flask import g
+
+
+def _use_tenant(name):
+    """Points the command's session at a tenant database (None = default)"""
+    from app import db
+    from app.tenants import tenant_engine
+    from flask import current_app
+    try:
+        tenant_engine(current_app, name)
+    except KeyError as e:
+        raise click.BadParameter(str(e.args[0]), param_hint='--tenant')
+    db.session.remove()
+    g.tenant = name
+
+
+def tenant_option(f):
+    """Adds --tenant to a command; without it the default database is used"""
+    @click.option('--tenant', default=None, help='Tenant database to use (see TENANT_DATABASE_URLS).')
+    @wraps(f)
+    def decorated_function(tenant, *args, **kwargs):
+        _use_tenant(tenant)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def register_commands(app):
+    """Adds the maintenance commands to app.cli"""
+
+    @app.cli.command('bootstrap')
+    @click.option('--tenant', default=None, help='Bootstrap one tenant database.')
+    @click.option('--all-tenants', is_flag=True, help='Bootstrap the default and every tenant database.')
+    def bootstrap_command(tenant, all_tenants):
+        """Create tables, apply migrations and seed the default admin."""
+        from app.migrations import bootstrap
+        from app.tenants import tenant_names
+        targets = [None] + tenant_names(app) if all_tenants else [tenant]
+        for name in targets:
+            _use_tenant(name)
+            start = time.perf_counter()
+            applied = bootstrap()
+            elapsed = (time.perf_counter() - start) * 1000
+            label = f'[{name}] ' if name else ''
+            if applied:
+                click.echo(f"✓ {label}Applied migrations: {', '.join(str(v) for v in applied)}")
+            else:
+                click.echo(f'✓ {label}Schema is up to date')
+            click.echo(f'  Bootstrap finished in {elapsed:.1f} ms')
+
+    @app.cli.command('tenant-report')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+    def tenant_report_command(as_json):
+        """Headline counts for every tenant database, queried in parallel."""
+        from app.tenants import cross_tenant_report
+        report = cross_tenant_report(app)
+        if as_json:
+            import json
+            click.echo(json.dumps(report, indent=2))
+            return
+        click.echo(f"  {'tenant':20} {'students':>9} {'companies':>9} {'drives':>7} {'apps':>8} {'selected':>9} {'ms':>8}")
+        for row in report['tenants']:
+            if 'error' in row:
+                click.echo(f"  {row['tenant']:20} error: {row['error']}")
+                continue
+            click.echo(f"  {row['tenant']:20} {row['students']:>9} {row['companies']:>9} {row['active_drives']:>7} "
+                       f"{row['applications']:>8} {row['selected']:>9} {row['query_ms']:>8}")
+        totals = report['totals']
+        click.echo(f"  {'total':20} {totals['students']:>9} {totals['companies']:>9} {totals['active_drives']:>7} "
+                   f"{totals['applications']:>8} {totals['selected']:>9} {report['elapsed_ms']:>8}")
+
+    @app.cli.command('outbox-worker')
+    @tenant_option
+    @click.option('--once', is_flag=True, help='Drain the outbox once and exit.')
+    @click.option('--batch-size', type=int, default=None, help='Events claimed per pass.')
+    @click.option('--interval', type=float, default=2.0, help='Seconds to sleep when idle.')
+    def outbox_worker_command(once, batch_size, interval):
+        """Deliver pending notification events from the outbox."""
+        from app.notifications import drain_outbox, outbox_stats
+        click.echo('✓ Outbox worker started')
+        while True:
+            batch = drain_outbox(batch_size)
+            if batch.events:
+                rate = batch.messages / batch.seconds if batch.seconds else 0.0
+                click.echo(f"  {batch.events} events, {batch.messages} messages sent, "
+                           f"{rate:.1f} msg/s, backlog {outbox_stats()['backlog']}")
+                continue
+            if once:
+                break
+            time.sleep(interval)
+
+    @app.cli.command('job-worker')
+    @tenant_option
+    @click.option('--once', is_flag=True, help='Run the jobs that are due and exit.')
+    @click.option('--interval', type=float, default=2.0, help='Seconds to sleep when idle.')
+    def job_worker_command(once, interval):
+        """Run background jobs queued from the admin pages (start several for parallelism)."""
+        from app.jobs import run_next_job, purge_jobs
+        click.echo('✓ Job worker started')
+        last_purge = 0.0
+        while True:
+            ran = run_next_job()
+            if ran:
+                click.echo(f'  job {ran[0]}: {ran[1]}')
+                continue
+            if time.monotonic() - last_purge > 3600:
+                purged = purge_jobs()
+                if purged:
+                    click.echo(f'  purged {purged} old jobs')
+                last_purge = time.monotonic()
+            if once:
+                break
+            time.sleep(interval)
+
+    @app.cli.command('cube-refresh')
+    @tenant_option
+    @click.option('--full', is_flag=True, help='Rebuild every cell instead of only dirty drives.')
+    def cube_refresh_command(full):
+        """Recompute placement cube cells for drives changed since the last refresh."""
+        from app.cube import refresh_cube
+        start = time.perf_counter()
+        drives = refresh_cube(full=full, batch_size=app.config['CUBE_REFRESH_BATCH_SIZE'])
+        elapsed = (time.perf_counter() - start) * 1000
+        click.echo(f'✓ Refreshed cube cells for {drives} drives in {elapsed:.1f} ms')
+
+    @app.cli.command('backfill-packages')
+    @tenant_option
+    @click.option('--batch-size', type=int, default=500, help='Drives parsed per transaction.')
+    @click.option('--reparse', is_flag=True, help='Re-parse drives that already have values.')
+    def backfill_packages_command(batch_size, reparse):
+        """Parse drive package text into the numeric CTC / stipend columns."""
+        from app.packages import backfill_packages
+        start = time.perf_counter()
+        updated = backfill_packages(batch_size, reparse)
+        elapsed = (time.perf_counter() - start) * 1000
+        click.echo(f'✓ Parsed packages of {updated} drives in {elapsed:.1f} ms')
+
+    @app.cli.command('archive-cohorts')
+    @tenant_option
+    @click.option('--years', type=int, default=None, help='Years after graduation_year before archiving.')
+    @click.option('--admin-actions-days', type=int, default=None, help='Archive admin actions older than this.')
+    @click.option('--batch-size', type=int, default=None, help='Rows moved per transaction.')
+    @click.option('--dry-run', is_flag=True, help='Only count what would be archived.')
+    def archive_cohorts_command(years, admin_actions_days, batch_size, dry_run):
+        """Move graduated cohorts and old admin actions into the archive tables."""
+        from app.archive import archive_graduated_students, archive_admin_actions
+        config = app.config
+        years = config['ARCHIVE_AFTER_GRADUATION_YEARS'] if years is None else years
+        days = config['ARCHIVE_ADMIN_ACTIONS_DAYS'] if admin_actions_days is None else admin_actions_days
+        batch_size = batch_size or config['ARCHIVE_BATCH_SIZE']
+        start = time.perf_counter()
+        students = archive_graduated_students(years, batch_size, dry_run)
+        actions = archive_admin_actions(days, batch_size, dry_run)
+        elapsed = (time.perf_counter() - start) * 1000
+        verb = 'Would archive' if dry_run else 'Archived'
+        click.echo(f'✓ {verb} {students} students (graduated more than {years} years ago) '
+                   f'and {actions} admin actions older than {days} days in {elapsed:.1f} ms')
+
+    @app.cli.command('schedule-interviews')
+    @tenant_option
+    @click.option('--full', is_flag=True, help='Drop upcoming assignments and schedule everyone again.')
+    def schedule_interviews_command(full):
+        """Assign shortlisted candidates to interview slots without clashes."""
+        from app import db
+        from app.interviews import schedule_interviews
+        result = schedule_interviews(full=full)
+        db.session.commit()
+        click.echo(f"✓ Scheduled {result['assigned']} interviews across {result['drives']} drives "
+                   f"({result['unassigned']} still waiting for a slot) in {result['elapsed_ms']} ms")
+
+    @app.cli.command('enforce-policies')
+    @tenant_option
+    @click.option('--dry-run', is_flag=True, help='Only count the applications each policy would withdraw.')
+    def enforce_policies_command(dry_run):
+        """Re-evaluate every open application against the placement policies."""
+        from app import db
+        from app.policies import enforce_policies, policy_report
+        start = time.perf_counter()
+        for name, count in policy_report().items():
+            click.echo(f'  {name:15} {count:>8} open applications in breach')
+        if dry_run:
+            return
+        withdrawn = enforce_policies()
+        db.session.commit()
+        elapsed = (time.perf_counter() - start) * 1000
+        click.echo(f'✓ Withdrew {len(withdrawn)} applications in {elapsed:.1f} ms')
+
+    @app.cli.command('dedup-companies')
+    @tenant_option
+    @click.option('--threshold', type=float, default=None, help='Name similarity 0-1 (default DUPLICATE_COMPANY_THRESHOLD).')
+    @click.option('--reindex', is_flag=True, help='Rebuild name keys, domains and the trigram index first.')
+    def dedup_companies_command(threshold, reindex):
+        """Report likely duplicate companies across the whole table."""
+        from app import db
+        from app.duplicates import dedup_report, rebuild_company_index
+        start = time.perf_counter()
+        if reindex:
+            indexed = rebuild_company_index(db.session.connection())
+            db.session.commit()
+            click.echo(f'✓ Re-indexed {indexed} companies')
+        pairs = dedup_report(threshold)
+        elapsed = (time.perf_counter() - start) * 1000
+        for score, reason, first, second in pairs:
+            click.echo(f'  {score:4.2f} {reason:15} #{first[0]} {first[1]} | #{second[0]} {second[1]}')
+        click.echo(f'✓ {len(pairs)} likely duplicate pairs in {elapsed:.1f} ms')
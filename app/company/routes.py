@@ -4,10 +4,14 @@ Profile, drive management, and application review
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app.utils import role_required
+from app.engine import read_only
+from app.utils import role_required, bump_version
+from app.applications import update_statuses, VALID_STATUSES
+from app.cube import mark_cube_dirty
+from app.analytics import company_analytics, bump_company_analytics, BUCKETS
 from app import db
 from app.models import User, CompanyProfile, PlacementDrive, Application, StudentProfile
-from datetime import date
+from datetime import date, datetime, timedelta
 
 company_bp = Blueprint('company', __name__, url_prefix='/company')
 
@@ -15,17 +19,33 @@ company_bp = Blueprint('company', __name__, url_prefix='/company')
 @company_bp.route('/dashboard')
 @login_required
 @role_required('company')
+@read_only
 def dashboard():
     profile = CompanyProfile.query.filter_by(user_id=current_user.id).first()
-    drives = PlacementDrive.query.filter_by(company_id=profile.id).all() if profile else []
-    stats = {
-        'total_drives': len(drives),
-        'active_drives': len([d for d in drives if d.is_active and d.is_approved]),
-        'pending_drives': len([d for d in drives if not d.is_approved]),
-        'total_applications': Application.query.join(PlacementDrive).filter(PlacementDrive.company_id == profile.id).count() if profile else 0
+    # Totals and per-drive counts come from the cached analytics (grouped queries)
+    analytics = company_analytics(profile.id) if profile else None
+    drives = analytics['drives'] if analytics else []
+    stats = analytics['stats'] if analytics else {
+        'total_drives': 0, 'active_drives': 0, 'pending_drives': 0, 'total_applications': 0,
     }
     return render_template('company/dashboard.html', profile=profile, drives=drives, stats=stats)
 
+# Recruitment analytics: inflow, funnel and time to decision
+@company_bp.route('/analytics')
+@login_required
+@role_required('company')
+@read_only
+def analytics():
+    profile = CompanyProfile.query.filter_by(user_id=current_user.id).first()
+    if not profile:
+        flash('Complete your company profile first.', 'warning')
+        return redirect(url_for('company.profile'))
+    bucket = request.args.get('bucket', 'day')
+    days = request.args.get('days', 90, type=int)
+    days = min(max(days, 1), 730)
+    data = company_analytics(profile.id, bucket, days)
+    return render_template('company/analytics.html', profile=profile, data=data, buckets=BUCKETS)
+
 # Company profile view
 @company_bp.route('/profile')
 @login_required
@@ -48,6 +68,9 @@ def edit_profile():
         profile.contact_person = request.form.get('contact_person')
         profile.contact_phone = request.form.get('contact_phone')
         profile.description = request.form.get('description')
+        from app.duplicates import index_company
+        index_company(profile)
+        bump_version('drives')
         db.session.commit()
         flash('Profile updated successfully.', 'success')
         return redirect(url_for('company.profile'))
@@ -112,6 +135,8 @@ def create_drive():
             is_active=True
         )
         db.session.add(drive)
+        bump_version('drives')
+        bump_company_analytics(drive.company_id)
         db.session.commit()
         flash('Drive created. Awaiting admin approval.', 'info')
         return redirect(url_for('company.drives'))
@@ -121,6 +146,7 @@ def create_drive():
 @company_bp.route('/drives')
 @login_required
 @role_required('company')
+@read_only
 def drives():
     drives = PlacementDrive.query.filter_by(company_id=current_user.company_profile.id).all()
     return render_template('company/drives.html', drives=drives)
@@ -136,6 +162,8 @@ def edit_drive(drive_id):
     if request.method == 'POST':
         drive.title = request.form['title']
         drive.description = request.form['description']
+        if drive.job_type != request.form['job_type']:
+            mark_cube_dirty([drive.id])
         drive.job_type = request.form['job_type']
         drive.location = request.form['location']
         drive.package = request.form['package']
@@ -145,6 +173,8 @@ def edit_drive(drive_id):
         from datetime import datetime
         application_deadline_str = request.form['application_deadline']
         drive.application_deadline = datetime.strptime(application_deadline_str, '%Y-%m-%d').date()
+        bump_version('drives')
+        bump_company_analytics(drive.company_id)
         db.session.commit()
         flash('Drive updated.', 'success')
         return redirect(url_for('company.drives'))
@@ -159,6 +189,8 @@ def close_drive(drive_id):
         flash('Unauthorized.', 'danger')
         return redirect(url_for('company.drives'))
     drive.is_active = False
+    bump_version('drives')
+    bump_company_analytics(drive.company_id)
     db.session.commit()
     flash('Drive closed.', 'info')
     return redirect(url_for('company.drives'))
@@ -167,6 +199,7 @@ def close_drive(drive_id):
 @company_bp.route('/drives/<int:drive_id>/applications')
 @login_required
 @role_required('company')
+@read_only
 def drive_applications(drive_id):
     drive = PlacementDrive.query.get_or_404(drive_id)
     if drive.company_id != current_user.company_profile.id:
@@ -180,16 +213,143 @@ def drive_applications(drive_id):
 @login_required
 @role_required('company')
 def update_application(app_id):
-    app = Application.query.get_or_404(app_id)
-    drive = PlacementDrive.query.get(app.drive_id)
-    if drive.company_id != current_user.company_profile.id:
+    company_id = current_user.company_profile.id
+    # Ownership check and drive lookup in one join
+    app = db.session.query(Application.id, Application.drive_id, Application.status).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).filter(Application.id == app_id, PlacementDrive.company_id == company_id).first()
+    if app is None:
         flash('Unauthorized.', 'danger')
         return redirect(url_for('company.drives'))
+    if app.status == 'withdrawn':
+        flash('This application was withdrawn under the placement policy.', 'warning')
+        return redirect(url_for('company.drive_applications', drive_id=app.drive_id))
     status = request.form['status']
-    if status in ['pending', 'shortlisted', 'selected', 'rejected']:
-        app.status = status
+    if status in VALID_STATUSES:
+        update_statuses(company_id, status, application_ids=[app.id])
         db.session.commit()
         flash('Application status updated.', 'success')
     else:
         flash('Invalid status.', 'danger')
     return redirect(url_for('company.drive_applications', drive_id=app.drive_id))
+
+def _own_drive(drive_id):
+    """The drive if it belongs to the logged-in company, else None"""
+    drive = PlacementDrive.query.get_or_404(drive_id)
+    return drive if drive.company_id == current_user.company_profile.id else None
+
+# Interview slots and the candidates scheduled into them
+@company_bp.route('/drives/<int:drive_id>/interviews')
+@login_required
+@role_required('company')
+@read_only
+def drive_interviews(drive_id):
+    from app.models import InterviewSlot, InterviewAssignment
+    drive = _own_drive(drive_id)
+    if drive is None:
+        flash('Unauthorized.', 'danger')
+        return redirect(url_for('company.drives'))
+    slots = InterviewSlot.query.filter_by(drive_id=drive_id).order_by(InterviewSlot.starts_at).all()
+    booked = db.session.query(
+        InterviewAssignment.id, InterviewAssignment.slot_id, StudentProfile.full_name, StudentProfile.roll_number
+    ).join(StudentProfile, StudentProfile.id == InterviewAssignment.student_id).join(
+        InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id
+    ).filter(
+        InterviewSlot.drive_id == drive_id, InterviewAssignment.status == 'scheduled'
+    ).order_by(StudentProfile.full_name).all()
+    candidates = {}
+    for row in booked:
+        candidates.setdefault(row.slot_id, []).append(row)
+    scheduled = db.session.query(InterviewAssignment.application_id).filter(InterviewAssignment.status == 'scheduled')
+    waiting = db.session.query(StudentProfile.full_name, StudentProfile.roll_number).join(
+        Application, Application.student_id == StudentProfile.id
+    ).filter(
+        Application.drive_id == drive_id, Application.status == 'shortlisted', Application.id.not_in(scheduled)
+    ).order_by(StudentProfile.full_name).all()
+    return render_template('company/interviews.html', drive=drive, slots=slots, candidates=candidates,
+                           waiting=waiting, now=datetime.utcnow())
+
+# Declare interview slots (optionally several back to back)
+@company_bp.route('/drives/<int:drive_id>/interviews/slots', methods=['POST'])
+@login_required
+@role_required('company')
+def add_interview_slots(drive_id):
+    from app.interviews import add_slot, schedule_interviews, SlotConflict
+    drive = _own_drive(drive_id)
+    if drive is None:
+        flash('Unauthorized.', 'danger')
+        return redirect(url_for('company.drives'))
+    try:
+        starts_at = datetime.strptime(request.form['starts_at'], '%Y-%m-%dT%H:%M')
+        duration = timedelta(minutes=request.form.get('duration', 30, type=int))
+        count = max(1, min(request.form.get('count', 1, type=int), 50))
+        for i in range(count):
+            add_slot(drive.id, starts_at + i * duration, starts_at + (i + 1) * duration,
+                     request.form.get('room'), request.form.get('capacity', 1, type=int))
+    except (KeyError, ValueError) as e:
+        db.session.rollback()
+        flash(str(e) if isinstance(e, SlotConflict) else 'Invalid slot details.', 'danger')
+        return redirect(url_for('company.drive_interviews', drive_id=drive_id))
+    result = schedule_interviews(drive_ids=[drive.id])
+    db.session.commit()
+    flash(f'{count} slot(s) added; {result["assigned"]} candidate(s) scheduled.', 'success')
+    return redirect(url_for('company.drive_interviews', drive_id=drive_id))
+
+@company_bp.route('/interviews/slots/<int:slot_id>/delete', methods=['POST'])
+@login_required
+@role_required('company')
+def delete_interview_slot(slot_id):
+    from app.models import InterviewSlot
+    from app.interviews import cancel_slot
+    slot = InterviewSlot.query.get_or_404(slot_id)
+    if _own_drive(slot.drive_id) is None:
+        flash('Unauthorized.', 'danger')
+        return redirect(url_for('company.drives'))
+    drive_id = slot.drive_id
+    result = cancel_slot(slot_id)
+    db.session.commit()
+    flash(f'Slot removed; {result["assigned"]} candidate(s) rescheduled.', 'info')
+    return redirect(url_for('company.drive_interviews', drive_id=drive_id))
+
+@company_bp.route('/interviews/<int:assignment_id>/cancel', methods=['POST'])
+@login_required
+@role_required('company')
+def cancel_interview(assignment_id):
+    from app.models import InterviewAssignment
+    from app.interviews import cancel_assignment
+    assignment = InterviewAssignment.query.get_or_404(assignment_id)
+    drive_id = assignment.slot.drive_id
+    if _own_drive(drive_id) is None:
+        flash('Unauthorized.', 'danger')
+        return redirect(url_for('company.drives'))
+    cancel_assignment(assignment_id)
+    db.session.commit()
+    flash('Interview cancelled; the schedule was updated.', 'info')
+    return redirect(url_for('company.drive_interviews', drive_id=drive_id))
+
+# Bulk status update for a drive (selected rows or a filter)
+@company_bp.route('/drives/<int:drive_id>/applications/bulk', methods=['POST'])
+@login_required
+@role_required('company')
+def bulk_update_applications(drive_id):
+    status = request.form.get('status')
+    if status not in VALID_STATUSES:
+        flash('Invalid status.', 'danger')
+        return redirect(url_for('company.drive_applications', drive_id=drive_id))
+    if request.form.get('scope') == 'filter':
+        # e.g. "all pending applicants below CGPA 7.0"
+        changed = update_statuses(
+            current_user.company_profile.id, status, drive_id=drive_id,
+            current_status=request.form.get('filter_status') or None,
+            max_cgpa=request.form.get('max_cgpa', type=float),
+        )
+    else:
+        application_ids = request.form.getlist('application_ids', type=int)
+        if not application_ids:
+            flash('No applications selected.', 'warning')
+            return redirect(url_for('company.drive_applications', drive_id=drive_id))
+        changed = update_statuses(current_user.company_profile.id, status,
+                                  application_ids=application_ids, drive_id=drive_id)
+    db.session.commit()
+    flash(f'{len(changed)} application(s) marked {status}.', 'success')
+    return redirect(url_for('company.drive_applications', drive_id=drive_id))
@@ -0,0 +1,187 @@
+"""
+Response compression for Placement Portal
+Compresses large HTML/CSV/JSON responses with gzip (or brotli when the
+`brotli` package is installed); streamed responses are compressed chunk by chunk
+"""
+import threading
+import time
+import zlib
+
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+# Process-wide counters, read through compression_stats()
+_stats_lock = threading.Lock()
+_stats = {
+    'responses_compressed': 0,
+    'responses_skipped': 0,
+    'bytes_in': 0,
+    'bytes_out': 0,
+    'cpu_ms_total': 0.0,
+}
+
+
+class _GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        # wbits=31 writes the gzip header and trailer
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        # Pushes out everything buffered so far without ending the stream
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, level):
+        # Brotli quality runs 0-11; map the shared 1-9 level onto it
+        self._obj = brotli.Compressor(quality=min(11, round(level * 11 / 9)))
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+ENCODERS = {'gzip': _GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = _BrotliEncoder
+
+
+def _choose_encoding(config):
+    """First configured encoding the client accepts, or None"""
+    accepted = request.accept_encodings
+    for name in config['COMPRESSION_ENCODINGS']:
+        if name in ENCODERS and accepted.quality(name) > 0:
+            return name
+    return None
+
+
+def _should_compress(response, config):
+    if request.method == 'HEAD' or response.status_code != 200:
+        return False
+    if 'Content-Encoding' in response.headers or response.direct_passthrough:
+        return False
+    if response.mimetype not in config['COMPRESSION_MIMETYPES']:
+        return False
+    # Streamed bodies have no length up front and are exports by construction
+    if not response.is_streamed and (response.content_length or 0) < config['COMPRESSION_MIN_SIZE']:
+        return False
+    return True
+
+
+class _Meter:
+    """Per-response size and CPU accounting, reported when the body is done"""
+
+    def __init__(self, encoding, path, logger):
+        self.encoding = encoding
+        self.path = path
+        self.logger = logger
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    def run(self, fn, data=None):
+        start = time.thread_time()
+        out = fn(data) if data is not None else fn()
+        self.cpu += time.thread_time() - start
+        self.bytes_out += len(out)
+        return out
+
+    def done(self):
+        cpu_ms = self.cpu * 1000
+        with _stats_lock:
+            _stats['responses_compressed'] += 1
+            _stats['bytes_in'] += self.bytes_in
+            _stats['bytes_out'] += self.bytes_out
+            _stats['cpu_ms_total'] += cpu_ms
+        ratio = self.bytes_in / self.bytes_out if self.bytes_out else 0.0
+        self.logger.debug('compressed %s with %s: %d -> %d bytes (%.1fx) in %.2f ms CPU',
+                          self.path, self.encoding, self.bytes_in, self.bytes_out, ratio, cpu_ms)
+
+
+def _compress_stream(chunks, encoder, meter):
+    """Compresses an iterable of body chunks, flushing after each so clients see progress"""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            meter.bytes_in += len(chunk)
+            data = meter.run(encoder.compress, chunk) + meter.run(encoder.flush)
+            if data:
+                yield data
+        yield meter.run(encoder.finish)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        meter.done()
+
+
+def compress_response(response):
+    """after_request hook: compresses the body when the client and config allow it"""
+    config = current_app.config
+    if not config.get('COMPRESSION_ENABLED'):
+        return response
+    if response.mimetype in config['COMPRESSION_MIMETYPES']:
+        response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(config) if _should_compress(response, config) else None
+    if encoding is None:
+        with _stats_lock:
+            _stats['responses_skipped'] += 1
+        return response
+
+    encoder = ENCODERS[encoding](config['COMPRESSION_LEVEL'])
+    meter = _Meter(encoding, request.path, current_app.logger)
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoder, meter)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        meter.bytes_in = len(body)
+        response.set_data(meter.run(encoder.compress, body) + meter.run(encoder.finish))
+        meter.done()
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes are a different representation of the same page
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Registers the compression hook; it runs after every other after_request"""
+    # Flask runs after_request functions in reverse registration order,
+    # so registering first makes this one see the final response
+    app.after_request_funcs.setdefault(None, []).insert(0, compress_response)
+
+
+def compression_stats():
+    """Snapshot of the compression counters"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['ratio'] = round(stats['bytes_in'] / stats['bytes_out'], 2) if stats['bytes_out'] else 0.0
+    stats['cpu_ms_total'] = round(stats['cpu_ms_total'], 3)
+    compressed = stats['responses_compressed']
+    stats['cpu_ms_avg'] = round(stats['cpu_ms_total'] / compressed, 3) if compressed else 0.0
+    stats['encodings'] = sorted(ENCODERS)
+    return stats
@@ -0,0 +1,144 @@
+"""
+Placement OLAP cube for Placement Portal
+Application counts pre-aggregated per (drive, department, graduation year,
+status) in placement_cube; slices and pivots group those cells in SQL
+"""
+from sqlalchemy import select, delete, insert, func
+
+from app import db
+from app.models import (Application, StudentProfile, PlacementDrive, CompanyProfile,
+                        PlacementCubeCell, PlacementCubeDirty)
+
+# Dimension name -> cube column; 'company' is reported with its name
+DIMENSIONS = {
+    'department': PlacementCubeCell.department,
+    'company': PlacementCubeCell.company_id,
+    'job_type': PlacementCubeCell.job_type,
+    'status': PlacementCubeCell.status,
+    'graduation_year': PlacementCubeCell.graduation_year,
+}
+
+# Dimensions whose filter values are integers
+INTEGER_DIMENSIONS = {'company', 'graduation_year'}
+
+_CELL_COLUMNS = ['drive_id', 'company_id', 'job_type', 'department', 'graduation_year', 'status', 'applications']
+
+
+def _cells_select(drive_ids=None):
+    """Cube cells computed from the base tables, optionally for some drives only"""
+    stmt = select(
+        Application.drive_id, PlacementDrive.company_id, PlacementDrive.job_type,
+        StudentProfile.department, StudentProfile.graduation_year, Application.status,
+        func.count(Application.id),
+    ).select_from(Application).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).join(
+        StudentProfile, StudentProfile.id == Application.student_id
+    ).group_by(
+        Application.drive_id, PlacementDrive.company_id, PlacementDrive.job_type,
+        StudentProfile.department, StudentProfile.graduation_year, Application.status,
+    )
+    if drive_ids is not None:
+        stmt = stmt.where(Application.drive_id.in_(drive_ids))
+    return stmt
+
+
+def mark_cube_dirty(drive_ids):
+    """
+    Queues drives for the next refresh_cube() (the caller commits)
+    drive_ids may be a list or a SELECT of drive ids
+    """
+    if isinstance(drive_ids, (list, tuple, set)):
+        if not drive_ids:
+            return
+        db.session.execute(insert(PlacementCubeDirty), [{'drive_id': drive_id} for drive_id in set(drive_ids)])
+    else:
+        db.session.execute(insert(PlacementCubeDirty).from_select(['drive_id'], drive_ids))
+
+
+def rebuild_cube(connection):
+    """Recomputes every cell; used by the migration that creates the cube"""
+    connection.execute(delete(PlacementCubeCell))
+    connection.execute(insert(PlacementCubeCell).from_select(_CELL_COLUMNS, _cells_select()))
+    connection.execute(delete(PlacementCubeDirty))
+
+
+def refresh_cube(full=False, batch_size=200, progress=None):
+    """
+    Recomputes the cells of drives marked dirty since the last refresh (or
+    of every drive with full=True), committing every batch_size drives.
+    progress(done, total) is called after each batch, so a long refresh can
+    report (and renew a job lease). Returns the drives refreshed
+    """
+    if full:
+        everything = select(PlacementCubeCell.drive_id).union(select(Application.drive_id)).subquery()
+        db.session.execute(insert(PlacementCubeDirty).from_select(['drive_id'], select(everything.c.drive_id)))
+        db.session.commit()
+    # Marks added while this runs have higher ids and wait for the next refresh
+    last_mark = db.session.query(func.max(PlacementCubeDirty.id)).scalar()
+    if last_mark is None:
+        return 0
+    drive_ids = [row[0] for row in db.session.query(PlacementCubeDirty.drive_id).filter(
+        PlacementCubeDirty.id <= last_mark).distinct().order_by(PlacementCubeDirty.drive_id)]
+    for start in range(0, len(drive_ids), batch_size):
+        batch = drive_ids[start:start + batch_size]
+        db.session.execute(delete(PlacementCubeCell).where(PlacementCubeCell.drive_id.in_(batch)))
+        db.session.execute(insert(PlacementCubeCell).from_select(_CELL_COLUMNS, _cells_select(batch)))
+        db.session.execute(delete(PlacementCubeDirty).where(
+            PlacementCubeDirty.id <= last_mark, PlacementCubeDirty.drive_id.in_(batch)))
+        db.session.commit()
+        if progress is not None:
+            progress(start + len(batch), len(drive_ids))
+    return len(drive_ids)
+
+
+def cube_pending():
+    """Drives changed since the last refresh_cube(), i.e. whose cells may be stale"""
+    return db.session.query(func.count(func.distinct(PlacementCubeDirty.drive_id))).scalar()
+
+
+def cube_query(by, filters=None):
+    """
+    Application counts grouped by the `by` dimensions over cells matching
+    `filters` ({dimension: [values]}). Returns a list of dicts, one per group
+    Raises ValueError for unknown dimensions
+    """
+    filters = filters or {}
+    unknown = [name for name in list(by) + list(filters) if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}")
+
+    columns = [DIMENSIONS[name].label(name) for name in by]
+    stmt = select(*columns, func.sum(PlacementCubeCell.applications).label('applications'))
+    for name, values in filters.items():
+        stmt = stmt.where(DIMENSIONS[name].in_(values))
+    if columns:
+        stmt = stmt.group_by(*columns).order_by(*columns)
+    rows = [dict(row._mapping) for row in db.session.execute(stmt)]
+    rows = [row for row in rows if row['applications']]
+
+    if 'company' in by:
+        ids = {row['company'] for row in rows}
+        names = dict(db.session.query(CompanyProfile.id, CompanyProfile.company_name)
+                     .filter(CompanyProfile.id.in_(ids))) if ids else {}
+        for row in rows:
+            row['company_name'] = names.get(row['company'])
+    return rows
+
+
+def pivot(rows, index, columns):
+    """
+    Reshapes two-dimension cube_query() rows into a matrix:
+    {'index': [...], 'columns': [...], 'cells': [[count, ...], ...]}
+    """
+    index_values = sorted({row[index] for row in rows}, key=lambda v: (v is None, v))
+    column_values = sorted({row[columns] for row in rows}, key=lambda v: (v is None, v))
+    position = {value: i for i, value in enumerate(column_values)}
+    cells = {value: [0] * len(column_values) for value in index_values}
+    for row in rows:
+        cells[row[index]][position[row[columns]]] += row['applications']
+    return {
+        'index': index_values,
+        'columns': column_values,
+        'cells': [cells[value] for value in index_values],
+    }
@@ -0,0 +1,284 @@
+"""
+Database diagnostics for Placement Portal (used by verify_db.py)
+Row counts, on-disk sizes and indexes per table, plus query plans for a
+registry of the app's hot queries with full scans flagged and indexes suggested
+"""
+import json
+import re
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import inspect, select, func, text, Column
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression
+
+from app import db
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+
+# expect_scan: the query reads the whole table by design (reported, not flagged)
+HotQuery = namedtuple('HotQuery', ['name', 'description', 'build', 'expect_scan'])
+
+EQUALITY_OPS = {operators.eq, operators.in_op, operators.is_}
+RANGE_OPS = {operators.gt, operators.ge, operators.lt, operators.le}
+
+# Sample parameters; plans do not depend on the values
+SAMPLE_ID = 1
+
+
+def _open_drives(**filters):
+    from app.student.routes import DRIVE_SORTS
+    stmt = select(PlacementDrive, CompanyProfile).join(
+        CompanyProfile, CompanyProfile.id == PlacementDrive.company_id
+    ).where(
+        PlacementDrive.is_approved == True, PlacementDrive.is_active == True,
+        PlacementDrive.application_deadline >= date.today(),
+    )
+    if 'job_type' in filters:
+        stmt = stmt.where(PlacementDrive.job_type == filters['job_type'])
+    if 'min_ctc' in filters:
+        stmt = stmt.where(PlacementDrive.ctc_max >= filters['min_ctc'])
+    return stmt.order_by(*DRIVE_SORTS[filters.get('sort', 'deadline')])
+
+
+def _student_applications():
+    return select(Application, PlacementDrive, CompanyProfile).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).join(
+        CompanyProfile, CompanyProfile.id == PlacementDrive.company_id
+    ).where(Application.student_id == SAMPLE_ID)
+
+
+def _drive_applicants():
+    return select(Application, StudentProfile).join(
+        StudentProfile, StudentProfile.id == Application.student_id
+    ).where(Application.drive_id == SAMPLE_ID)
+
+
+def _top_companies():
+    return select(CompanyProfile.company_name, func.count(Application.id)).join(
+        PlacementDrive, PlacementDrive.company_id == CompanyProfile.id
+    ).join(
+        Application, Application.drive_id == PlacementDrive.id
+    ).group_by(CompanyProfile.id).order_by(func.count(Application.id).desc()).limit(5)
+
+
+def _change_feed():
+    from app.changes import get_feed, _after, UPSERT
+    feed = get_feed('applications')
+    return feed.stmt.where(
+        feed.updated_at <= datetime.utcnow(), _after(feed.updated_at, feed.id, UPSERT, (datetime(2000, 1, 1), UPSERT, 0))
+    ).order_by(feed.updated_at, feed.id).limit(1000)
+
+
+def _company_duplicates():
+    from app.duplicates import trigram_postings, trigrams
+    return trigram_postings(trigrams('infosys'))
+
+
+def _admin_students():
+    from app.projections import student_rows_query
+    return student_rows_query()
+
+
+HOT_QUERIES = [
+    HotQuery('login', 'User lookup by email (login)',
+             lambda: select(User).where(User.email == 'student@example.com'), False),
+    HotQuery('open_drives', 'Student drive listing, by deadline', _open_drives, False),
+    HotQuery('open_drives_job_type', 'Student drive listing filtered by job type',
+             lambda: _open_drives(job_type='Full-time'), False),
+    HotQuery('open_drives_package', 'Student drive listing by minimum CTC, highest first',
+             lambda: _open_drives(min_ctc=600000, sort='package_high'), False),
+    HotQuery('student_applications', 'Applications of one student, with drive and company',
+             _student_applications, False),
+    HotQuery('drive_applicants', 'Applicants of one drive (company view)', _drive_applicants, False),
+    HotQuery('company_drives', 'Drives of one company',
+             lambda: select(PlacementDrive).where(PlacementDrive.company_id == SAMPLE_ID), False),
+    HotQuery('dashboard_user_counts', 'Users per role (admin dashboard)',
+             lambda: select(func.count(User.id)).where(User.role == 'student'), False),
+    HotQuery('statistics_status_counts', 'Applications in one status (statistics page)',
+             lambda: select(func.count(Application.id)).where(Application.status == 'selected'), False),
+    HotQuery('statistics_top_companies', 'Top companies by applications (statistics page)',
+             _top_companies, True),
+    HotQuery('admin_students', 'Admin student list', _admin_students, True),
+    HotQuery('applications_change_feed', 'ERP change feed page for applications', _change_feed, False),
+    HotQuery('company_duplicates', 'Trigram postings for a duplicate company check', _company_duplicates, False),
+]
+
+
+# ---- tables ------------------------------------------------------------------
+
+def _index_list(inspector, table):
+    """Indexes of a table including the primary key and unique constraints"""
+    indexes = []
+    pk = inspector.get_pk_constraint(table).get('constrained_columns') or []
+    if pk:
+        indexes.append({'name': 'PRIMARY KEY', 'columns': pk, 'unique': True})
+    for unique in inspector.get_unique_constraints(table):
+        indexes.append({'name': unique['name'] or 'UNIQUE', 'columns': unique['column_names'], 'unique': True})
+    for index in inspector.get_indexes(table):
+        indexes.append({'name': index['name'], 'columns': index['column_names'], 'unique': bool(index['unique'])})
+    return indexes
+
+
+def _sizes(connection):
+    """{table: (table_bytes, index_bytes)} where the dialect can tell, else {}"""
+    dialect = connection.dialect.name
+    try:
+        if dialect == 'sqlite':
+            # dbstat counts pages per b-tree; sqlite_master maps indexes to tables
+            rows = connection.execute(text(
+                'SELECT m.tbl_name, m.type, SUM(s.pgsize) FROM dbstat s '
+                'JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name, m.type'
+            )).all()
+            sizes = {}
+            for table, kind, size in rows:
+                table_bytes, index_bytes = sizes.get(table, (0, 0))
+                if kind == 'index':
+                    index_bytes += size
+                else:
+                    table_bytes += size
+                sizes[table] = (table_bytes, index_bytes)
+            return sizes
+        if dialect == 'postgresql':
+            rows = connection.execute(text(
+                "SELECT relname, pg_table_size(oid), pg_indexes_size(oid) FROM pg_class "
+                "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+            )).all()
+            return {table: (table_bytes, index_bytes) for table, table_bytes, index_bytes in rows}
+        if dialect in ('mysql', 'mariadb'):
+            rows = connection.execute(text(
+                'SELECT table_name, data_length, index_length FROM information_schema.tables '
+                'WHERE table_schema = DATABASE()'
+            )).all()
+            return {table: (table_bytes, index_bytes) for table, table_bytes, index_bytes in rows}
+    except Exception:
+        # e.g. SQLite built without the dbstat virtual table
+        connection.rollback()
+    return {}
+
+
+def table_stats(connection):
+    inspector = inspect(connection)
+    sizes = _sizes(connection)
+    tables = []
+    for name in inspector.get_table_names():
+        rows = connection.execute(text(f'SELECT COUNT(*) FROM {connection.dialect.identifier_preparer.quote(name)}')).scalar()
+        table_bytes, index_bytes = sizes.get(name, (None, None))
+        tables.append({
+            'name': name,
+            'rows': rows,
+            'table_bytes': table_bytes,
+            'index_bytes': index_bytes,
+            'indexes': _index_list(inspector, name),
+        })
+    return tables
+
+
+# ---- query plans -------------------------------------------------------------
+
+def _plan(connection, sql):
+    """(plan lines, scanned tables, temp sort) for one statement"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+        lines = [row[3] for row in rows]
+        scanned = [match.group(1) for match in (re.match(r'SCAN (\w+)(?: AS \w+)?$', line) for line in lines) if match]
+        return lines, scanned, any('USE TEMP B-TREE' in line for line in lines)
+    if dialect == 'postgresql':
+        plan = connection.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, lines, scanned, sort = [(plan[0]['Plan'], 0)], [], [], False
+        while nodes:
+            node, depth = nodes.pop()
+            lines.append('  ' * depth + node['Node Type'] + (f" on {node['Relation Name']}" if 'Relation Name' in node else ''))
+            if node['Node Type'] == 'Seq Scan':
+                scanned.append(node['Relation Name'])
+            sort = sort or node['Node Type'] == 'Sort'
+            nodes.extend((child, depth + 1) for child in reversed(node.get('Plans', [])))
+        return lines, scanned, sort
+    if dialect in ('mysql', 'mariadb'):
+        rows = [dict(row._mapping) for row in connection.execute(text('EXPLAIN ' + sql))]
+        lines = [f"{row['table']}: type={row['type']} key={row['key']} {row.get('Extra') or ''}".strip() for row in rows]
+        scanned = [row['table'] for row in rows if row['type'] == 'ALL']
+        return lines, scanned, any('filesort' in (row.get('Extra') or '') for row in rows)
+    lines = [str(row) for row in connection.execute(text('EXPLAIN ' + sql))]
+    return lines, [], False
+
+
+def _column_uses(stmt):
+    """
+    {table name: {'eq': [...], 'range': [...], 'join': [...]}} column names
+    compared to values (eq, range) or to another table's column (join)
+    """
+    uses = {}
+    for element in visitors.iterate(stmt):
+        if not isinstance(element, BinaryExpression):
+            continue
+        kind = 'eq' if element.operator in EQUALITY_OPS else 'range' if element.operator in RANGE_OPS else None
+        if kind is None:
+            continue
+        sides = [side for side in (element.left, element.right) if isinstance(side, Column)]
+        if len(sides) == 2:
+            kind = 'join'
+        for column in sides:
+            table = getattr(column.table, 'name', None)
+            names = uses.setdefault(table, {'eq': [], 'range': [], 'join': []})[kind]
+            if table is not None and column.name not in names:
+                names.append(column.name)
+    return uses
+
+
+def _suggest(table, uses, indexes):
+    """CREATE INDEX for a scanned table, or None when no index would help"""
+    use = uses.get(table, {'eq': [], 'range': [], 'join': []})
+    # Filters on values first (at most one range column can use the index);
+    # join columns only when the table is not filtered at all
+    columns = use['eq'] + [column for column in use['range'] if column not in use['eq']][:1] or use['join'][:1]
+    if not columns:
+        return None
+    # An index led by the first column already exists: the scan is the join's driving table
+    if any(index['columns'][:1] == columns[:1] for index in indexes):
+        return None
+    return f"CREATE INDEX ix_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+
+
+def explain_hot_queries(connection, tables=None):
+    tables = tables if tables is not None else table_stats(connection)
+    by_name = {table['name']: table for table in tables}
+    results = []
+    for query in HOT_QUERIES:
+        stmt = query.build()
+        sql = str(stmt.compile(connection, compile_kwargs={'literal_binds': True}))
+        lines, scanned, temp_sort = _plan(connection, sql)
+        uses = _column_uses(stmt)
+        suggestions = []
+        for table in scanned:
+            suggestion = _suggest(table, uses, by_name.get(table, {}).get('indexes', []))
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
+        results.append({
+            'name': query.name,
+            'description': query.description,
+            'plan': lines,
+            'full_scans': [{'table': table, 'rows': by_name.get(table, {}).get('rows')} for table in scanned],
+            'temp_sort': temp_sort,
+            'suggestions': suggestions,
+            'expect_scan': query.expect_scan,
+            'flagged': bool(scanned) and not query.expect_scan,
+        })
+    return results
+
+
+def run_diagnostics(engine):
+    """Full report as a plain dict (JSON serializable)"""
+    with engine.connect() as connection:
+        tables = table_stats(connection)
+        queries = explain_hot_queries(connection, tables)
+    return {
+        'database': engine.url.render_as_string(hide_password=True),
+        'dialect': engine.dialect.name,
+        'generated_at': datetime.utcnow().isoformat(),
+        'tables': tables,
+        'queries': queries,
+        'problems': sum(1 for query in queries if query['flagged']),
+    }
@@ -0,0 +1,264 @@
+"""
+Duplicate company detection for Placement Portal
+Names are normalized (case, punctuation, legal suffixes) and split into
+trigrams kept in company_trigrams, so a lookup only reads the postings of
+the name's own trigrams. The whole-table report uses prefix filtering
+"""
+import math
+import re
+from collections import namedtuple, defaultdict, Counter
+from urllib.parse import urlsplit
+
+from flask import current_app
+from sqlalchemy import select, delete, insert, update, func, bindparam
+
+from app import db
+from app.models import User, CompanyProfile, CompanyTrigram
+
+Duplicate = namedtuple('Duplicate', ['company_id', 'user_id', 'company_name', 'is_approved', 'similarity', 'reason'])
+
+LEGAL_SUFFIXES = {
+    'ltd', 'limited', 'pvt', 'private', 'inc', 'incorporated', 'llp', 'llc',
+    'corp', 'corporation', 'co', 'company', 'plc', 'gmbh',
+}
+# Words shared by unrelated companies ('Acme Technologies', 'Zeta Technologies')
+GENERIC_WORDS = {
+    'the', 'and', 'of', 'technologies', 'technology', 'tech', 'solutions', 'services', 'software',
+    'systems', 'consulting', 'consultancy', 'consultants', 'global', 'international', 'india',
+    'group', 'enterprises', 'industries', 'labs',
+}
+# Shared mail providers say nothing about the employer
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'yahoo.co.in', 'outlook.com', 'hotmail.com',
+    'live.com', 'icloud.com', 'rediffmail.com', 'protonmail.com', 'aol.com', 'zoho.com',
+}
+# Keeps t * n from landing a hair above an integer (0.6 * 5 = 3.0000000000000004)
+EPSILON = 1e-9
+
+
+def normalize_name(name):
+    """'Infosys Ltd.', 'INFOSYS Limited' and 'Infosys Technologies' -> 'infosys'"""
+    words = re.findall(r'[a-z0-9]+', (name or '').lower().replace('&', ' and '))
+    kept = [word for word in words if word not in LEGAL_SUFFIXES and word not in GENERIC_WORDS]
+    return ' '.join(kept or words)
+
+
+def normalize_domain(website=None, email=None):
+    """Website host without www., else the domain of a non-webmail email"""
+    if website and website.strip():
+        url = website.strip().lower()
+        try:
+            host = urlsplit(url if '//' in url else '//' + url).hostname or ''
+        except ValueError:
+            host = ''
+        host = host[4:] if host.startswith('www.') else host
+        if host:
+            return host
+    domain = email.rsplit('@', 1)[1].lower() if email and '@' in email else None
+    return domain if domain and domain not in FREE_MAIL_DOMAINS else None
+
+
+def trigrams(name_key):
+    """Distinct trigrams of each word, padded like pg_trgm ('  i', ' in', ..., 'ys ')"""
+    grams = set()
+    for word in (name_key or '').split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """Jaccard similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def index_company(profile):
+    """Refreshes a profile's name key, domain and trigram rows (the caller commits)"""
+    db.session.flush()
+    profile.name_key = normalize_name(profile.company_name)
+    profile.domain = normalize_domain(profile.website, profile.user.email)
+    db.session.execute(delete(CompanyTrigram).where(CompanyTrigram.company_id == profile.id))
+    grams = trigrams(profile.name_key)
+    if grams:
+        db.session.execute(insert(CompanyTrigram), [{'gram': gram, 'company_id': profile.id} for gram in sorted(grams)])
+
+
+def rebuild_company_index(connection):
+    """Recomputes name keys, domains and trigrams of every company; returns the count"""
+    table = CompanyProfile.__table__
+    rows = connection.execute(
+        select(table.c.id, table.c.company_name, table.c.website, User.__table__.c.email)
+        .join(User.__table__, User.__table__.c.id == table.c.user_id)
+    ).all()
+    if not rows:
+        return 0
+    keys = [{
+        'b_id': row.id,
+        'b_name_key': normalize_name(row.company_name),
+        'b_domain': normalize_domain(row.website, row.email),
+    } for row in rows]
+    # updated_at is kept: this is derived data, not an edit
+    connection.execute(update(table).where(table.c.id == bindparam('b_id')).values(
+        name_key=bindparam('b_name_key'), domain=bindparam('b_domain'), updated_at=table.c.updated_at,
+    ), keys)
+    connection.execute(delete(CompanyTrigram.__table__))
+    grams = [{'gram': gram, 'company_id': key['b_id']} for key in keys for gram in sorted(trigrams(key['b_name_key']))]
+    if grams:
+        connection.execute(insert(CompanyTrigram.__table__), grams)
+    return len(rows)
+
+
+def _prefix_length(size, threshold):
+    """
+    Any two sets with Jaccard similarity >= threshold share one of the first
+    size - ceil(threshold * size) + 1 trigrams of either, in any fixed order
+    """
+    return size - math.ceil(threshold * size - EPSILON) + 1
+
+
+def trigram_postings(grams):
+    """SELECT of (gram, company_id, name_key) for companies containing any of grams"""
+    return select(CompanyTrigram.gram, CompanyTrigram.company_id, CompanyProfile.name_key).join(
+        CompanyProfile, CompanyProfile.id == CompanyTrigram.company_id
+    ).where(CompanyTrigram.gram.in_(grams))
+
+
+def find_duplicates(company_ids, threshold=None):
+    """
+    {company_id: [Duplicate, ...]} for the given companies, best match first
+    Only the postings of each name's rarest trigrams (see _prefix_length) are
+    read, so the cost follows those short lists rather than the table size;
+    candidates are then scored exactly. Companies sharing a domain always match
+    """
+    threshold = current_app.config['DUPLICATE_COMPANY_THRESHOLD'] if threshold is None else threshold
+    company_ids = list(company_ids)
+    if not company_ids:
+        return {}
+    mine = db.session.execute(
+        select(CompanyProfile.id, CompanyProfile.name_key, CompanyProfile.domain).where(CompanyProfile.id.in_(company_ids))
+    ).all()
+    grams = {row.id: trigrams(row.name_key) for row in mine}
+    all_grams = set().union(*grams.values())
+    # Posting list lengths, counted on the primary key index
+    frequency = dict(db.session.execute(
+        select(CompanyTrigram.gram, func.count()).where(CompanyTrigram.gram.in_(all_grams)).group_by(CompanyTrigram.gram)
+    ).all()) if all_grams else {}
+    prefixes = {
+        company_id: sorted(names, key=lambda gram: (frequency.get(gram, 0), gram))[:_prefix_length(len(names), threshold)]
+        for company_id, names in grams.items() if names
+    }
+    postings, other_grams = defaultdict(list), {}
+    probe = set().union(*prefixes.values())
+    if probe:
+        for gram, other, name_key in db.session.execute(trigram_postings(probe)):
+            postings[gram].append(other)
+            if other not in other_grams:
+                other_grams[other] = trigrams(name_key)
+
+    scores = defaultdict(dict)
+    for company_id, prefix in prefixes.items():
+        size = len(grams[company_id])
+        for other in {other for gram in prefix for other in postings[gram]} - {company_id}:
+            # Jaccard >= t needs t * |x| <= |y| <= |x| / t
+            if not threshold * size - EPSILON <= len(other_grams[other]) <= size / threshold + EPSILON:
+                continue
+            score = similarity(grams[company_id], other_grams[other])
+            if score >= threshold - EPSILON:
+                scores[company_id][other] = score
+    same_domain = defaultdict(set)
+    domains = {row.id: row.domain for row in mine if row.domain}
+    if domains:
+        for other, domain in db.session.execute(
+            select(CompanyProfile.id, CompanyProfile.domain).where(CompanyProfile.domain.in_(set(domains.values())))
+        ):
+            for company_id, own in domains.items():
+                if own == domain and other != company_id:
+                    same_domain[company_id].add(other)
+                    scores[company_id].setdefault(other, None)
+    if not scores:
+        return {}
+
+    involved = {other for matches in scores.values() for other in matches}
+    info = {row.id: row for row in db.session.execute(
+        select(CompanyProfile.id, CompanyProfile.user_id, CompanyProfile.company_name, CompanyProfile.name_key,
+               User.is_approved)
+        .join(User, User.id == CompanyProfile.user_id).where(CompanyProfile.id.in_(involved))
+    )}
+    found = {}
+    for company_id, matches in scores.items():
+        duplicates = []
+        for other, score in matches.items():
+            row = info[other]
+            why = (['name'] if score is not None else []) + (['domain'] if other in same_domain[company_id] else [])
+            if score is None:
+                score = similarity(grams.get(company_id), trigrams(row.name_key))
+            duplicates.append(Duplicate(other, row.user_id, row.company_name, row.is_approved,
+                                        round(score, 2), ' and '.join(why)))
+        found[company_id] = sorted(duplicates, key=lambda d: (-d.similarity, d.company_id))
+    return found
+
+
+def dedup_report(threshold=None):
+    """
+    Likely duplicate pairs over the whole company table, most similar first
+    All-pairs similarity join with prefix filtering: names are visited from
+    fewest trigrams up and each is only compared with earlier names sharing
+    one of its rarest trigrams and of a compatible size, which finds every
+    pair at or above the threshold without comparing all pairs.
+    Pairs sharing a domain are included whatever their name similarity.
+    Returns [(similarity, reason, (id, name, domain), (id, name, domain)), ...]
+    """
+    threshold = current_app.config['DUPLICATE_COMPANY_THRESHOLD'] if threshold is None else threshold
+    rows = {row.id: row for row in db.session.execute(
+        select(CompanyProfile.id, CompanyProfile.company_name, CompanyProfile.name_key, CompanyProfile.domain)
+    )}
+    grams = {company_id: trigrams(row.name_key if row.name_key is not None else normalize_name(row.company_name))
+             for company_id, row in rows.items()}
+    frequency = Counter(gram for names in grams.values() for gram in names)
+
+    pairs = {}
+    # A visited name only needs to be found through the shorter prefix for
+    # overlap 2t / (1 + t) of its size, since names visited later are no smaller
+    index_threshold = 2 * threshold / (1 + threshold)
+    index = defaultdict(list)
+    for company_id in sorted(grams, key=lambda company_id: (len(grams[company_id]), company_id)):
+        names = grams[company_id]
+        if not names:
+            continue
+        ordered = sorted(names, key=lambda gram: (frequency[gram], gram))
+        size = len(ordered)
+        candidates = {
+            other for gram in ordered[:_prefix_length(size, threshold)] for other in index[gram]
+            # Jaccard >= t needs the smaller set to hold at least t of the larger
+            if len(grams[other]) >= threshold * size - EPSILON
+        }
+        for other in candidates:
+            score = similarity(names, grams[other])
+            if score >= threshold - EPSILON:
+                pairs[min(company_id, other), max(company_id, other)] = [score, 'name']
+        for gram in ordered[:_prefix_length(size, index_threshold)]:
+            index[gram].append(company_id)
+    by_domain = defaultdict(list)
+    for company_id, row in rows.items():
+        if row.domain:
+            by_domain[row.domain].append(company_id)
+    for members in by_domain.values():
+        members.sort()
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                if (first, second) in pairs:
+                    pairs[first, second][1] = 'name and domain'
+                else:
+                    pairs[first, second] = [similarity(grams[first], grams[second]), 'domain']
+
+    def describe(company_id):
+        row = rows[company_id]
+        return company_id, row.company_name, row.domain
+
+    return sorted(
+        ((round(score, 2), reason, describe(first), describe(second)) for (first, second), (score, reason) in pairs.items()),
+        key=lambda pair: (-pair[0], pair[2][0], pair[3][0]),
+    )
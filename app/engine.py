@@ -0,0 +1,260 @@
+"""
+Database engine configuration for Placement Portal
+Builds engine options from the app config, applies SQLite PRAGMAs on connect
+and keeps pool / lock contention counters for the metrics endpoint
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+
+# Process-wide counters, read through engine_stats()
+_stats_lock = threading.Lock()
+_stats = {
+    'checkouts': 0,
+    'checkout_wait_total_ms': 0.0,
+    'checkout_wait_max_ms': 0.0,
+    'connections_opened': 0,
+    'lock_errors': 0,
+    'lock_retries': 0,
+    'reads_routed': 0,
+}
+
+# Key under app.extensions holding the read-only engine (if configured)
+READ_ENGINE_KEY = 'placement_read_engine'
+
+
+def _record(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long each checkout waits for a connection
+    Waiting here means the pool is too small for the current load
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited_ms = (time.perf_counter() - start) * 1000
+            with _stats_lock:
+                _stats['checkouts'] += 1
+                _stats['checkout_wait_total_ms'] += waited_ms
+                if waited_ms > _stats['checkout_wait_max_ms']:
+                    _stats['checkout_wait_max_ms'] = waited_ms
+
+
+def engine_options(config, uri=None):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS for the given database URI
+    File-based SQLite and server databases get a timed, sized pool;
+    in-memory SQLite keeps the driver default (single shared connection)
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    if url.get_backend_name() == 'sqlite':
+        if not url.database or url.database == ':memory:':
+            return options
+        options.setdefault('poolclass', TimedQueuePool)
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        return options
+
+    options.setdefault('poolclass', TimedQueuePool)
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', True)
+    return options
+
+
+def install_engine_events(engine, config, pragmas=None):
+    """
+    Registers connect-time PRAGMAs (SQLite only) and error counters on an engine
+    Safe to call once per engine created by the app
+    """
+    if pragmas is None:
+        pragmas = config.get('SQLITE_PRAGMAS') or {}
+    sqlite = engine.dialect.name == 'sqlite'
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        _record('connections_opened')
+        if not sqlite or not pragmas:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'handle_error')
+    def on_error(context):
+        if is_lock_error(context.original_exception):
+            _record('lock_errors')
+
+
+def is_lock_error(exc):
+    """True when the database refused the statement because of a held lock"""
+    message = str(getattr(exc, 'orig', exc)).lower()
+    return 'database is locked' in message or 'deadlock' in message or 'lock timeout' in message
+
+
+def retry_on_lock(f):
+    """
+    Decorator that re-runs a write view when the database reports a lock conflict
+    The session is rolled back between attempts with a short exponential backoff
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app import db
+        retries = current_app.config['DB_LOCK_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return f(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == retries or not is_lock_error(e):
+                    raise
+                db.session.rollback()
+                _record('lock_retries')
+                time.sleep(0.05 * (2 ** attempt))
+    return decorated_function
+
+
+def engine_stats(engine=None):
+    """
+    Snapshot of the engine counters, plus live pool state when an engine is given
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    checkouts = stats['checkouts']
+    stats['checkout_wait_avg_ms'] = round(stats['checkout_wait_total_ms'] / checkouts, 3) if checkouts else 0.0
+    stats['checkout_wait_total_ms'] = round(stats['checkout_wait_total_ms'], 3)
+    stats['checkout_wait_max_ms'] = round(stats['checkout_wait_max_ms'], 3)
+    if engine is not None:
+        pool = engine.pool
+        stats['pool'] = {
+            'class': type(pool).__name__,
+            'status': pool.status(),
+        }
+        if isinstance(pool, QueuePool):
+            stats['pool'].update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            })
+    return stats
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads from views marked @read_only to the read engine
+    Flushes and anything outside such a view always use the primary engine.
+    With tenants configured, both are the current tenant's (app/tenants.py)
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None or not has_app_context():
+            return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        from app.tenants import TENANT_ENGINES_KEY, TENANT_READ_ENGINES_KEY
+        tenant = g.get('tenant')
+        reading = not self._flushing and has_request_context() and g.get('read_only')
+        if reading:
+            if tenant is None:
+                engine = current_app.extensions.get(READ_ENGINE_KEY)
+            else:
+                engine = current_app.extensions[TENANT_READ_ENGINES_KEY].get(tenant)
+            if engine is not None:
+                _record('reads_routed')
+                return engine
+        if tenant is not None:
+            return current_app.extensions[TENANT_ENGINES_KEY][tenant]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_write(db_session, flush_context):
+    # Remember that this request wrote, so the user's next reads hit the primary
+    if has_request_context():
+        g.db_wrote = True
+
+
+def _read_engine_uri(replica_uri, primary_url):
+    """
+    Replica URI if one is configured, otherwise a read-only view of the SQLite file
+    """
+    if replica_uri:
+        return replica_uri
+    url = primary_url
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        return f'sqlite:///file:{url.database}?mode=ro&uri=true'
+    return None
+
+
+def create_read_engine(config, primary_url, replica_uri):
+    """
+    Engine for routed reads of one primary database, or None if it has none
+    """
+    uri = _read_engine_uri(replica_uri, primary_url)
+    if uri is None:
+        return None
+    engine = create_engine(uri, **engine_options(config, uri))
+    pragmas = dict(config.get('SQLITE_PRAGMAS') or {})
+    # journal_mode is a write; the primary already switched the file to WAL
+    pragmas.pop('journal_mode', None)
+    if engine.dialect.name == 'sqlite':
+        pragmas['query_only'] = 'ON'
+    install_engine_events(engine, config, pragmas)
+    return engine
+
+
+def init_read_routing(app, primary_engine):
+    """
+    Creates the read engine and the read-after-write bookkeeping for an app
+    Does nothing unless READ_ROUTING_ENABLED is set
+    """
+    if not app.config.get('READ_ROUTING_ENABLED'):
+        return
+
+    @app.after_request
+    def remember_write(response):
+        if g.get('db_wrote'):
+            session['_last_write_at'] = time.time()
+        return response
+
+    engine = create_read_engine(app.config, primary_engine.url, app.config.get('SQLALCHEMY_READ_DATABASE_URI'))
+    if engine is not None:
+        app.extensions[READ_ENGINE_KEY] = engine
+
+
+def read_only(f):
+    """
+    Decorator for GET views that only read: their queries go to the read engine
+    Skipped for a short window after the same user wrote, so they see their own change
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app.tenants import TENANT_READ_ENGINES_KEY
+        has_read_engine = (READ_ENGINE_KEY in current_app.extensions
+                           or current_app.extensions.get(TENANT_READ_ENGINES_KEY))
+        if request.method == 'GET' and has_read_engine:
+            last_write = session.get('_last_write_at', 0)
+            if time.time() - last_write >= current_app.config['READ_AFTER_WRITE_SECONDS']:
+                g.read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
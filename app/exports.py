@@ -0,0 +1,74 @@
+"""
+CSV export definitions for Placement Portal
+Shared by the streaming download views and the background export jobs,
+which write the same file page by page (see app/jobs.py)
+"""
+from collections import namedtuple
+
+from app import db
+from app.models import User, CompanyProfile, StudentProfile, Application
+from app.projections import (CompanyRow, StudentRow, ApplicationRow, company_rows_query,
+                             student_rows_query, application_rows_query, iter_rows)
+
+# query: SELECT ordered by key; format: row -> list of CSV values
+Export = namedtuple('Export', ['filename', 'header', 'row_type', 'query', 'key', 'format'])
+
+
+def _company_status(c):
+    if c.is_blacklisted:
+        return 'Blacklisted'
+    return 'Approved' if c.is_approved else 'Pending'
+
+
+EXPORTS = {
+    'students': Export(
+        'students.csv', ['ID', 'Full Name', 'Roll Number', 'Department', 'CGPA', 'Email', 'Phone'], StudentRow,
+        lambda: student_rows_query().where(StudentProfile.id.is_not(None)), User.id,
+        lambda s: [s.student_id, s.full_name, s.roll_number, s.department, s.cgpa, s.email, s.phone or ''],
+    ),
+    'applications': Export(
+        'applications.csv', ['ID', 'Student Name', 'Roll Number', 'Drive Title', 'Company', 'Status', 'Applied At'],
+        ApplicationRow, application_rows_query, Application.id,
+        lambda app: [app.id, app.student_name, app.roll_number, app.drive_title, app.company_name, app.status,
+                     app.applied_at.strftime('%Y-%m-%d %H:%M') if app.applied_at else ''],
+    ),
+    'companies': Export(
+        'companies.csv', ['ID', 'Company Name', 'Industry', 'Location', 'Email', 'Contact Person', 'Status'], CompanyRow,
+        lambda: company_rows_query().where(CompanyProfile.id.is_not(None)), User.id,
+        lambda c: [c.company_id, c.company_name, c.industry or '', c.location or '', c.email,
+                   c.contact_person or '', _company_status(c)],
+    ),
+}
+
+
+def export_rows(name):
+    """CSV rows of an export from one streaming query (for download views)"""
+    export = EXPORTS[name]
+    return (export.format(row) for row in iter_rows(export.row_type, export.query()))
+
+
+def export_pages(name, page_size):
+    """
+    CSV rows of an export as lists of up to page_size, one short query each
+    Paging on the key leaves no read transaction open between pages
+    """
+    export = EXPORTS[name]
+    stmt = export.query().limit(page_size)
+    last = None
+    while True:
+        page = stmt if last is None else stmt.where(export.key > last)
+        rows = [export.row_type._make(row) for row in db.session.execute(page)]
+        db.session.commit()
+        if not rows:
+            return
+        yield [export.format(row) for row in rows]
+        # Every export query is ordered by its key, which is the row's first column
+        last = rows[-1][0]
+        if len(rows) < page_size:
+            return
+
+
+def export_count(name):
+    """Rows an export will write (for progress reporting)"""
+    export = EXPORTS[name]
+    return db.session.execute(db.select(db.func.count()).select_from(export.query().order_by(None).subquery())).scalar()
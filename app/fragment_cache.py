@@ -0,0 +1,111 @@
+"""
+Template fragment caching for Placement Portal
+Provides a {% cache %} Jinja tag keyed on model ids and updated_at stamps,
+stored in the 'fragments' namespace of the app cache (app/cache.py)
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from werkzeug.utils import import_string
+
+from flask import current_app, has_app_context
+
+
+def _key_part(value):
+    """
+    Models contribute (table, id, updated_at); rows can list the entities they
+    render through fragment_entities(); anything else is used as-is.
+    Returns the key fragment and the eviction groups
+    """
+    if hasattr(value, 'fragment_entities'):
+        entities = value.fragment_entities()
+    elif hasattr(value, '__tablename__'):
+        entities = [(value.__tablename__, value.id, getattr(value, 'updated_at', ''))]
+    else:
+        return str(value), []
+    groups = [f'{table}:{entity_id}' for table, entity_id, _ in entities]
+    key = '|'.join(f'{group}@{updated_at}' for group, (_, _, updated_at) in zip(groups, entities))
+    return key, groups
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache drive, drive.company %} ... {% endcache %}
+    Projection rows pass themselves: {% cache drive %}
+    The template name is part of the key, so each template caches its own markup
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name)]
+        parts.append(parser.parse_expression())
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cache_support', [nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache_support(self, parts, caller):
+        backend = self.environment.fragment_cache
+        if backend is None:
+            return caller()
+        key_parts, groups = [], []
+        for part in parts:
+            key_part, part_groups = _key_part(part)
+            key_parts.append(key_part)
+            groups.extend(part_groups)
+        # The namespace adds the tenant: ids and timestamps repeat across tenant databases
+        from app.cache import CacheNamespace
+        cache = CacheNamespace(backend, 'fragments')
+        key = '|'.join(key_parts)
+        cached = cache.get(key)
+        if cached is not None:
+            return Markup(cached)
+        rendered = caller()
+        cache.set(key, str(rendered), groups)
+        return rendered
+
+
+def init_fragment_cache(app):
+    """
+    Registers the {% cache %} tag on the app cache (call after init_cache)
+    FRAGMENT_CACHE_BACKEND may name a separate backend class ('package.module:Class')
+    taking the app, with the same interface as the app cache backends
+    """
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if not app.config.get('FRAGMENT_CACHE_ENABLED'):
+        return
+    backend_path = app.config.get('FRAGMENT_CACHE_BACKEND')
+    app.jinja_env.fragment_cache = import_string(backend_path)(app) if backend_path else app.extensions['cache']
+
+    # Evict as soon as an entity is edited; with a shared backend this reaches
+    # every process, and updated_at in the key covers any entry stored meanwhile
+    from app.models import PlacementDrive, CompanyProfile
+    for model in (PlacementDrive, CompanyProfile):
+        for identifier in ('after_update', 'after_delete'):
+            if not event.contains(model, identifier, _evict_entity):
+                event.listen(model, identifier, _evict_entity)
+
+
+def _evict_entity(mapper, connection, target):
+    if not has_app_context():
+        return
+    backend = current_app.jinja_env.fragment_cache
+    if backend is not None:
+        from app.cache import CacheNamespace
+        CacheNamespace(backend, 'fragments').evict(f'{target.__tablename__}:{target.id}')
+
+
+def invalidate_fragments():
+    """Drops every cached fragment of the current tenant, in every process (e.g. after a deploy)"""
+    backend = current_app.jinja_env.fragment_cache
+    if backend is not None:
+        from app.cache import CacheNamespace
+        CacheNamespace(backend, 'fragments').invalidate()
@@ -0,0 +1,61 @@
+"""
+HTTP conditional caching helpers for Placement Portal
+ETag / Last-Modified validators let unchanged pages answer 304
+before any listing query runs or any template is rendered
+"""
+import hashlib
+from datetime import timezone
+
+from flask import request, session, make_response
+
+
+def make_etag(*parts):
+    """Builds a strong ETag from the values the page depends on"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _as_utc(value):
+    # Timestamps are stored as naive UTC
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # Only the logged-in user's browser may keep it, and must revalidate each time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Returns a 304 response if the client's cached copy is still valid, else None
+    Pass last_modified only when it changes whenever the ETag does: a client
+    sending just If-Modified-Since is answered from it alone
+    Pages with pending flash messages are always rendered so the message is shown
+    """
+    if session.get('_flashes'):
+        return None
+    if request.if_none_match:
+        # Weak comparison: compression turns the ETag weak (app/compression.py)
+        matched = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = _as_utc(last_modified) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = make_response('', 304)
+    _set_validators(response, etag, last_modified)
+    return response
+
+
+def cacheable(body, etag, last_modified=None):
+    """Wraps a rendered page in a response carrying its validators"""
+    response = make_response(body)
+    _set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,265 @@
+"""
+Interview scheduling for Placement Portal
+Places shortlisted applications into company-declared slots so that no
+student has overlapping interviews and no slot exceeds its capacity.
+Drives are served in order of application deadline; within a drive a
+maximum matching (augmenting paths) places as many candidates as possible
+"""
+import time
+from collections import deque, defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, delete, func, or_
+
+from app import db
+from app.models import PlacementDrive, Application, InterviewSlot, InterviewAssignment
+
+
+class SlotConflict(ValueError):
+    """A new slot is invalid or double-books its room"""
+
+
+def add_slot(drive_id, starts_at, ends_at, room, capacity):
+    """Validates and adds a slot (the caller commits)"""
+    room = (room or '').strip()
+    if not room:
+        raise SlotConflict('Room is required.')
+    if ends_at <= starts_at:
+        raise SlotConflict('The slot must end after it starts.')
+    if starts_at <= datetime.utcnow():
+        raise SlotConflict('Slots must be in the future.')
+    if capacity < 1:
+        raise SlotConflict('Capacity must be at least 1.')
+    # A room holds one slot at a time, whichever company booked it
+    clash = db.session.query(InterviewSlot.id).filter(
+        InterviewSlot.room == room, InterviewSlot.starts_at < ends_at, InterviewSlot.ends_at > starts_at,
+    ).first()
+    if clash is not None:
+        raise SlotConflict(f'{room} is already booked at that time.')
+    slot = InterviewSlot(drive_id=drive_id, starts_at=starts_at, ends_at=ends_at, room=room, capacity=capacity)
+    db.session.add(slot)
+    db.session.flush()
+    return slot
+
+
+def _overlaps(start, end, busy, gap):
+    return any(start < other_end + gap and other_start < end + gap for other_start, other_end in busy)
+
+
+def _match(applications, feasible, free):
+    """
+    Maximum matching of applications to slot seats for one drive
+    applications: ids in priority order; feasible: {application: [slot ids,
+    earliest first]}; free: {slot: seats left}. Each unplaced application
+    searches breadth-first for a free seat, moving candidates placed earlier
+    in this run to other feasible slots when that opens one up.
+    Returns {application: slot}
+    """
+    placed = {}
+    occupants = defaultdict(dict)  # slot -> {application: None}, insertion ordered
+    for application in applications:
+        # Most candidates fit without moving anyone; only search when they do not
+        direct = next((slot for slot in feasible[application] if len(occupants[slot]) < free[slot]), None)
+        if direct is not None:
+            placed[application] = direct
+            occupants[direct][application] = None
+            continue
+        reached = {}  # slot -> application that would move into it
+        queue = deque()
+        for slot in feasible[application]:
+            if slot not in reached:
+                reached[slot] = application
+                queue.append(slot)
+        found = None
+        while queue:
+            slot = queue.popleft()
+            if len(occupants[slot]) < free[slot]:
+                found = slot
+                break
+            for other in occupants[slot]:
+                for target in feasible[other]:
+                    if target not in reached:
+                        reached[target] = other
+                        queue.append(target)
+        if found is None:
+            continue
+        # Walk the augmenting path back, shifting each candidate one slot along
+        slot = found
+        while True:
+            mover = reached[slot]
+            previous = placed.get(mover)
+            if previous is not None:
+                del occupants[previous][mover]
+            placed[mover] = slot
+            occupants[slot][mover] = None
+            if mover == application:
+                break
+            slot = previous
+    return placed
+
+
+def schedule_interviews(drive_ids=None, student_ids=None, full=False):
+    """
+    Assigns unscheduled shortlisted applications to future slots
+    Incremental by default: existing assignments stay where they are and only
+    the given drives (plus drives where the given students still wait) are
+    considered; with neither, every drive with a waiting candidate is.
+    full=True drops all future assignments and schedules from scratch.
+    Adds rows to the session; the caller commits.
+    Returns {'assigned', 'unassigned', 'drives', 'assignment_ids', 'elapsed_ms'}
+    """
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    gap = timedelta(minutes=current_app.config['INTERVIEW_GAP_MINUTES'])
+    future_slots = select(InterviewSlot.id).where(InterviewSlot.starts_at > now)
+    if full:
+        db.session.execute(delete(InterviewAssignment).where(
+            InterviewAssignment.status == 'scheduled', InterviewAssignment.slot_id.in_(future_slots)
+        ).execution_options(synchronize_session=False))
+
+    scheduled = select(InterviewAssignment.application_id).where(InterviewAssignment.status == 'scheduled')
+    waiting = select(Application.id, Application.student_id, Application.drive_id).where(
+        Application.status == 'shortlisted', Application.id.not_in(scheduled),
+        Application.drive_id.in_(select(InterviewSlot.drive_id).where(InterviewSlot.starts_at > now)),
+    )
+    if drive_ids is not None or student_ids is not None:
+        scope = []
+        if drive_ids:
+            scope.append(Application.drive_id.in_(drive_ids))
+        if student_ids:
+            # Freed time only helps the student's own waiting applications
+            scope.append(Application.student_id.in_(student_ids))
+        if not scope:
+            return {'assigned': 0, 'unassigned': 0, 'drives': 0, 'assignment_ids': [], 'elapsed_ms': 0.0}
+        waiting = waiting.where(or_(*scope))
+    # The later lookups filter on this as a subquery rather than long IN lists
+    waiting_sq = waiting.subquery()
+    waiting = db.session.execute(waiting).all()
+    if not waiting:
+        return {'assigned': 0, 'unassigned': 0, 'drives': 0, 'assignment_ids': [],
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)}
+
+    drive_set = select(waiting_sq.c.drive_id)
+    # Drives by deadline: earlier deadlines get first pick of each student's time
+    drive_order = [row[0] for row in db.session.execute(
+        select(PlacementDrive.id).where(PlacementDrive.id.in_(drive_set))
+        .order_by(PlacementDrive.application_deadline, PlacementDrive.id))]
+
+    slots = {}
+    slots_by_drive = defaultdict(list)
+    open_slots = select(InterviewSlot.id).where(InterviewSlot.drive_id.in_(drive_set), InterviewSlot.starts_at > now)
+    for row in db.session.execute(
+        select(InterviewSlot.id, InterviewSlot.drive_id, InterviewSlot.starts_at, InterviewSlot.ends_at,
+               InterviewSlot.capacity)
+        .where(InterviewSlot.id.in_(open_slots))
+        .order_by(InterviewSlot.starts_at, InterviewSlot.id)
+    ):
+        slots[row.id] = row
+        slots_by_drive[row.drive_id].append(row.id)
+    taken = dict(db.session.execute(
+        select(InterviewAssignment.slot_id, func.count(InterviewAssignment.id))
+        .where(InterviewAssignment.status == 'scheduled', InterviewAssignment.slot_id.in_(open_slots))
+        .group_by(InterviewAssignment.slot_id)
+    ).all())
+
+    # Time each student is already committed to, across every company
+    busy = defaultdict(list)
+    for student_id, starts_at, ends_at in db.session.execute(
+        select(InterviewAssignment.student_id, InterviewSlot.starts_at, InterviewSlot.ends_at)
+        .join(InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id)
+        .where(InterviewAssignment.status == 'scheduled', InterviewSlot.ends_at > now - gap,
+               InterviewAssignment.student_id.in_(select(waiting_sq.c.student_id)))
+    ):
+        busy[student_id].append((starts_at, ends_at))
+    declined = set(db.session.execute(
+        select(InterviewAssignment.application_id, InterviewAssignment.slot_id)
+        .where(InterviewAssignment.status == 'cancelled', InterviewAssignment.application_id.in_(select(waiting_sq.c.id)))
+    ).all())
+
+    by_drive = defaultdict(list)
+    for row in waiting:
+        by_drive[row.drive_id].append(row)
+    rows = []
+    for drive_id in drive_order:
+        applications = sorted(by_drive[drive_id], key=lambda row: row.id)
+        student_of = {row.id: row.student_id for row in applications}
+        free = {slot: slots[slot].capacity - taken.get(slot, 0) for slot in slots_by_drive[drive_id]}
+        open_here = [(slot, slots[slot].starts_at, slots[slot].ends_at) for slot in slots_by_drive[drive_id] if free[slot] > 0]
+        feasible = {
+            row.id: [
+                slot for slot, starts_at, ends_at in open_here
+                if (row.id, slot) not in declined and not _overlaps(starts_at, ends_at, busy[row.student_id], gap)
+            ]
+            for row in applications
+        }
+        for application, slot in _match([row.id for row in applications], feasible, free).items():
+            student_id = student_of[application]
+            busy[student_id].append((slots[slot].starts_at, slots[slot].ends_at))
+            rows.append({'slot_id': slot, 'application_id': application, 'student_id': student_id,
+                         'status': 'scheduled', 'created_at': now})
+
+    assignment_ids = []
+    if rows:
+        stmt = db.insert(InterviewAssignment)
+        if db.engine.dialect.insert_executemany_returning:
+            assignment_ids = list(db.session.scalars(stmt.returning(InterviewAssignment.id), rows))
+        else:
+            db.session.execute(stmt, rows)
+            assignment_ids = list(db.session.scalars(select(InterviewAssignment.id).where(
+                InterviewAssignment.status == 'scheduled', InterviewAssignment.created_at == now)))
+        from app.notifications import enqueue_event
+        enqueue_event('interviews_scheduled', {'assignment_ids': assignment_ids})
+    return {
+        'assigned': len(rows),
+        'unassigned': len(waiting) - len(rows),
+        'drives': len(drive_order),
+        'assignment_ids': assignment_ids,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def cancel_assignment(assignment_id):
+    """
+    Cancels one interview and reschedules around it: the candidate moves to
+    another slot of the drive if one fits and the freed seat goes to whoever
+    is still waiting. The caller commits. Returns the schedule result
+    """
+    assignment = db.session.get(InterviewAssignment, assignment_id)
+    if assignment is None or assignment.status != 'scheduled':
+        return None
+    assignment.status = 'cancelled'
+    db.session.flush()
+    return schedule_interviews(drive_ids=[assignment.slot.drive_id], student_ids=[assignment.student_id])
+
+
+def cancel_slot(slot_id):
+    """Deletes a slot and reschedules the candidates it held (the caller commits)"""
+    slot = db.session.get(InterviewSlot, slot_id)
+    if slot is None:
+        return None
+    student_ids = list(db.session.scalars(select(InterviewAssignment.student_id).where(
+        InterviewAssignment.slot_id == slot_id, InterviewAssignment.status == 'scheduled')))
+    drive_id = slot.drive_id
+    db.session.execute(delete(InterviewAssignment).where(InterviewAssignment.slot_id == slot_id))
+    db.session.delete(slot)
+    db.session.flush()
+    return schedule_interviews(drive_ids=[drive_id], student_ids=student_ids)
+
+
+def release_interviews(application_ids):
+    """
+    Drops upcoming interviews of applications that left 'shortlisted'
+    Returns the drives that gained free seats
+    """
+    # Filtering the joined slot (not slot_id IN future slots) lets the lookup
+    # start from the application_id index however many ids are passed
+    upcoming = db.session.execute(
+        select(InterviewAssignment.id, InterviewSlot.drive_id)
+        .join(InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id)
+        .where(InterviewAssignment.application_id.in_(application_ids),
+               InterviewAssignment.status == 'scheduled', InterviewSlot.starts_at > datetime.utcnow())
+    ).all()
+    if upcoming:
+        db.session.execute(delete(InterviewAssignment).where(InterviewAssignment.id.in_([row.id for row in upcoming])))
+    return sorted({row.drive_id for row in upcoming})
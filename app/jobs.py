@@ -0,0 +1,324 @@
+"""
+Background jobs for Placement Portal
+Admin views enqueue heavy work (exports, cube refresh, archival, duplicate
+report) as rows in the jobs table; `flask job-worker` processes claim them
+under a lease, report progress and leave a downloadable result behind
+"""
+import csv
+import json
+import os
+import socket
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update, delete, func, or_, and_
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Job
+
+# params: {name: type} accepted from the admin form (bool, int or float)
+JobType = namedtuple('JobType', ['label', 'handler', 'params'])
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobInterrupted(Exception):
+    """The job was cancelled, or claimed by another worker after its lease expired"""
+
+
+class JobContext:
+    """What a handler gets: its parameters, progress reporting and a result file"""
+
+    def __init__(self, job, token):
+        self.job_id = job.id
+        self.params = json.loads(job.params or '{}')
+        self.token = token
+        self.result = None  # (stored file, download name, mimetype)
+        self.done = 0
+        self._last_write = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        """
+        Records progress and renews the lease, at most every JOB_PROGRESS_INTERVAL
+        seconds unless force=True. Commits the session, so call it between units
+        of work. Raises JobInterrupted once the job is no longer this worker's
+        """
+        self.done = done
+        now = time.monotonic()
+        if not force and now - self._last_write < current_app.config['JOB_PROGRESS_INTERVAL']:
+            return
+        self._last_write = now
+        values = {'progress': done, 'lease_expires_at': _lease_end()}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message[:255]
+        updated = db.session.execute(update(Job).where(
+            Job.id == self.job_id, Job.lease_token == self.token, Job.status == 'running'
+        ).values(**values)).rowcount
+        db.session.commit()
+        if not updated:
+            raise JobInterrupted(f'Job {self.job_id} was cancelled or taken over')
+
+    def open_result(self, filename, mimetype='text/csv'):
+        """Opens the result file (text, UTF-8) offered as filename when the job is done"""
+        folder = current_app.config['JOB_RESULTS_FOLDER']
+        os.makedirs(folder, exist_ok=True)
+        stored = uuid.uuid4().hex + os.path.splitext(filename)[1]
+        self.result = (stored, filename, mimetype)
+        return open(os.path.join(folder, stored), 'w', newline='', encoding='utf-8')
+
+
+# ---- handlers -------------------------------------------------------------------
+
+def _export(name):
+    def run(ctx):
+        from app.exports import EXPORTS, export_pages, export_count
+        export = EXPORTS[name]
+        total = export_count(name)
+        ctx.progress(0, total, force=True)
+        written = 0
+        with ctx.open_result(export.filename) as out:
+            writer = csv.writer(out)
+            writer.writerow(export.header)
+            for page in export_pages(name, current_app.config['JOB_PAGE_SIZE']):
+                writer.writerows(page)
+                written += len(page)
+                ctx.progress(written, total)
+        return f'{written} rows exported'
+    return run
+
+
+def _cube_refresh(ctx):
+    from app.cube import refresh_cube
+    ctx.progress(0, message='Refreshing cube cells', force=True)
+    # Progress after every batch keeps the lease, so no second worker starts a refresh
+    drives = refresh_cube(full=ctx.params.get('full', False),
+                          batch_size=current_app.config['CUBE_REFRESH_BATCH_SIZE'],
+                          progress=lambda done, total: ctx.progress(done, total))
+    return f'Refreshed cube cells for {drives} drives'
+
+
+def _archive_cohorts(ctx):
+    from app.archive import archive_graduated_students, archive_admin_actions
+    config = current_app.config
+    years = ctx.params.get('years', config['ARCHIVE_AFTER_GRADUATION_YEARS'])
+    days = ctx.params.get('admin_actions_days', config['ARCHIVE_ADMIN_ACTIONS_DAYS'])
+    batch_size = config['ARCHIVE_BATCH_SIZE']
+    students = archive_graduated_students(years, batch_size, dry_run=True)
+    actions = archive_admin_actions(days, batch_size, dry_run=True)
+    if ctx.params.get('dry_run'):
+        return f'Would archive {students} students and {actions} admin actions'
+    total = students + actions
+    ctx.progress(0, total, 'Archiving students', force=True)
+    students = archive_graduated_students(years, batch_size, progress=lambda moved: ctx.progress(moved, total))
+    ctx.progress(students, total, 'Archiving admin actions', force=True)
+    actions = archive_admin_actions(days, batch_size, progress=lambda moved: ctx.progress(students + moved, total))
+    return f'Archived {students} students (graduated more than {years} years ago) and {actions} admin actions'
+
+
+def _dedup_companies(ctx):
+    from app.duplicates import dedup_report
+    pairs = dedup_report(ctx.params.get('threshold'))
+    with ctx.open_result('duplicate_companies.csv') as out:
+        writer = csv.writer(out)
+        writer.writerow(['Similarity', 'Reason', 'Company ID', 'Company', 'Domain',
+                         'Other ID', 'Other Company', 'Other Domain'])
+        for score, reason, first, second in pairs:
+            writer.writerow([score, reason, *first, *second])
+    return f'{len(pairs)} likely duplicate pairs'
+
+
+JOB_TYPES = {
+    'export_students': JobType('Export students CSV', _export('students'), {}),
+    'export_applications': JobType('Export applications CSV', _export('applications'), {}),
+    'export_companies': JobType('Export companies CSV', _export('companies'), {}),
+    'cube_refresh': JobType('Refresh placement statistics', _cube_refresh, {'full': bool}),
+    'archive_cohorts': JobType('Archive graduated cohorts', _archive_cohorts,
+                               {'years': int, 'admin_actions_days': int, 'dry_run': bool}),
+    'dedup_companies': JobType('Duplicate companies report', _dedup_companies, {'threshold': float}),
+}
+
+
+# ---- queue ------------------------------------------------------------------------
+
+def _lease_end():
+    return datetime.utcnow() + timedelta(seconds=current_app.config['JOB_LEASE_SECONDS'])
+
+
+def parse_params(job_type, form):
+    """Typed parameters of a job type from a submitted form (unknown names are ignored)"""
+    params = {}
+    for name, kind in JOB_TYPES[job_type].params.items():
+        value = form.get(name, '').strip()
+        if kind is bool:
+            params[name] = value.lower() in ('1', 'true', 'on', 'yes')
+        elif value:
+            params[name] = kind(value)
+    return params
+
+
+def enqueue_job(job_type, params=None, created_by=None):
+    """Adds a queued job to the session (the caller commits); KeyError for unknown types"""
+    if job_type not in JOB_TYPES:
+        raise KeyError(job_type)
+    job = Job(job_type=job_type, params=json.dumps(params or {}), created_by=created_by)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def claim_job(worker):
+    """
+    Claims the oldest due job whose type is below its JOB_CONCURRENCY limit
+    Due means queued, or running with an expired lease (its worker died).
+    The limit is checked in the claiming UPDATE itself, so workers racing
+    for the same type cannot both get past it. Returns (job id, token) or None
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    due = or_(Job.status == 'queued', and_(Job.status == 'running', Job.lease_expires_at < now))
+    candidates = db.session.execute(
+        select(Job.id, Job.job_type, Job.status, Job.attempts).where(due).order_by(Job.id).limit(50)
+    ).all()
+    other = aliased(Job)
+    for job_id, job_type, status, attempts in candidates:
+        if status == 'running' and attempts >= config['JOB_MAX_ATTEMPTS']:
+            db.session.execute(update(Job).where(Job.id == job_id, due).values(
+                status='failed', finished_at=now, lease_token=None, lease_expires_at=None,
+                error=f'Lost by its worker {attempts} times (lease expired)',
+            ))
+            db.session.commit()
+            continue
+        limit = config['JOB_CONCURRENCY'].get(job_type, config['JOB_DEFAULT_CONCURRENCY'])
+        running = select(func.count(other.id)).where(
+            other.job_type == job_type, other.status == 'running', other.lease_expires_at >= now,
+        ).scalar_subquery()
+        token = uuid.uuid4().hex
+        claimed = db.session.execute(update(Job).where(Job.id == job_id, due, running < limit).values(
+            status='running', lease_token=token, lease_expires_at=_lease_end(), worker=worker,
+            attempts=Job.attempts + 1, started_at=now, error=None,
+        )).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id, token
+    return None
+
+
+def _finish(job_id, token, **values):
+    """Final state of a claimed job, unless it was cancelled or taken over meanwhile"""
+    updated = db.session.execute(update(Job).where(
+        Job.id == job_id, Job.lease_token == token, Job.status == 'running'
+    ).values(finished_at=datetime.utcnow(), lease_token=None, lease_expires_at=None, **values)).rowcount
+    db.session.commit()
+    return bool(updated)
+
+
+def _discard(result):
+    if result is not None:
+        try:
+            os.remove(os.path.join(current_app.config['JOB_RESULTS_FOLDER'], result[0]))
+        except OSError:
+            pass
+
+
+def run_job(job_id, token):
+    """Runs a claimed job to completion; returns its final status"""
+    job = db.session.get(Job, job_id)
+    ctx = JobContext(job, token)
+    job_type = JOB_TYPES.get(job.job_type)
+    try:
+        if job_type is None:
+            raise LookupError(f'Unknown job type {job.job_type!r}')
+        message = job_type.handler(ctx)
+    except JobInterrupted:
+        db.session.rollback()
+        _discard(ctx.result)
+        return 'interrupted'
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Job %s (%s) failed', job_id, job.job_type)
+        _discard(ctx.result)
+        _finish(job_id, token, status='failed', error=f'{type(e).__name__}: {e}')
+        return 'failed'
+    stored, name, mimetype = ctx.result or (None, None, None)
+    if not _finish(job_id, token, status='done', progress=ctx.done, message=(message or '')[:255] or None,
+                   result_file=stored, result_name=name, result_mimetype=mimetype):
+        _discard(ctx.result)
+        return 'interrupted'
+    return 'done'
+
+
+def run_next_job(worker=None):
+    """Claims and runs one job; returns (job id, status) or None when nothing is due"""
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    claim = claim_job(worker)
+    if claim is None:
+        return None
+    return claim[0], run_job(*claim)
+
+
+def cancel_job(job_id):
+    """
+    Cancels a queued or running job (the caller commits); a running handler
+    stops at its next progress report. Returns False if it already finished
+    """
+    return bool(db.session.execute(update(Job).where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES)).values(
+        status='cancelled', finished_at=datetime.utcnow(), lease_expires_at=None,
+    )).rowcount)
+
+
+def purge_jobs(days=None):
+    """Deletes finished jobs older than JOB_RESULT_RETENTION_DAYS with their result files"""
+    days = current_app.config['JOB_RESULT_RETENTION_DAYS'] if days is None else days
+    old = and_(Job.status.not_in(ACTIVE_STATUSES), Job.created_at < datetime.utcnow() - timedelta(days=days))
+    files = list(db.session.scalars(select(Job.result_file).where(old, Job.result_file.is_not(None))))
+    deleted = db.session.execute(delete(Job).where(old)).rowcount
+    db.session.commit()
+    for stored in files:
+        _discard((stored,))
+    return deleted
+
+
+def result_path(job):
+    """Absolute path of a finished job's result file, or None"""
+    if job.status != 'done' or not job.result_file:
+        return None
+    path = os.path.join(current_app.config['JOB_RESULTS_FOLDER'], job.result_file)
+    return path if os.path.exists(path) else None
+
+
+def job_dict(job):
+    """JSON view of a job, for progress polling"""
+    return {
+        'id': job.id,
+        'type': job.job_type,
+        'status': job.status,
+        'progress': job.progress,
+        'progress_total': job.progress_total,
+        'percent': job.percent,
+        'message': job.message,
+        'error': job.error,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'result_name': job.result_name,
+    }
+
+
+def jobs_stats():
+    """Jobs per status, running jobs per type and the age of the oldest queued one"""
+    counts = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+    running = dict(db.session.query(Job.job_type, func.count(Job.id))
+                   .filter(Job.status == 'running').group_by(Job.job_type).all())
+    oldest = db.session.query(func.min(Job.created_at)).filter(Job.status == 'queued').scalar()
+    return {
+        'by_status': counts,
+        'running_by_type': running,
+        'oldest_queued_age_seconds': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0,
+    }
@@ -0,0 +1,352 @@
+"""
+Schema bootstrap and versioned migrations for Placement Portal
+db.create_all() creates missing tables; the numbered migrations below alter
+tables that already exist. Run once per deploy via `flask bootstrap`
+"""
+from sqlalchemy import inspect, text
+
+from app import db
+
+
+def _has_column(connection, table, column):
+    return column in {c['name'] for c in inspect(connection).get_columns(table)}
+
+
+def _add_column(connection, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there"""
+    if _has_column(connection, table, column):
+        return False
+    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    return True
+
+
+def _rebuild_sqlite_table(connection, name, ddl):
+    """
+    Recreates a SQLite table from the given CREATE TABLE statement, keeping
+    the data and the table's indexes. SQLite cannot alter constraints in
+    place. The DDL is frozen in the migration that calls this, never taken
+    from the models, which gain columns in later versions. Needs
+    foreign_keys=OFF, which run_migrations() sets for every migration on SQLite
+    """
+    old_columns = [c['name'] for c in inspect(connection).get_columns(name)]
+    indexes = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"
+    ), {'name': name}).scalars().all()
+    # Keep other tables' foreign keys pointing at the name, not the renamed copy
+    connection.execute(text('PRAGMA legacy_alter_table=ON'))
+    connection.execute(text(f'ALTER TABLE {name} RENAME TO {name}__old'))
+    connection.execute(text('PRAGMA legacy_alter_table=OFF'))
+    connection.execute(text(ddl))
+    new_columns = {c['name'] for c in inspect(connection).get_columns(name)}
+    dropped = [column for column in old_columns if column not in new_columns]
+    if dropped:
+        raise RuntimeError(f"Rebuilding {name} would drop column(s) {', '.join(dropped)}")
+    shared = ', '.join(old_columns)
+    connection.execute(text(f'INSERT INTO {name} ({shared}) SELECT {shared} FROM {name}__old'))
+    connection.execute(text(f'DROP TABLE {name}__old'))
+    for index in indexes:
+        connection.execute(text(index))
+
+
+def _create_index(connection, table, name, *columns):
+    """CREATE INDEX unless an index of that name is already there (fresh tables get theirs from create_all)"""
+    if name in {index['name'] for index in inspect(connection).get_indexes(table)}:
+        return False
+    connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    return True
+
+
+def _has_cascade(connection, table, column):
+    """True when the foreign key on table.column is ON DELETE CASCADE"""
+    for fk in inspect(connection).get_foreign_keys(table):
+        if fk['constrained_columns'] == [column]:
+            return (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE'
+    return True
+
+
+def _set_on_delete_cascade(connection, table, column, referred):
+    """Ensures the foreign key table.column -> referred.id is ON DELETE CASCADE (not SQLite)"""
+    for fk in inspect(connection).get_foreign_keys(table):
+        if fk['constrained_columns'] != [column]:
+            continue
+        constraint = fk['name']
+        connection.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT {constraint}'))
+        connection.execute(text(
+            f'ALTER TABLE {table} ADD CONSTRAINT {constraint} FOREIGN KEY ({column}) '
+            f'REFERENCES {referred} (id) ON DELETE CASCADE'
+        ))
+        return
+
+
+def _m1_initial_schema(connection):
+    # Tables created by db.create_all() before migrations existed
+    pass
+
+
+def _m2_company_updated_at(connection):
+    if _add_column(connection, 'company_profiles', 'updated_at', 'DATETIME'):
+        connection.execute(text('UPDATE company_profiles SET updated_at = created_at'))
+
+
+# The four tables as they stood at migration 3, with cascading foreign keys.
+# Frozen on purpose: later columns are added by their own migrations
+_M3_SQLITE_TABLES = {
+    'company_profiles': """
+        CREATE TABLE company_profiles (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            company_name VARCHAR(200) NOT NULL,
+            industry VARCHAR(100),
+            location VARCHAR(200),
+            website VARCHAR(200),
+            contact_person VARCHAR(100),
+            contact_phone VARCHAR(20),
+            description TEXT,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+        )""",
+    'student_profiles': """
+        CREATE TABLE student_profiles (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            full_name VARCHAR(100) NOT NULL,
+            roll_number VARCHAR(50) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            graduation_year INTEGER NOT NULL,
+            year INTEGER,
+            cgpa FLOAT,
+            tenth_marks FLOAT,
+            twelfth_marks FLOAT,
+            dob DATE,
+            resume_filename VARCHAR(200),
+            phone VARCHAR(20),
+            address TEXT,
+            skills TEXT,
+            created_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+        )""",
+    'placement_drives': """
+        CREATE TABLE placement_drives (
+            id INTEGER NOT NULL,
+            company_id INTEGER NOT NULL,
+            title VARCHAR(200) NOT NULL,
+            description TEXT NOT NULL,
+            job_type VARCHAR(50),
+            location VARCHAR(200),
+            package VARCHAR(100),
+            eligibility_criteria TEXT,
+            required_skills TEXT,
+            application_deadline DATE NOT NULL,
+            is_approved BOOLEAN NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(company_id) REFERENCES company_profiles (id) ON DELETE CASCADE
+        )""",
+    'applications': """
+        CREATE TABLE applications (
+            id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            drive_id INTEGER NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            remarks TEXT,
+            applied_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            CONSTRAINT unique_student_drive_application UNIQUE (student_id, drive_id),
+            FOREIGN KEY(student_id) REFERENCES student_profiles (id) ON DELETE CASCADE,
+            FOREIGN KEY(drive_id) REFERENCES placement_drives (id) ON DELETE CASCADE
+        )""",
+}
+
+
+def _m3_on_delete_cascade(connection):
+    for table, column, referred in (
+        ('company_profiles', 'user_id', 'users'),
+        ('student_profiles', 'user_id', 'users'),
+        ('placement_drives', 'company_id', 'company_profiles'),
+        ('applications', 'student_id', 'student_profiles'),
+        ('applications', 'drive_id', 'placement_drives'),
+    ):
+        if _has_cascade(connection, table, column):
+            continue
+        if connection.dialect.name == 'sqlite':
+            # Rebuilds both of applications' keys at once
+            _rebuild_sqlite_table(connection, table, _M3_SQLITE_TABLES[table])
+        else:
+            _set_on_delete_cascade(connection, table, column, referred)
+
+
+def _m4_placement_cube(connection):
+    from app.cube import rebuild_cube
+    rebuild_cube(connection)
+
+
+def _m5_drive_package_ranges(connection):
+    # Filled by `flask backfill-packages`; new and edited drives parse on save
+    for column in ('ctc_min', 'ctc_max', 'stipend_min', 'stipend_max'):
+        _add_column(connection, 'placement_drives', column, 'INTEGER')
+    _create_index(connection, 'placement_drives', 'ix_drives_open_deadline',
+                  'is_approved', 'is_active', 'application_deadline')
+    _create_index(connection, 'placement_drives', 'ix_drives_open_job_type',
+                  'is_approved', 'is_active', 'job_type', 'application_deadline')
+    _create_index(connection, 'placement_drives', 'ix_drives_open_location',
+                  'is_approved', 'is_active', 'location', 'application_deadline')
+    _create_index(connection, 'placement_drives', 'ix_drives_open_ctc', 'is_approved', 'is_active', 'ctc_max', 'ctc_min')
+    _create_index(connection, 'placement_drives', 'ix_drives_open_stipend',
+                  'is_approved', 'is_active', 'stipend_max', 'stipend_min')
+
+
+def _m6_sync_archive_columns(connection):
+    # Archive tables created before a hot table gained columns lack them
+    from app.archive import ARCHIVE_TABLES
+    for table in ARCHIVE_TABLES.values():
+        for column in table.columns:
+            _add_column(connection, table.name, column.name, column.type.compile(dialect=connection.dialect))
+
+
+def _m7_change_feed(connection):
+    if _add_column(connection, 'student_profiles', 'updated_at', 'DATETIME'):
+        connection.execute(text('UPDATE student_profiles SET updated_at = created_at'))
+    _create_index(connection, 'student_profiles', 'ix_student_profiles_updated_at', 'updated_at', 'id')
+    _create_index(connection, 'applications', 'ix_applications_updated_at', 'updated_at', 'id')
+    _m6_sync_archive_columns(connection)
+
+
+def _m8_application_selected_at(connection):
+    if _add_column(connection, 'applications', 'selected_at', 'DATETIME'):
+        # Best guess for existing offers: their last update
+        connection.execute(text("UPDATE applications SET selected_at = updated_at WHERE status = 'selected'"))
+    _m6_sync_archive_columns(connection)
+
+
+def _m9_company_duplicate_index(connection):
+    from app.duplicates import rebuild_company_index
+    _add_column(connection, 'company_profiles', 'name_key', 'VARCHAR(200)')
+    _add_column(connection, 'company_profiles', 'domain', 'VARCHAR(255)')
+    _create_index(connection, 'company_profiles', 'ix_company_profiles_name_key', 'name_key')
+    _create_index(connection, 'company_profiles', 'ix_company_profiles_domain', 'domain')
+    rebuild_company_index(connection)
+    _m6_sync_archive_columns(connection)
+
+
+def _m10_delivery_rate_index(connection):
+    _create_index(connection, 'notification_deliveries', 'ix_notification_deliveries_delivered_at', 'delivered_at')
+
+
+def _m11_cascade_foreign_key_indexes(connection):
+    # Deleting a company or drive looks its children up by these columns
+    _create_index(connection, 'placement_drives', 'ix_placement_drives_company_id', 'company_id')
+    _create_index(connection, 'applications', 'ix_applications_drive_id', 'drive_id')
+
+
+def _m12_application_decided_at(connection):
+    if _add_column(connection, 'applications', 'decided_at', 'DATETIME'):
+        # Until now the decision time was read from updated_at
+        connection.execute(text("UPDATE applications SET decided_at = updated_at WHERE status IN ('selected', 'rejected')"))
+    _m6_sync_archive_columns(connection)
+
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Initial schema', _m1_initial_schema),
+    (2, 'Add company_profiles.updated_at', _m2_company_updated_at),
+    (3, 'ON DELETE CASCADE on profile, drive and application foreign keys', _m3_on_delete_cascade),
+    (4, 'Build the placement cube from existing applications', _m4_placement_cube),
+    (5, 'Add parsed package ranges and drive listing indexes', _m5_drive_package_ranges),
+    (6, 'Add missing columns to archive tables', _m6_sync_archive_columns),
+    (7, 'Add student_profiles.updated_at and change feed indexes', _m7_change_feed),
+    (8, 'Add applications.selected_at for placement policies', _m8_application_selected_at),
+    (9, 'Add company name keys, domains and the trigram index', _m9_company_duplicate_index),
+    (10, 'Index notification deliveries by time for outbox metrics', _m10_delivery_rate_index),
+    (11, 'Index the foreign keys followed by company and drive deletes', _m11_cascade_foreign_key_indexes),
+    (12, 'Add applications.decided_at for time to decision', _m12_application_decided_at),
+]
+
+
+def _run_sqlite_migration(connection, migrate, record):
+    """
+    Runs one migration and its record insert in a single SQLite transaction
+    pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so DDL
+    (a table rename, say) would commit on its own and a failed migration
+    would stay half applied. Driver autocommit plus an explicit BEGIN makes
+    the whole migration roll back together
+    """
+    # Table rebuilds must not fire cascades; this PRAGMA only takes effect
+    # outside a transaction
+    connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+    connection.commit()
+    driver_connection = connection.connection.driver_connection
+    isolation_level = driver_connection.isolation_level
+    driver_connection.isolation_level = None
+    try:
+        with connection.begin():
+            connection.exec_driver_sql('BEGIN')
+            migrate(connection)
+            violation = connection.exec_driver_sql('PRAGMA foreign_key_check').first()
+            if violation:
+                raise RuntimeError(f'Migration left rows violating foreign keys (table {violation[0]})')
+            record(connection)
+    finally:
+        driver_connection.isolation_level = isolation_level
+        connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+        connection.commit()
+
+
+def run_migrations(engine=None):
+    """
+    Applies pending migrations in order, each in its own transaction
+    (a migration that fails is rolled back whole, and later ones are not run)
+    Returns the list of versions applied
+    """
+    from app.models import SchemaMigration
+    engine = engine or db.session.get_bind()
+    applied = []
+    with engine.connect() as connection:
+        done = {row[0] for row in connection.execute(db.select(SchemaMigration.version))}
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+
+        def record(connection):
+            connection.execute(db.insert(SchemaMigration).values(version=version, description=description))
+
+        with engine.connect() as connection:
+            try:
+                if engine.dialect.name == 'sqlite':
+                    _run_sqlite_migration(connection, migrate, record)
+                else:
+                    with connection.begin():
+                        migrate(connection)
+                        record(connection)
+            except Exception as e:
+                raise RuntimeError(f'Migration {version} ({description}) failed: {e}') from e
+        applied.append(version)
+    return applied
+
+
+def bootstrap(engine=None):
+    """
+    One-shot database setup: create tables, migrate, seed the default admin
+    and drop cached fragments and analytics. Must run inside an app context
+    """
+    import app.models  # noqa: F401  (registers every table on db.metadata)
+    import app.archive  # noqa: F401
+    from app.cache import get_cache
+    from app.fragment_cache import invalidate_fragments
+    from app.utils import create_default_admin
+    engine = engine or db.session.get_bind()
+    db.metadata.create_all(engine)
+    applied = run_migrations(engine)
+    create_default_admin()
+    # A deploy can change templates and the shape of cached results; the
+    # version bump reaches every process sharing the cache
+    invalidate_fragments()
+    get_cache('analytics').invalidate()
+    return applied
@@ -23,8 +23,10 @@ class User(db.Model, UserMixin):
     is_blacklisted = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    company_profile = db.relationship('CompanyProfile', backref='user', uselist=False, cascade='all, delete-orphan')
-    student_profile = db.relationship('StudentProfile', backref='user', uselist=False, cascade='all, delete-orphan')
+    # passive_deletes: ON DELETE CASCADE in the database removes the subtree,
+    # so SQLAlchemy does not load children just to delete them one by one
+    company_profile = db.relationship('CompanyProfile', backref='user', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    student_profile = db.relationship('StudentProfile', backref='user', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     def check_password(self, password):
@@ -50,7 +52,7 @@ class CompanyProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
     # Foreign key to users table (one-to-one)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False)
     
     # Company details
     company_name = db.Column(db.String(200), nullable=False)
@@ -59,13 +61,18 @@ class CompanyProfile(db.Model):
     website = db.Column(db.String(200))
     contact_person = db.Column(db.String(100))
     contact_phone = db.Column(db.String(20))
-    description = db.Column(db.Text)
+    # Large text is deferred: loaded on first access or with undefer_group('details')
+    description = db.deferred(db.Column(db.Text), group='details')
+    # Normalized name and web/email domain for duplicate detection (app/duplicates.py)
+    name_key = db.Column(db.String(200), index=True)
+    domain = db.Column(db.String(255), index=True)
     
-    # Timestamp
+    # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Relationships (one-to-many with placement_drives)
-    placement_drives = db.relationship('PlacementDrive', backref='company', lazy='dynamic', cascade='all, delete-orphan')
+    placement_drives = db.relationship('PlacementDrive', backref='company', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<CompanyProfile {self.company_name}>'
@@ -82,7 +89,7 @@ class StudentProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
     # Foreign key to users table (one-to-one)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False)
     
     # Student details
     full_name = db.Column(db.String(100), nullable=False)
@@ -96,14 +103,21 @@ class StudentProfile(db.Model):
     dob = db.Column(db.Date)  # Date of birth
     resume_filename = db.Column(db.String(200))
     phone = db.Column(db.String(20))
-    address = db.Column(db.Text)
-    skills = db.Column(db.Text)  # Comma-separated skills
+    # Large text is deferred: loaded on first access or with undefer_group('details')
+    address = db.deferred(db.Column(db.Text), group='details')
+    skills = db.deferred(db.Column(db.Text), group='details')  # Comma-separated skills
     
-    # Timestamp
+    # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Keyset order of the change feed (app/changes.py)
+    __table_args__ = (
+        db.Index('ix_student_profiles_updated_at', 'updated_at', 'id'),
+    )
     
     # Relationships (one-to-many with applications)
-    applications = db.relationship('Application', backref='student', lazy='dynamic', cascade='all, delete-orphan')
+    applications = db.relationship('Application', backref='student', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<StudentProfile {self.full_name} ({self.roll_number})>'
@@ -119,17 +133,23 @@ class PlacementDrive(db.Model):
     # Primary key
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
-    # Foreign key to company_profiles table (many-to-one)
-    company_id = db.Column(db.Integer, db.ForeignKey('company_profiles.id'), nullable=False)
+    # Foreign key to company_profiles table (many-to-one); indexed for the cascading delete
+    company_id = db.Column(db.Integer, db.ForeignKey('company_profiles.id', ondelete='CASCADE'), nullable=False, index=True)
     
     # Drive details
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    # Large text is deferred: loaded on first access or with undefer_group('details')
+    description = db.deferred(db.Column(db.Text, nullable=False), group='details')
     job_type = db.Column(db.String(50))  # 'Full-time', 'Internship', 'Part-time'
     location = db.Column(db.String(200))
     package = db.Column(db.String(100))  # Salary/stipend information
-    eligibility_criteria = db.Column(db.Text)
-    required_skills = db.Column(db.Text)
+    # Parsed from `package` (app/packages.py), in rupees: annual CTC, monthly stipend
+    ctc_min = db.Column(db.Integer)
+    ctc_max = db.Column(db.Integer)
+    stipend_min = db.Column(db.Integer)
+    stipend_max = db.Column(db.Integer)
+    eligibility_criteria = db.deferred(db.Column(db.Text), group='details')
+    required_skills = db.deferred(db.Column(db.Text), group='details')
     application_deadline = db.Column(db.Date, nullable=False)
     
     # Approval and status flags
@@ -141,7 +161,22 @@ class PlacementDrive(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Relationships (one-to-many with applications)
-    applications = db.relationship('Application', backref='drive', lazy='dynamic', cascade='all, delete-orphan')
+    applications = db.relationship('Application', backref='drive', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    
+    # Composite indexes for the student drive listing filters and sorts
+    __table_args__ = (
+        db.Index('ix_drives_open_deadline', 'is_approved', 'is_active', 'application_deadline'),
+        db.Index('ix_drives_open_job_type', 'is_approved', 'is_active', 'job_type', 'application_deadline'),
+        db.Index('ix_drives_open_location', 'is_approved', 'is_active', 'location', 'application_deadline'),
+        db.Index('ix_drives_open_ctc', 'is_approved', 'is_active', 'ctc_max', 'ctc_min'),
+        db.Index('ix_drives_open_stipend', 'is_approved', 'is_active', 'stipend_max', 'stipend_min'),
+    )
+    
+    @db.validates('package')
+    def _parse_package(self, key, value):
+        from app.packages import parse_package
+        self.ctc_min, self.ctc_max, self.stipend_min, self.stipend_max = parse_package(value)
+        return value
     
     def __repr__(self):
         return f'<PlacementDrive {self.title}>'
@@ -159,20 +194,27 @@ class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
     # Foreign keys (creates many-to-many relationship)
-    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=False)
-    drive_id = db.Column(db.Integer, db.ForeignKey('placement_drives.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id', ondelete='CASCADE'), nullable=False)
+    # drive_id is indexed for the cascading delete (student_id leads the unique constraint)
+    drive_id = db.Column(db.Integer, db.ForeignKey('placement_drives.id', ondelete='CASCADE'), nullable=False, index=True)
     
     # Application status tracking
-    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'shortlisted', 'rejected', 'selected'
-    remarks = db.Column(db.Text)  # Company's comments on the application
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'shortlisted', 'rejected', 'selected', 'withdrawn'
+    remarks = db.deferred(db.Column(db.Text))  # Company's comments on the application (deferred)
     
     # Timestamps
     applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    selected_at = db.Column(db.DateTime)  # when the offer was made (app/policies.py)
+    # When it was last selected or rejected (time to decision in app/analytics.py);
+    # updated_at also moves when a joined drive, company or roll number changes
+    decided_at = db.Column(db.DateTime)
     
     # Unique constraint to prevent duplicate applications
     __table_args__ = (
         db.UniqueConstraint('student_id', 'drive_id', name='unique_student_drive_application'),
+        # Keyset order of the change feed (app/changes.py)
+        db.Index('ix_applications_updated_at', 'updated_at', 'id'),
     )
     
     def __repr__(self):
@@ -206,3 +248,272 @@ class AdminAction(db.Model):
     
     def __repr__(self):
         return f'<AdminAction {self.action_type} by Admin:{self.admin_id}>'
+
+
+class CacheVersion(db.Model):
+    """
+    Named version counters used to validate caches across processes
+    e.g. 'drives' is bumped whenever a drive listing could change
+    """
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
+class SchemaMigration(db.Model):
+    """
+    Versioned schema migrations already applied to this database
+    Written by the bootstrap command (see app/migrations.py)
+    """
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}>'
+
+
+class OutboxEvent(db.Model):
+    """
+    Transactional outbox: events written in the same commit as the change
+    that caused them, delivered later by the outbox worker
+    """
+    __tablename__ = 'outbox_events'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_type = db.Column(db.String(50), nullable=False)  # 'drive_approved', 'application_status_changed'
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=False)
+    
+    # Delivery state: 'pending', 'processing', 'done', 'failed'
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_outbox_events_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f'<OutboxEvent {self.event_type} ({self.status})>'
+
+
+class NotificationDelivery(db.Model):
+    """
+    One row per message delivered for an outbox event
+    Lets a retried event skip recipients that were already notified
+    """
+    __tablename__ = 'notification_deliveries'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('outbox_events.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    channel = db.Column(db.String(50), nullable=False)
+    delivered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'user_id', 'channel', name='unique_event_delivery'),
+        # Recent delivery rate for /admin/metrics (outbox_stats)
+        db.Index('ix_notification_deliveries_delivered_at', 'delivered_at'),
+    )
+    
+    def __repr__(self):
+        return f'<NotificationDelivery Event:{self.event_id} User:{self.user_id} via {self.channel}>'
+
+
+class PlacementCubeCell(db.Model):
+    """
+    Pre-aggregated application counts for the placement cube
+    One cell per (drive, department, graduation year, status); company and
+    job type are copied from the drive so slices never touch the base tables
+    """
+    __tablename__ = 'placement_cube'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    drive_id = db.Column(db.Integer, nullable=False, index=True)
+    company_id = db.Column(db.Integer, nullable=False, index=True)
+    job_type = db.Column(db.String(50))
+    department = db.Column(db.String(100))
+    graduation_year = db.Column(db.Integer, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    applications = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('drive_id', 'department', 'graduation_year', 'status', name='unique_cube_cell'),
+    )
+    
+    def __repr__(self):
+        return f'<PlacementCubeCell Drive:{self.drive_id} {self.department} {self.graduation_year} {self.status}={self.applications}>'
+
+
+class PlacementCubeDirty(db.Model):
+    """
+    Drives whose cube cells are stale; consumed by refresh_cube()
+    Append-only so marking a drive never contends with a running refresh
+    """
+    __tablename__ = 'placement_cube_dirty'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    drive_id = db.Column(db.Integer, nullable=False)
+    marked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PlacementCubeDirty Drive:{self.drive_id}>'
+
+
+class Tombstone(db.Model):
+    """
+    Marker left for each deleted row so the change feed can report deletes
+    Written in the same transaction as the delete (see app/changes.py)
+    """
+    __tablename__ = 'tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50))  # 'deleted', 'withdrawn', 'cohort_archival', ...
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_tombstones_table_deleted_at', 'table_name', 'deleted_at', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<Tombstone {self.table_name}:{self.row_id}>'
+
+
+class InterviewSlot(db.Model):
+    """
+    Interview slot declared by a company for one drive
+    capacity is how many candidates the room/panel takes in the slot
+    """
+    __tablename__ = 'interview_slots'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    drive_id = db.Column(db.Integer, db.ForeignKey('placement_drives.id', ondelete='CASCADE'), nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+    room = db.Column(db.String(100), nullable=False)
+    capacity = db.Column(db.Integer, default=1, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    drive = db.relationship('PlacementDrive', backref=db.backref('interview_slots', lazy='dynamic', passive_deletes=True))
+    
+    __table_args__ = (
+        db.Index('ix_interview_slots_drive_starts_at', 'drive_id', 'starts_at'),
+        db.Index('ix_interview_slots_room_starts_at', 'room', 'starts_at'),
+    )
+    
+    def __repr__(self):
+        return f'<InterviewSlot Drive:{self.drive_id} {self.starts_at} {self.room}>'
+
+
+class InterviewAssignment(db.Model):
+    """
+    A shortlisted application placed in an interview slot (app/interviews.py)
+    Cancelled rows are kept so the scheduler does not offer the same slot again
+    """
+    __tablename__ = 'interview_assignments'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    slot_id = db.Column(db.Integer, db.ForeignKey('interview_slots.id', ondelete='CASCADE'), nullable=False)
+    application_id = db.Column(db.Integer, db.ForeignKey('applications.id', ondelete='CASCADE'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id', ondelete='CASCADE'), nullable=False)
+    
+    # 'scheduled' or 'cancelled'
+    status = db.Column(db.String(20), default='scheduled', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    slot = db.relationship('InterviewSlot')
+    
+    __table_args__ = (
+        db.UniqueConstraint('application_id', 'slot_id', name='unique_application_slot'),
+        db.Index('ix_interview_assignments_slot_id', 'slot_id'),
+        db.Index('ix_interview_assignments_student_id', 'student_id'),
+    )
+    
+    def __repr__(self):
+        return f'<InterviewAssignment Application:{self.application_id} Slot:{self.slot_id} ({self.status})>'
+
+
+class CompanyTrigram(db.Model):
+    """
+    Trigram index over normalized company names (app/duplicates.py)
+    One row per distinct trigram of a company; the primary key doubles as
+    the posting list looked up by trigram
+    """
+    __tablename__ = 'company_trigrams'
+    
+    gram = db.Column(db.String(3), primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company_profiles.id', ondelete='CASCADE'), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_company_trigrams_company_id', 'company_id'),
+    )
+    
+    def __repr__(self):
+        return f'<CompanyTrigram {self.gram!r} Company:{self.company_id}>'
+
+
+class Job(db.Model):
+    """
+    Background job queued by an admin and run by `flask job-worker` (app/jobs.py)
+    A running job holds a lease; one whose lease expires (crashed worker) is
+    claimed again until JOB_MAX_ATTEMPTS
+    """
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_type = db.Column(db.String(50), nullable=False)  # a key of app.jobs.JOB_TYPES
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    
+    # 'queued', 'running', 'done', 'failed', 'cancelled'
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    lease_token = db.Column(db.String(32))  # changes on every claim
+    lease_expires_at = db.Column(db.DateTime)
+    worker = db.Column(db.String(100))  # host:pid of the last claim
+    
+    # Progress reported by the handler: done of total (total may be unknown)
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    
+    # Result file under JOB_RESULTS_FOLDER, offered for download when done
+    result_file = db.Column(db.String(100))
+    result_name = db.Column(db.String(100))
+    result_mimetype = db.Column(db.String(50))
+    
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_jobs_status_type', 'status', 'job_type'),
+        db.Index('ix_jobs_created_at', 'created_at'),
+    )
+    
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, int(self.progress * 100 / self.progress_total))
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.job_type} ({self.status})>'
@@ -0,0 +1,264 @@
+"""
+Outbox-based notifications for Placement Portal
+Views call enqueue_event() before committing; the outbox worker
+(`flask outbox-worker`) drains events in batches and fans them out
+to students through the configured channels
+"""
+import json
+import os
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, date
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+from app import db
+from app.models import (User, StudentProfile, PlacementDrive, Application,
+                        OutboxEvent, NotificationDelivery)
+
+
+# What one drain_outbox() pass did (printed by the worker command)
+DrainResult = namedtuple('DrainResult', ['events', 'messages', 'seconds'])
+
+
+def enqueue_event(event_type, payload, idempotency_key=None):
+    """
+    Adds an outbox event to the current transaction (the caller commits)
+    Events whose idempotency key was already recorded are skipped
+    """
+    key = idempotency_key or f'{event_type}:{uuid.uuid4().hex}'
+    if db.session.query(OutboxEvent.id).filter_by(idempotency_key=key).first() is not None:
+        return None
+    event = OutboxEvent(event_type=event_type, payload=json.dumps(payload), idempotency_key=key)
+    db.session.add(event)
+    return event
+
+
+# ---- channels ---------------------------------------------------------------
+
+class LogChannel:
+    """
+    Appends each message as a JSON line to NOTIFICATION_LOG_PATH
+    Used for local testing; real channels implement the same send(messages)
+    """
+    name = 'log'
+
+    def __init__(self, app):
+        self.path = app.config['NOTIFICATION_LOG_PATH']
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def send(self, messages):
+        with open(self.path, 'a', encoding='utf-8') as log:
+            for message in messages:
+                log.write(json.dumps(message) + '\n')
+
+
+def get_channels(app):
+    """Instantiates the channels named in NOTIFICATION_CHANNELS (cached per app)"""
+    channels = app.extensions.get('notification_channels')
+    if channels is None:
+        channels = [import_string(path)(app) for path in app.config['NOTIFICATION_CHANNELS']]
+        app.extensions['notification_channels'] = channels
+    return channels
+
+
+# ---- fan-out ------------------------------------------------------------------
+
+def _drive_approved_recipients(payload, chunk_size):
+    """
+    Eligible students for a newly approved drive: active, not blacklisted,
+    not yet graduated. Yields (user_id, email, message) in chunks by keyset
+    """
+    drive = PlacementDrive.query.get(payload['drive_id'])
+    if drive is None:
+        return
+    subject = f'New drive: {drive.title} at {drive.company.company_name}'
+    body = (f'{drive.company.company_name} is hiring for {drive.title}. '
+            f'Apply before {drive.application_deadline.strftime("%d %B %Y")}.')
+    last_id = 0
+    while True:
+        rows = db.session.query(User.id, User.email).join(
+            StudentProfile, StudentProfile.user_id == User.id
+        ).filter(
+            User.id > last_id,
+            User.is_active == True,
+            User.is_blacklisted == False,
+            StudentProfile.graduation_year >= date.today().year,
+        ).order_by(User.id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield [(user_id, email, subject, body) for user_id, email in rows]
+        last_id = rows[-1][0]
+
+
+def _application_status_recipients(payload, chunk_size):
+    """The affected applicant(s) of a status change"""
+    rows = db.session.query(User.id, User.email, PlacementDrive.title).select_from(Application).join(
+        StudentProfile, StudentProfile.id == Application.student_id
+    ).join(
+        User, User.id == StudentProfile.user_id
+    ).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).filter(Application.id.in_(payload['application_ids'])).order_by(User.id).all()
+    status = payload['status']
+    for start in range(0, len(rows), chunk_size):
+        yield [
+            (user_id, email, f'Application update: {title}',
+             f'Your application for {title} is now {status}.')
+            for user_id, email, title in rows[start:start + chunk_size]
+        ]
+
+
+def _interview_recipients(payload, chunk_size):
+    """Students given an interview slot by the scheduler"""
+    from app.models import InterviewAssignment, InterviewSlot
+    rows = db.session.query(
+        User.id, User.email, PlacementDrive.title, InterviewSlot.starts_at, InterviewSlot.room
+    ).select_from(InterviewAssignment).join(
+        InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id
+    ).join(
+        PlacementDrive, PlacementDrive.id == InterviewSlot.drive_id
+    ).join(
+        StudentProfile, StudentProfile.id == InterviewAssignment.student_id
+    ).join(
+        User, User.id == StudentProfile.user_id
+    ).filter(
+        InterviewAssignment.id.in_(payload['assignment_ids']), InterviewAssignment.status == 'scheduled'
+    ).order_by(User.id).all()
+    for start in range(0, len(rows), chunk_size):
+        yield [
+            (user_id, email, f'Interview scheduled: {title}',
+             f'Your interview for {title} is on {starts_at.strftime("%d %B %Y at %H:%M")} in {room}.')
+            for user_id, email, title, starts_at, room in rows[start:start + chunk_size]
+        ]
+
+
+FAN_OUT = {
+    'drive_approved': _drive_approved_recipients,
+    'application_status_changed': _application_status_recipients,
+    'interviews_scheduled': _interview_recipients,
+}
+
+
+def _deliver(event, channels, chunk_size):
+    """
+    Sends every undelivered message for one event, committing per chunk
+    so a retry resumes where the failed attempt stopped
+    """
+    payload = json.loads(event.payload)
+    delivered = set(db.session.query(NotificationDelivery.user_id, NotificationDelivery.channel)
+                    .filter_by(event_id=event.id))
+    sent = 0
+    for chunk in FAN_OUT[event.event_type](payload, chunk_size):
+        for channel in channels:
+            pending = [row for row in chunk if (row[0], channel.name) not in delivered]
+            if not pending:
+                continue
+            channel.send([
+                {
+                    'idempotency_key': f'{event.idempotency_key}:{user_id}:{channel.name}',
+                    'user_id': user_id,
+                    'to': email,
+                    'subject': subject,
+                    'body': body,
+                }
+                for user_id, email, subject, body in pending
+            ])
+            db.session.execute(db.insert(NotificationDelivery), [
+                {'event_id': event.id, 'user_id': user_id, 'channel': channel.name,
+                 'delivered_at': datetime.utcnow()}
+                for user_id, _, _, _ in pending
+            ])
+            db.session.commit()
+            sent += len(pending)
+    return sent
+
+
+def _claim(batch_size, lease_seconds):
+    """
+    Claims up to batch_size due events; a claim is a lease, so events left
+    'processing' by a crashed worker become due again when it expires
+    """
+    now = datetime.utcnow()
+    candidates = [row.id for row in db.session.query(OutboxEvent.id).filter(
+        OutboxEvent.status.in_(['pending', 'processing']),
+        OutboxEvent.next_attempt_at <= now,
+    ).order_by(OutboxEvent.id).limit(batch_size)]
+    claimed = []
+    for event_id in candidates:
+        updated = OutboxEvent.query.filter(
+            OutboxEvent.id == event_id,
+            OutboxEvent.status.in_(['pending', 'processing']),
+            OutboxEvent.next_attempt_at <= now,
+        ).update({'status': 'processing', 'next_attempt_at': now + timedelta(seconds=lease_seconds)},
+                 synchronize_session=False)
+        if updated:
+            claimed.append(event_id)
+    db.session.commit()
+    return claimed
+
+
+def drain_outbox(batch_size=None):
+    """
+    Processes one batch of due outbox events
+    Returns a DrainResult; events == 0 means the outbox is idle
+    """
+    config = current_app.config
+    batch_size = batch_size or config['OUTBOX_BATCH_SIZE']
+    channels = get_channels(current_app)
+    start = time.perf_counter()
+    sent_total = 0
+
+    claimed = _claim(batch_size, config['OUTBOX_LEASE_SECONDS'])
+    for event_id in claimed:
+        event = OutboxEvent.query.get(event_id)
+        try:
+            sent_total += _deliver(event, channels, config['NOTIFICATION_CHUNK_SIZE'])
+            event.status = 'done'
+            event.processed_at = datetime.utcnow()
+            event.last_error = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            event = OutboxEvent.query.get(event_id)
+            event.attempts += 1
+            event.last_error = f'{type(e).__name__}: {e}'
+            if event.attempts >= config['OUTBOX_MAX_ATTEMPTS']:
+                event.status = 'failed'
+            else:
+                # Exponential backoff: base, 2x base, 4x base, ...
+                delay = config['OUTBOX_RETRY_BASE_SECONDS'] * (2 ** (event.attempts - 1))
+                event.status = 'pending'
+                event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            db.session.commit()
+
+    return DrainResult(len(claimed), sent_total, round(time.perf_counter() - start, 4))
+
+
+def outbox_stats(window_seconds=300):
+    """
+    Outbox state read from the tables, so every process (web or worker)
+    reports the same numbers: events per outcome, the backlog and its age,
+    and messages delivered over the last window_seconds
+    """
+    now = datetime.utcnow()
+    counts = dict(db.session.query(OutboxEvent.status, db.func.count(OutboxEvent.id))
+                  .group_by(OutboxEvent.status).all())
+    retrying = db.session.query(db.func.count(OutboxEvent.id)).filter(
+        OutboxEvent.status == 'pending', OutboxEvent.attempts > 0).scalar()
+    oldest = db.session.query(db.func.min(OutboxEvent.created_at)).filter(
+        OutboxEvent.status.in_(['pending', 'processing'])).scalar()
+    recent = db.session.query(db.func.count(NotificationDelivery.id)).filter(
+        NotificationDelivery.delivered_at >= now - timedelta(seconds=window_seconds)).scalar()
+    return {
+        'backlog': counts.get('pending', 0) + counts.get('processing', 0),
+        'done_total': counts.get('done', 0),
+        'failed_total': counts.get('failed', 0),
+        'retrying': retrying,
+        'oldest_pending_age_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'window_seconds': window_seconds,
+        'messages_sent_in_window': recent,
+        'messages_per_second': round(recent / window_seconds, 2),
+    }
@@ -0,0 +1,123 @@
+"""
+Package text normalizer for Placement Portal
+Turns free-text packages ("6-8 LPA", "Rs. 25,000/month", "1.2 Cr") into
+annual CTC and monthly stipend ranges in rupees for filtering and sorting
+"""
+import re
+from collections import namedtuple
+
+PackageRange = namedtuple('PackageRange', ['ctc_min', 'ctc_max', 'stipend_min', 'stipend_max'])
+
+EMPTY = PackageRange(None, None, None, None)
+
+UNITS = {
+    'k': 1_000, 'thousand': 1_000,
+    'l': 100_000, 'lac': 100_000, 'lacs': 100_000, 'lakh': 100_000, 'lakhs': 100_000, 'lpa': 100_000,
+    'cr': 10_000_000, 'crore': 10_000_000, 'crores': 10_000_000,
+}
+
+_MONTHLY = re.compile(r'/\s*m(?:onth|o)?\b|per\s+month|\bp\.?\s?m\.?(?=\s|$)|\bmonthly\b|\bstipend\b')
+_ANNUAL = re.compile(r'\blpa\b|per\s+annum|\bp\.?\s?a\.?(?=\s|$)|/\s*(?:yr|year|annum)\b|\bctc\b|\bannual')
+_AMOUNT = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(k|thousand|lpa|lakhs?|lacs?|l|crores?|cr)?\b'
+    r'(?:\s*(?:-|–|to)\s*(\d+(?:\.\d+)?)\s*(k|thousand|lpa|lakhs?|lacs?|l|crores?|cr)?\b)?'
+)
+# Numbers that are not pay: "2 years bond", "6 months", "10% variable", "2L bond", "1L joining bonus"
+_NOT_PAY = re.compile(
+    r'\s*(?:(?:years?|yrs?|months?|mos?|weeks?|days?|bond|penalty|deposit'
+    r'|(?:joining\s+|signing\s+|relocation\s+)?bonus)\b|%)'
+)
+# "(incl. 2L bonus)" restates part of the amount before it
+_INCLUDED = re.compile(r'\bincl(?:\.|uding\b|usive\b|udes\b)[^,;+()]*')
+# Separates the parts of "6 LPA + 25k/month during internship" or "2 years bond, 6 LPA"
+_SEGMENTS = re.compile(r'\+|;|,|\band\b|\bwith\b|\bplus\b|\(|\)')
+
+
+def _normalize(text):
+    text = text.lower().replace('₹', ' ').replace('inr', ' ')
+    text = re.sub(r'\brs\.?', ' ', text)
+    # Thousands separators, including the Indian 12,00,000 grouping
+    text = re.sub(r'(?<=\d),(?=\d)', '', text)
+    return _INCLUDED.sub(' ', text)
+
+
+def _segment_range(segment):
+    """
+    (low, high, monthly) in rupees for one segment, or None
+    The first amount with a money unit wins, else the first bare number;
+    durations, percentages and bond terms are skipped
+    """
+    amounts = [match for match in _AMOUNT.finditer(segment)
+               if not _NOT_PAY.match(segment, match.end())]
+    if not amounts:
+        return None
+    match = next((m for m in amounts if m.group(2) or m.group(4)), amounts[0])
+    low, low_unit, high, high_unit = match.groups()
+    # "6-8 LPA": the trailing unit applies to both ends
+    low_unit = low_unit or high_unit
+    high_unit = high_unit or low_unit
+    monthly = bool(_MONTHLY.search(segment)) and not _ANNUAL.search(segment)
+
+    def rupees(value, unit):
+        value = float(value)
+        if unit:
+            return value * UNITS[unit]
+        # Bare small numbers are lakhs for annual packages ("Package: 6")
+        if not monthly and value < 100:
+            return value * UNITS['lakh']
+        return value
+
+    low_value = rupees(low, low_unit)
+    high_value = rupees(high, high_unit) if high else low_value
+    if high_value < low_value:
+        low_value, high_value = high_value, low_value
+    return round(low_value), round(high_value), monthly
+
+
+def parse_package(text):
+    """
+    Parses package text into a PackageRange (rupees; None where unknown)
+    CTC is annual, stipend is monthly; several ranges of a kind are merged
+    """
+    if not text:
+        return EMPTY
+    ctc, stipend = [], []
+    for segment in _SEGMENTS.split(_normalize(text)):
+        parsed = _segment_range(segment)
+        if parsed is None:
+            continue
+        low, high, monthly = parsed
+        (stipend if monthly else ctc).append((low, high))
+    return PackageRange(
+        min((low for low, _ in ctc), default=None), max((high for _, high in ctc), default=None),
+        min((low for low, _ in stipend), default=None), max((high for _, high in stipend), default=None),
+    )
+
+
+def backfill_packages(batch_size=500, reparse=False):
+    """
+    Parses the package text of existing drives into the numeric columns
+    Walks drives by id in batches, committing each, so it can be stopped and
+    re-run; only drives without parsed values are touched unless reparse is set.
+    Returns the number of drives updated
+    """
+    from app import db
+    from app.models import PlacementDrive
+    from app.utils import bump_version
+    last_id, updated = 0, 0
+    while True:
+        query = db.session.query(PlacementDrive.id, PlacementDrive.package).filter(
+            PlacementDrive.id > last_id, PlacementDrive.package.isnot(None))
+        if not reparse:
+            query = query.filter(PlacementDrive.ctc_max.is_(None), PlacementDrive.stipend_max.is_(None))
+        batch = query.order_by(PlacementDrive.id).limit(batch_size).all()
+        if not batch:
+            return updated
+        rows = [dict(parse_package(package)._asdict(), id=drive_id) for drive_id, package in batch]
+        db.session.execute(db.update(PlacementDrive), rows)
+        # Filtered drive listings may change, so cached pages must revalidate
+        bump_version('drives')
+        db.session.commit()
+        updated += len(rows)
+        last_id = batch[-1][0]
+
@@ -0,0 +1,156 @@
+"""
+Placement policies for Placement Portal
+Each rule is a SQL condition on (student, drive, applied_at) that makes an
+application ineligible. New applications are refused when an enabled rule
+matches; open applications that match are withdrawn with one UPDATE
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, update, exists, case, func, or_
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Application, PlacementDrive
+from app.notifications import enqueue_event
+from app.cube import mark_cube_dirty
+from app.analytics import bump_company_analytics
+from app.interviews import schedule_interviews, release_interviews
+
+# condition(student_id, drive_id, applied_at) -> SQL boolean. The arguments are
+# the outer query's columns when re-evaluating, or plain values for a new application
+Policy = namedtuple('Policy', ['name', 'description', 'message', 'condition'])
+
+# Applications a policy may withdraw
+OPEN_STATUSES = ('pending', 'shortlisted')
+
+
+def _tier(ctc):
+    """Index into PACKAGE_TIERS of the tier a CTC falls in (none parsed: the lowest)"""
+    tiers = current_app.config['PACKAGE_TIERS']
+    ctc = func.coalesce(ctc, 0)
+    return case(*[(ctc >= minimum, index) for index, (_, minimum) in reversed(list(enumerate(tiers)))], else_=0)
+
+
+def _tier_index(name):
+    return [tier for tier, _ in current_app.config['PACKAGE_TIERS']].index(name)
+
+
+def _offers(student_id, drive_id):
+    """Offers the student holds on other drives: (offer, offer drive, select)"""
+    offer = aliased(Application, name='offer')
+    offer_drive = aliased(PlacementDrive, name='offer_drive')
+    stmt = select(offer.id).join(offer_drive, offer_drive.id == offer.drive_id).where(
+        offer.student_id == student_id, offer.status == 'selected', offer.drive_id != drive_id,
+    )
+    return offer, offer_drive, stmt
+
+
+def _one_offer(student_id, drive_id, applied_at):
+    offer, _, offers = _offers(student_id, drive_id)
+    # Only offers made after the application; later applications are left to the tier rules
+    return exists(offers.where(offer.selected_at >= applied_at))
+
+
+def _tiered_offers(student_id, drive_id):
+    """
+    _offers() limited to offers with a parsed CTC: a stipend-only internship,
+    or package text that did not parse, places the student in no tier
+    """
+    offer, offer_drive, stmt = _offers(student_id, drive_id)
+    return offer, offer_drive, stmt.where(offer_drive.ctc_max.isnot(None))
+
+
+def _dream_company(student_id, drive_id, applied_at):
+    _, offer_drive, offers = _tiered_offers(student_id, drive_id)
+    return exists(offers.where(_tier(offer_drive.ctc_max) >= _tier_index(current_app.config['DREAM_COMPANY_TIER'])))
+
+
+def _package_tier(student_id, drive_id, applied_at):
+    _, offer_drive, offers = _tiered_offers(student_id, drive_id)
+    # Joined inside the EXISTS so that it correlates with the outer application
+    target = aliased(PlacementDrive, name='target_drive')
+    return exists(offers.join(target, target.id == drive_id).where(_tier(offer_drive.ctc_max) >= _tier(target.ctc_max)))
+
+
+POLICIES = [
+    Policy('one_offer', 'A selected student is withdrawn from applications made before the offer',
+           'You have been selected for another drive since applying here.', _one_offer),
+    Policy('dream_company', 'No applying after an offer in the dream tier (DREAM_COMPANY_TIER) or above',
+           'You hold a dream company offer and cannot apply to further drives.', _dream_company),
+    Policy('package_tier', 'After an offer, only drives in a higher package tier are open',
+           'You hold an offer in the same or a higher package tier than this drive.', _package_tier),
+]
+
+
+def enabled_policies():
+    names = current_app.config['PLACEMENT_POLICIES']
+    return [policy for policy in POLICIES if policy.name in names]
+
+
+def check_application(student_id, drive_id):
+    """The first enabled policy that forbids a new application, or None"""
+    policies = enabled_policies()
+    if not policies:
+        return None
+    now = datetime.utcnow()
+    row = db.session.execute(select(*[
+        policy.condition(student_id, drive_id, now).label(policy.name) for policy in policies
+    ])).one()
+    return next((policy for policy, blocked in zip(policies, row) if blocked), None)
+
+
+def _violating(policies, student_ids=None):
+    """WHERE clause for open applications that break any of the policies"""
+    clause = [
+        Application.status.in_(OPEN_STATUSES),
+        or_(*[policy.condition(Application.student_id, Application.drive_id, Application.applied_at)
+              for policy in policies]),
+    ]
+    if student_ids is not None:
+        clause.append(Application.student_id.in_(student_ids))
+    return clause
+
+
+def policy_report(student_ids=None):
+    """{policy name: open applications it would withdraw} (one COUNT per policy)"""
+    return {
+        policy.name: db.session.scalar(select(func.count(Application.id)).where(*_violating([policy], student_ids)))
+        for policy in enabled_policies()
+    }
+
+
+def enforce_policies(student_ids=None):
+    """
+    Withdraws every open application that breaks an enabled policy
+    student_ids (ids or a select) limits the check to those students; None
+    re-evaluates everyone, e.g. after a policy change. One UPDATE for all
+    rules; interview seats are released and notifications queued.
+    The caller commits. Returns the withdrawn application ids
+    """
+    policies = enabled_policies()
+    if not policies:
+        return []
+    where = _violating(policies, student_ids)
+    stmt = update(Application).where(*where).values(
+        status='withdrawn', updated_at=datetime.utcnow()
+    ).execution_options(synchronize_session=False)
+    if db.engine.dialect.update_returning:
+        withdrawn = list(db.session.scalars(stmt.returning(Application.id)))
+    else:
+        withdrawn = list(db.session.scalars(select(Application.id).where(*where)))
+        if withdrawn:
+            db.session.execute(stmt)
+    if withdrawn:
+        drive_ids = select(Application.drive_id).where(Application.id.in_(withdrawn)).distinct()
+        mark_cube_dirty(drive_ids)
+        for company_id in db.session.scalars(
+            select(PlacementDrive.company_id).where(PlacementDrive.id.in_(drive_ids)).distinct()
+        ):
+            bump_company_analytics(company_id)
+        enqueue_event('application_status_changed', {'application_ids': withdrawn, 'status': 'withdrawn'})
+        freed = release_interviews(withdrawn)
+        if freed:
+            schedule_interviews(drive_ids=freed)
+    return withdrawn
@@ -0,0 +1,181 @@
+"""
+Column-projected row types for Placement Portal list pages and exports
+Each query selects only the short columns a listing shows and returns
+lightweight named-tuple rows instead of full ORM entities
+"""
+from collections import namedtuple
+
+from sqlalchemy import select, func, literal, union_all, and_
+
+from app import db
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+
+
+class CompanyRow(namedtuple('CompanyRow', [
+    'user_id', 'company_id', 'email', 'is_approved', 'is_blacklisted',
+    'company_name', 'industry', 'location', 'contact_person',
+])):
+    __slots__ = ()
+
+
+class StudentRow(namedtuple('StudentRow', [
+    'user_id', 'student_id', 'email', 'is_blacklisted',
+    'full_name', 'roll_number', 'department', 'cgpa', 'phone', 'archived',
+])):
+    __slots__ = ()
+
+
+class DriveRow(namedtuple('DriveRow', [
+    'id', 'title', 'job_type', 'location', 'package', 'application_deadline',
+    'is_approved', 'is_active', 'updated_at',
+    'company_id', 'company_name', 'company_updated_at', 'application_count',
+])):
+    __slots__ = ()
+
+    def fragment_entities(self):
+        """Entities this row renders, for the {% cache %} tag"""
+        return [
+            ('placement_drives', self.id, self.updated_at),
+            ('company_profiles', self.company_id, self.company_updated_at),
+        ]
+
+
+class ApplicationRow(namedtuple('ApplicationRow', [
+    'id', 'status', 'applied_at', 'student_id', 'student_name', 'roll_number',
+    'drive_id', 'drive_title', 'company_name', 'archived',
+])):
+    __slots__ = ()
+
+
+def _rows(row_type, stmt):
+    return [row_type._make(row) for row in db.session.execute(stmt)]
+
+
+def company_rows_query(q=None, pending_only=False):
+    """SELECT for company users with their profile's short columns"""
+    stmt = select(
+        User.id, CompanyProfile.id, User.email, User.is_approved, User.is_blacklisted,
+        CompanyProfile.company_name, CompanyProfile.industry, CompanyProfile.location,
+        CompanyProfile.contact_person,
+    ).select_from(User).outerjoin(CompanyProfile, CompanyProfile.user_id == User.id).where(User.role == 'company')
+    if pending_only:
+        stmt = stmt.where(User.is_approved == False)
+    if q:
+        stmt = stmt.where(CompanyProfile.company_name.ilike(f'%{q}%'))
+    return stmt.order_by(User.id)
+
+
+def company_rows(q=None, pending_only=False):
+    return _rows(CompanyRow, company_rows_query(q, pending_only))
+
+
+def student_rows_query(q=None, include_archived=False):
+    """
+    SELECT for student users with their profile's short columns
+    include_archived adds students moved out by cohort archival (UNION ALL)
+    """
+    stmt = select(
+        User.id.label('user_id'), StudentProfile.id.label('student_id'), User.email, User.is_blacklisted,
+        StudentProfile.full_name, StudentProfile.roll_number, StudentProfile.department,
+        StudentProfile.cgpa, StudentProfile.phone, literal(False).label('archived'),
+    ).select_from(User).outerjoin(StudentProfile, StudentProfile.user_id == User.id).where(User.role == 'student')
+    if q:
+        stmt = stmt.where(StudentProfile.full_name.ilike(f'%{q}%'))
+    if not include_archived:
+        return stmt.order_by(User.id)
+
+    from app.archive import ARCHIVE_TABLES
+    users, profiles = ARCHIVE_TABLES['users'], ARCHIVE_TABLES['student_profiles']
+    archived = select(
+        users.c.id, profiles.c.id, users.c.email, users.c.is_blacklisted,
+        profiles.c.full_name, profiles.c.roll_number, profiles.c.department,
+        profiles.c.cgpa, profiles.c.phone, literal(True),
+    ).select_from(profiles).join(users, and_(
+        # Rows moved together share archived_at; ids alone may have been reused
+        users.c.id == profiles.c.user_id, users.c.archived_at == profiles.c.archived_at,
+    ))
+    if q:
+        archived = archived.where(profiles.c.full_name.ilike(f'%{q}%'))
+    combined = union_all(stmt, archived).subquery()
+    return select(combined).order_by(combined.c.user_id, combined.c.archived)
+
+
+def student_rows(q=None, include_archived=False):
+    return _rows(StudentRow, student_rows_query(q, include_archived))
+
+
+def drive_rows(q=None, pending_only=False, company_id=None):
+    """Drives with company name and application count (no per-row lazy loads)"""
+    application_count = select(func.count(Application.id)).where(
+        Application.drive_id == PlacementDrive.id
+    ).correlate(PlacementDrive).scalar_subquery()
+    stmt = select(
+        PlacementDrive.id, PlacementDrive.title, PlacementDrive.job_type, PlacementDrive.location,
+        PlacementDrive.package, PlacementDrive.application_deadline,
+        PlacementDrive.is_approved, PlacementDrive.is_active, PlacementDrive.updated_at,
+        CompanyProfile.id, CompanyProfile.company_name, CompanyProfile.updated_at,
+        application_count,
+    ).select_from(PlacementDrive).join(CompanyProfile, CompanyProfile.id == PlacementDrive.company_id)
+    if pending_only:
+        stmt = stmt.where(PlacementDrive.is_approved == False)
+    if company_id is not None:
+        stmt = stmt.where(PlacementDrive.company_id == company_id)
+    if q:
+        stmt = stmt.where(PlacementDrive.title.ilike(f'%{q}%'))
+    return _rows(DriveRow, stmt.order_by(PlacementDrive.id))
+
+
+def application_rows_query(q=None, student_id=None, include_archived=False):
+    """
+    SELECT for application rows with student, drive and company names
+    include_archived adds the applications of archived cohorts (UNION ALL);
+    student_id only applies to live students
+    """
+    stmt = select(
+        Application.id, Application.status, Application.applied_at,
+        StudentProfile.id.label('student_id'), StudentProfile.full_name.label('student_name'),
+        StudentProfile.roll_number, PlacementDrive.id.label('drive_id'), PlacementDrive.title.label('drive_title'),
+        CompanyProfile.company_name, literal(False).label('archived'),
+    ).select_from(Application).join(
+        StudentProfile, StudentProfile.id == Application.student_id
+    ).join(
+        PlacementDrive, PlacementDrive.id == Application.drive_id
+    ).join(
+        CompanyProfile, CompanyProfile.id == PlacementDrive.company_id
+    )
+    if student_id is not None:
+        stmt = stmt.where(Application.student_id == student_id)
+    if q:
+        stmt = stmt.where(StudentProfile.full_name.ilike(f'%{q}%'))
+    if not include_archived or student_id is not None:
+        return stmt.order_by(Application.id)
+
+    from app.archive import ARCHIVE_TABLES
+    applications, profiles = ARCHIVE_TABLES['applications'], ARCHIVE_TABLES['student_profiles']
+    # The drive usually outlives the cohort, so its names come from the hot tables
+    archived = select(
+        applications.c.id, applications.c.status, applications.c.applied_at,
+        profiles.c.id, profiles.c.full_name, profiles.c.roll_number,
+        applications.c.drive_id, PlacementDrive.title, CompanyProfile.company_name, literal(True),
+    ).select_from(applications).join(profiles, and_(
+        profiles.c.id == applications.c.student_id, profiles.c.archived_at == applications.c.archived_at,
+    )).outerjoin(
+        PlacementDrive, PlacementDrive.id == applications.c.drive_id
+    ).outerjoin(
+        CompanyProfile, CompanyProfile.id == PlacementDrive.company_id
+    ).where(applications.c.archive_reason == 'cohort_archival')
+    if q:
+        archived = archived.where(profiles.c.full_name.ilike(f'%{q}%'))
+    combined = union_all(stmt, archived).subquery()
+    return select(combined).order_by(combined.c.archived, combined.c.id)
+
+
+def application_rows(q=None, student_id=None, include_archived=False):
+    return _rows(ApplicationRow, application_rows_query(q, student_id, include_archived))
+
+
+def iter_rows(row_type, stmt, batch_size=1000):
+    """Streams rows in batches, for exports that should not hold everything in memory"""
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for row in result:
+        yield row_type._make(row)
@@ -2,14 +2,19 @@
 Student routes for Placement Portal
 Dashboard, drive browsing, applications, and resume upload
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
 from flask_login import login_required, current_user
-from app.utils import role_required, allowed_file
+from app.engine import read_only, retry_on_lock
+from app.utils import role_required, allowed_file, get_version
+from app.http_cache import make_etag, not_modified, cacheable
+from app.cube import mark_cube_dirty
+from app.changes import record_deletions
 from app import db
 from app.models import User, StudentProfile, PlacementDrive, Application
 import os
 from werkzeug.utils import secure_filename
-from datetime import date
+from sqlalchemy.orm import joinedload, undefer, undefer_group
+from datetime import date, datetime
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
 
@@ -29,6 +34,9 @@ def edit_profile():
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
     if request.method == 'POST':
         profile.full_name = request.form['full_name']
+        if profile.department != request.form['department']:
+            # The placement cube counts applications per department
+            mark_cube_dirty(db.select(Application.drive_id).filter_by(student_id=profile.id))
         profile.department = request.form['department']
         profile.year = request.form.get('year')
         profile.cgpa = request.form.get('cgpa') or None
@@ -62,6 +70,7 @@ def download_resume():
 @student_bp.route('/dashboard')
 @login_required
 @role_required('student')
+@read_only
 def dashboard():
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
     total_apps = Application.query.filter_by(student_id=profile.id).count()
@@ -69,35 +78,108 @@ def dashboard():
     pending = Application.query.filter_by(student_id=profile.id, status='pending').count()
     return render_template('student/dashboard.html', profile=profile, total_apps=total_apps, selected=selected, pending=pending)
 
+# Sort options for the drive listing: name -> ORDER BY columns
+DRIVE_SORTS = {
+    'deadline': [PlacementDrive.application_deadline, PlacementDrive.id],
+    # Drives without a parsed package go last either way
+    'package_high': [PlacementDrive.ctc_max.desc().nulls_last(), PlacementDrive.id],
+    'package_low': [PlacementDrive.ctc_min.asc().nulls_last(), PlacementDrive.id],
+    'stipend_high': [PlacementDrive.stipend_max.desc().nulls_last(), PlacementDrive.id],
+    'newest': [PlacementDrive.created_at.desc(), PlacementDrive.id],
+}
+
+
+def _drive_filters(args):
+    """Normalized listing filters from the query string (invalid values are ignored)"""
+    def lpa(name):
+        try:
+            value = float(args.get(name, ''))
+        except ValueError:
+            return None
+        return round(value * 100_000) if value >= 0 else None
+
+    sort = args.get('sort', 'deadline')
+    return {
+        'job_type': args.get('job_type', '').strip() or None,
+        'location': args.get('location', '').strip() or None,
+        'min_ctc': lpa('min_lpa'),
+        'max_ctc': lpa('max_lpa'),
+        'sort': sort if sort in DRIVE_SORTS else 'deadline',
+    }
+
+
 # View approved drives
 @student_bp.route('/drives')
 @login_required
 @role_required('student')
+@read_only
 def drives():
     today = date.today()
+    filters = _drive_filters(request.args)
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    drives = PlacementDrive.query.filter_by(is_approved=True, is_active=True).filter(PlacementDrive.application_deadline >= today).all()
     # Get list of drive IDs already applied to
-    applied_drive_ids = [app.drive_id for app in Application.query.filter_by(student_id=profile.id).all()]
-    return render_template('student/drives.html', drives=drives, applied_drive_ids=applied_drive_ids)
+    applied_drive_ids = [row.drive_id for row in db.session.query(Application.drive_id).filter_by(student_id=profile.id).order_by(Application.drive_id)]
+    # The listing only changes when a drive changes, the student applies/withdraws
+    # or the date moves deadlines into the past. No Last-Modified: the drives
+    # timestamp says nothing about the last two, so only the ETag validates
+    version, _ = get_version('drives')
+    etag = make_etag('drives', version, today, profile.id, applied_drive_ids, sorted(filters.items()))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    open_drives = PlacementDrive.query.filter_by(is_approved=True, is_active=True).filter(PlacementDrive.application_deadline >= today)
+    query = open_drives.options(joinedload(PlacementDrive.company))
+    if filters['job_type']:
+        query = query.filter(PlacementDrive.job_type == filters['job_type'])
+    if filters['location']:
+        query = query.filter(PlacementDrive.location == filters['location'])
+    # Package range: drives whose CTC range overlaps the requested one
+    if filters['min_ctc'] is not None:
+        query = query.filter(PlacementDrive.ctc_max >= filters['min_ctc'])
+    if filters['max_ctc'] is not None:
+        query = query.filter(PlacementDrive.ctc_min <= filters['max_ctc'])
+    drives = query.order_by(*DRIVE_SORTS[filters['sort']]).all()
+    # Choices for the filter form, from the open drives only
+    job_types = [row[0] for row in open_drives.with_entities(PlacementDrive.job_type).filter(PlacementDrive.job_type.isnot(None)).distinct().order_by(PlacementDrive.job_type)]
+    locations = [row[0] for row in open_drives.with_entities(PlacementDrive.location).filter(PlacementDrive.location.isnot(None), PlacementDrive.location != '').distinct().order_by(PlacementDrive.location)]
+    return cacheable(render_template('student/drives.html', drives=drives, applied_drive_ids=applied_drive_ids,
+                                     filters=filters, job_types=job_types, locations=locations,
+                                     sorts=list(DRIVE_SORTS)), etag)
 
 # View drive details
 @student_bp.route('/drives/<int:drive_id>')
 @login_required
 @role_required('student')
+@read_only
 def drive_detail(drive_id):
-    drive = PlacementDrive.query.get_or_404(drive_id)
-    if not drive.is_approved or not drive.is_active:
+    state = db.session.query(
+        PlacementDrive.updated_at, PlacementDrive.is_approved, PlacementDrive.is_active
+    ).filter_by(id=drive_id).first()
+    if state is None:
+        abort(404)
+    if not state.is_approved or not state.is_active:
         flash('This drive is not available.', 'warning')
         return redirect(url_for('student.drives'))
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
     already_applied = Application.query.filter_by(student_id=profile.id, drive_id=drive_id).first() is not None
-    return render_template('student/drive_detail.html', drive=drive, already_applied=already_applied)
+    # Company details are shown too, so the global drives version is part of the key
+    # (and, as on the listing, the drive's updated_at alone is no Last-Modified)
+    version, _ = get_version('drives')
+    etag = make_etag('drive', drive_id, state.updated_at, version, profile.id, already_applied)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    # The detail page shows the long text columns that list queries leave deferred
+    drive = PlacementDrive.query.options(
+        undefer_group('details'), joinedload(PlacementDrive.company).undefer_group('details')
+    ).filter_by(id=drive_id).first()
+    return cacheable(render_template('student/drive_detail.html', drive=drive, already_applied=already_applied), etag)
 
 # Apply to a drive
 @student_bp.route('/drives/<int:drive_id>/apply', methods=['POST'])
 @login_required
 @role_required('student')
+@retry_on_lock
 def apply_drive(drive_id):
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
     drive = PlacementDrive.query.get_or_404(drive_id)
@@ -110,8 +192,16 @@ def apply_drive(drive_id):
     if drive.application_deadline < date.today() or not drive.is_approved or not drive.is_active:
         flash('Drive not open for applications.', 'danger')
         return redirect(url_for('student.drives'))
+    # Placement policies (one offer, dream company, package tiers)
+    from app.policies import check_application
+    policy = check_application(profile.id, drive_id)
+    if policy is not None:
+        flash(policy.message, 'warning')
+        return redirect(url_for('student.drives'))
     app = Application(student_id=profile.id, drive_id=drive_id, status='pending')
     db.session.add(app)
+    # No analytics version bump: the company's cached analytics expire on their own
+    mark_cube_dirty([drive_id])
     db.session.commit()
     flash('Application submitted.', 'success')
     return redirect(url_for('student.applications'))
@@ -120,10 +210,20 @@ def apply_drive(drive_id):
 @student_bp.route('/applications')
 @login_required
 @role_required('student')
+@read_only
 def applications():
     profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    apps = Application.query.filter_by(student_id=profile.id).all()
-    return render_template('student/applications.html', applications=apps)
+    apps = Application.query.options(
+        undefer(Application.remarks), joinedload(Application.drive).joinedload(PlacementDrive.company)
+    ).filter_by(student_id=profile.id).all()
+    from app.models import InterviewSlot, InterviewAssignment
+    interviews = {row.application_id: row for row in db.session.query(
+        InterviewAssignment.id, InterviewAssignment.application_id, InterviewSlot.starts_at, InterviewSlot.ends_at,
+        InterviewSlot.room
+    ).join(InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id).filter(
+        InterviewAssignment.student_id == profile.id, InterviewAssignment.status == 'scheduled')}
+    return render_template('student/applications.html', applications=apps, interviews=interviews,
+                           now=datetime.utcnow())
 
 # Withdraw application (only if pending)
 @student_bp.route('/applications/<int:app_id>/withdraw', methods=['POST'])
@@ -140,11 +240,34 @@ def withdraw_application(app_id):
     if app.status != 'pending':
         flash('Only pending applications can be withdrawn.', 'warning')
         return redirect(url_for('student.applications'))
+    record_deletions(Application, Application.id == app.id, 'withdrawn')
     db.session.delete(app)
+    mark_cube_dirty([app.drive_id])
     db.session.commit()
     flash('Application withdrawn successfully.', 'success')
     return redirect(url_for('student.applications'))
 
+# Give up an interview slot; the scheduler looks for another one
+@student_bp.route('/interviews/<int:assignment_id>/cancel', methods=['POST'])
+@login_required
+@role_required('student')
+def cancel_interview(assignment_id):
+    from app.models import InterviewAssignment
+    from app.interviews import cancel_assignment
+    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+    assignment = InterviewAssignment.query.get_or_404(assignment_id)
+    if profile is None or assignment.student_id != profile.id:
+        flash('Unauthorized action.', 'danger')
+        return redirect(url_for('student.applications'))
+    cancel_assignment(assignment_id)
+    db.session.commit()
+    moved = InterviewAssignment.query.filter_by(application_id=assignment.application_id, status='scheduled').first()
+    if moved is not None:
+        flash('Interview moved to another slot.', 'success')
+    else:
+        flash('Interview cancelled. You will be scheduled when a slot frees up.', 'info')
+    return redirect(url_for('student.applications'))
+
 # Resume upload (PDF only)
 @student_bp.route('/profile/upload_resume', methods=['POST'])
 @login_required
@@ -0,0 +1,183 @@
+"""
+Multi-institution tenancy for Placement Portal
+Each tenant (college) has its own database. Requests are mapped to a tenant
+by host name or by a /<tenant>/ path prefix, and the session routes every
+query for that request to the tenant's engine (see RoutingSession.get_bind)
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask import g, has_app_context, session, abort
+from flask_login import user_logged_in
+from sqlalchemy import create_engine, select, func
+
+# Keys under app.extensions
+TENANT_ENGINES_KEY = 'placement_tenant_engines'
+TENANT_READ_ENGINES_KEY = 'placement_tenant_read_engines'
+
+# WSGI environ key set by TenantMiddleware
+ENVIRON_KEY = 'placement.tenant'
+
+
+def current_tenant():
+    """Tenant bound to the current app context, or None for the default database"""
+    return g.get('tenant') if has_app_context() else None
+
+
+def tenant_names(app):
+    return sorted(app.extensions.get(TENANT_ENGINES_KEY, {}))
+
+
+class TenantMiddleware:
+    """
+    Resolves the tenant before Flask sees the request
+    Host names are checked first; with TENANT_PATH_PREFIX a leading /<tenant>
+    segment is moved into SCRIPT_NAME, so url_for() keeps generating
+    tenant-prefixed links. Requests matching no tenant use the default database
+    """
+
+    def __init__(self, wsgi_app, hosts, tenants, path_prefix):
+        self.wsgi_app = wsgi_app
+        self.hosts = {host.lower(): tenant for host, tenant in hosts.items()}
+        self.tenants = set(tenants)
+        self.path_prefix = path_prefix
+
+    def __call__(self, environ, start_response):
+        host = (environ.get('HTTP_HOST') or environ.get('SERVER_NAME') or '').split(':')[0].lower()
+        tenant = self.hosts.get(host)
+        if tenant is None and self.path_prefix:
+            path = environ.get('PATH_INFO', '')
+            segment = path.split('/', 2)[1] if path.startswith('/') else ''
+            if segment in self.tenants:
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + '/' + segment
+                environ['PATH_INFO'] = path[len(segment) + 1:] or '/'
+                tenant = segment
+        environ[ENVIRON_KEY] = tenant
+        return self.wsgi_app(environ, start_response)
+
+
+def _tag_session(sender, user):
+    # A login is only valid for the tenant database the user was loaded from
+    session['_tenant'] = current_tenant()
+
+
+def init_tenants(app):
+    """
+    Creates one engine per entry in TENANT_DATABASE_URLS and installs routing
+    Does nothing when no tenants are configured (single database mode)
+    """
+    urls = app.config.get('TENANT_DATABASE_URLS') or {}
+    if not urls:
+        return
+    from app.engine import engine_options, install_engine_events, create_read_engine
+
+    engines, read_engines = {}, {}
+    for name, uri in urls.items():
+        engine = create_engine(uri, **engine_options(app.config, uri))
+        install_engine_events(engine, app.config)
+        engines[name] = engine
+        if app.config.get('READ_ROUTING_ENABLED'):
+            read_engine = create_read_engine(app.config, engine.url, replica_uri=None)
+            if read_engine is not None:
+                read_engines[name] = read_engine
+    app.extensions[TENANT_ENGINES_KEY] = engines
+    app.extensions[TENANT_READ_ENGINES_KEY] = read_engines
+
+    app.wsgi_app = TenantMiddleware(app.wsgi_app, app.config.get('TENANT_HOSTS') or {},
+                                    engines, app.config.get('TENANT_PATH_PREFIX'))
+
+    @app.before_request
+    def bind_tenant():
+        from flask import request
+        g.tenant = request.environ.get(ENVIRON_KEY)
+        # User ids are per database: drop a login made under another tenant
+        if '_user_id' in session and session.get('_tenant') != g.tenant:
+            session.clear()
+
+    user_logged_in.connect(_tag_session, app)
+
+
+def tenant_engine(app, name):
+    """Engine of a tenant; None is the default database"""
+    if name is None:
+        from app import db
+        return db.engine
+    engines = app.extensions.get(TENANT_ENGINES_KEY, {})
+    if name not in engines:
+        raise KeyError(f'Unknown tenant: {name}')
+    return engines[name]
+
+
+@contextmanager
+def tenant_context(app, name):
+    """
+    App context whose session is bound to one tenant (for commands and workers)
+    """
+    if name is not None:
+        tenant_engine(app, name)  # validates the name
+    with app.app_context():
+        g.tenant = name
+        yield
+
+
+def dispose_tenant_engines(app):
+    for key in (TENANT_ENGINES_KEY, TENANT_READ_ENGINES_KEY):
+        for engine in app.extensions.get(key, {}).values():
+            engine.dispose()
+
+
+# ---- cross-tenant reporting ---------------------------------------------------
+
+def _tenant_summary(name, engine):
+    """Headline counts for one tenant, on a connection of its own"""
+    from app.models import User, PlacementDrive, Application
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        users = dict(connection.execute(select(User.role, func.count(User.id)).group_by(User.role)).all())
+        drives = connection.execute(select(func.count(PlacementDrive.id)).where(
+            PlacementDrive.is_approved == True, PlacementDrive.is_active == True)).scalar()
+        statuses = dict(connection.execute(select(Application.status, func.count(Application.id))
+                                           .group_by(Application.status)).all())
+    return {
+        'tenant': name,
+        'students': users.get('student', 0),
+        'companies': users.get('company', 0),
+        'active_drives': drives,
+        'applications': sum(statuses.values()),
+        'selected': statuses.get('selected', 0),
+        'query_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def cross_tenant_report(app, workers=None):
+    """
+    Runs the summary queries against every tenant database in parallel
+    Returns {'tenants': [...], 'totals': {...}, 'elapsed_ms': ...}; a tenant
+    whose database fails is reported with an 'error' instead of counts
+    """
+    engines = app.extensions.get(TENANT_ENGINES_KEY, {})
+    workers = workers or app.config['TENANT_REPORT_WORKERS']
+    start = time.perf_counter()
+
+    def run(name):
+        try:
+            return _tenant_summary(name, engines[name])
+        except Exception as e:
+            return {'tenant': name, 'error': f'{type(e).__name__}: {e}'}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(engines) or 1))) as pool:
+        rows = list(pool.map(run, sorted(engines)))
+    fields = ('students', 'companies', 'active_drives', 'applications', 'selected')
+    totals = {field: sum(row.get(field, 0) for row in rows) for field in fields}
+    return {
+        'tenants': rows,
+        'totals': totals,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def require_default_tenant():
+    """Cross-tenant views are only served from the central (default) portal"""
+    if current_tenant() is not None:
+        abort(404)
@@ -111,3 +111,54 @@ def log_admin_action(admin_id, action_type, target_id=None, target_type=None, re
     except Exception as e:
         db.session.rollback()
         print(f"Error logging admin action: {e}")
+
+
+def bump_version(name):
+    """
+    Increments a named cache version inside the current transaction
+    The caller's commit publishes the new version together with the change
+    """
+    from app.models import CacheVersion
+    from datetime import datetime
+    updated = CacheVersion.query.filter_by(name=name).update(
+        {'version': CacheVersion.version + 1, 'updated_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.session.add(CacheVersion(name=name, version=1))
+
+
+def get_version(name):
+    """
+    Returns (version, updated_at) for a named cache version
+    Unknown names report version 0 with no timestamp
+    """
+    from app.models import CacheVersion
+    row = db.session.query(CacheVersion.version, CacheVersion.updated_at).filter_by(name=name).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def stream_csv(filename, header, rows, chunk_size=65536):
+    """
+    Streams a CSV download row by row instead of building it in memory
+    Rows are written out in chunks of about chunk_size bytes
+    """
+    import csv
+    from io import StringIO
+    from flask import Response, stream_with_context
+
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    # stream_with_context keeps the request (and its DB session) open while streaming
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment;filename={filename}'})
@@ -0,0 +1,143 @@
+"""
+Benchmark script for Placement Portal
+Measures worker cold start (import + create_app) in fresh interpreters and
+list-page hydration cost of ORM entities versus projection rows
+Run: python benchmark.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+COLD_START_SNIPPET = """
+import time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('production')
+done = time.perf_counter()
+print((imported - start) * 1000, (done - imported) * 1000)
+"""
+
+
+def cold_start(runs=5):
+    """
+    Starts a new interpreter per run so every import is cold
+    Returns (import timings, create_app timings) in milliseconds
+    """
+    imports, factory = [], []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', COLD_START_SNIPPET], cwd=basedir, env=os.environ)
+        import_ms, factory_ms = output.decode().strip().splitlines()[-1].split()
+        imports.append(float(import_ms))
+        factory.append(float(factory_ms))
+    return imports, factory
+
+
+def seed(app, students=200, drives=50, applications_per_student=10):
+    """Creates a synthetic dataset in the app's (empty) database"""
+    from app import db
+    from app.migrations import bootstrap
+    from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+    from werkzeug.security import generate_password_hash
+    with app.app_context():
+        bootstrap()
+        password = generate_password_hash('bench')
+        company_user = User(email='bench-company@example.com', password_hash=password, role='company', is_approved=True)
+        db.session.add(company_user)
+        db.session.flush()
+        company = CompanyProfile(user_id=company_user.id, company_name='Bench Corp', description='x' * 2000)
+        db.session.add(company)
+        db.session.flush()
+        drive_ids = []
+        for i in range(drives):
+            drive = PlacementDrive(company_id=company.id, title=f'Engineer {i}', description='d' * 4000,
+                                   eligibility_criteria='e' * 500, required_skills='s' * 500,
+                                   job_type='Full-time', application_deadline=date.today() + timedelta(days=30),
+                                   is_approved=True)
+            db.session.add(drive)
+            db.session.flush()
+            drive_ids.append(drive.id)
+        for i in range(students):
+            user = User(email=f'bench-student{i}@example.com', password_hash=password, role='student')
+            db.session.add(user)
+            db.session.flush()
+            student = StudentProfile(user_id=user.id, full_name=f'Student {i}', roll_number=f'R{i:05}',
+                                     department='CSE', graduation_year=date.today().year + 1, cgpa=8.0, skills='k' * 500, address='a' * 300)
+            db.session.add(student)
+            db.session.flush()
+            for drive_id in drive_ids[:applications_per_student]:
+                db.session.add(Application(student_id=student.id, drive_id=drive_id, remarks='r' * 300))
+        db.session.commit()
+
+
+def hydration(app, runs=5):
+    """
+    Loads the admin applications listing as ORM entities (with their drive,
+    student and company) and as ApplicationRow projections
+    Returns {name: (timings in ms, bytes per row)}
+    """
+    from app import db
+    from app.models import Application, PlacementDrive
+    from app.projections import application_rows
+    from sqlalchemy.orm import joinedload
+
+    def orm():
+        apps = Application.query.options(
+            joinedload(Application.student),
+            joinedload(Application.drive).joinedload(PlacementDrive.company),
+        ).all()
+        # Touch what the template renders so nothing is left to load lazily
+        for a in apps:
+            a.student.full_name, a.drive.title, a.drive.company.company_name, a.status
+        return apps
+
+    results = {}
+    with app.app_context():
+        for name, load in (('orm entities', orm), ('projection rows', application_rows)):
+            timings = []
+            for _ in range(runs):
+                db.session.expunge_all()
+                start = time.perf_counter()
+                load()
+                timings.append((time.perf_counter() - start) * 1000)
+            db.session.expunge_all()
+            tracemalloc.start()
+            rows = load()
+            allocated, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = (timings, allocated / max(len(rows), 1))
+            del rows
+    return results
+
+
+def report(name, timings, unit='ms'):
+    print(f"  {name:32} median {statistics.median(timings):9.2f} {unit}   "
+          f"min {min(timings):9.2f} {unit}   max {max(timings):9.2f} {unit}")
+
+
+if __name__ == '__main__':
+    workdir = tempfile.mkdtemp(prefix='placement-bench-')
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(workdir, 'bench.db'))
+
+    print("\n" + "="*60)
+    print("  PLACEMENT PORTAL BENCHMARKS")
+    print("="*60)
+    imports, factory = cold_start()
+    report('cold start: imports', imports)
+    report('cold start: create_app()', factory)
+    print("-"*60)
+
+    from app import create_app
+    app = create_app('production')
+    seed(app)
+    for name, (timings, bytes_per_row) in hydration(app).items():
+        report(f'list page: {name}', timings)
+        print(f"  {'':32} {bytes_per_row:9.0f} bytes/row")
+    print("="*60 + "\n")
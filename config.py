@@ -20,6 +20,25 @@ class Config:
     # Disable SQLAlchemy modification tracking (saves resources)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Database engine tuning (applied by app/engine.py)
+    # PRAGMAs run on every new SQLite connection; foreign_keys is required
+    # for ON DELETE CASCADE (SQLite leaves it off by default)
+    SQLITE_PRAGMAS = {'foreign_keys': 'ON'}
+    # Connection pool sizing for file-based SQLite and server databases
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 10
+    DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = 1800  # seconds before a server connection is replaced
+    # Times a write view is retried when the database reports a lock conflict
+    DB_LOCK_RETRIES = 3
+    
+    # Read/write routing: views marked @read_only query a separate read engine
+    # (a replica URI, or a read-only pool on the same SQLite file)
+    READ_ROUTING_ENABLED = False
+    SQLALCHEMY_READ_DATABASE_URI = os.environ.get('READ_DATABASE_URL')
+    # After a user writes, their reads stay on the primary for this many seconds
+    READ_AFTER_WRITE_SECONDS = 5
+    
     # File upload configuration
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads', 'resumes')
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max file size
@@ -27,6 +46,135 @@ class Config:
     
     # Pagination settings
     ITEMS_PER_PAGE = 20
+    
+    # Notifications (transactional outbox, see app/notifications.py)
+    NOTIFICATION_CHANNELS = ['app.notifications:LogChannel']
+    NOTIFICATION_LOG_PATH = os.path.join(basedir, 'instance', 'notifications.log')
+    NOTIFICATION_CHUNK_SIZE = 500  # recipients sent (and recorded) per commit
+    OUTBOX_BATCH_SIZE = 50  # events claimed per worker pass
+    OUTBOX_MAX_ATTEMPTS = 5
+    OUTBOX_RETRY_BASE_SECONDS = 30  # doubled after each failed attempt
+    OUTBOX_LEASE_SECONDS = 300  # claimed events become due again after this
+    
+    # Rejected companies/drives are copied to the archived_* tables before
+    # the delete cascades through their drives and applications
+    ARCHIVE_ON_REJECT = False
+    # Cohort archival (`flask archive-cohorts`): students leave the hot tables this
+    # many years after graduation_year, admin actions after this many days
+    ARCHIVE_AFTER_GRADUATION_YEARS = 2
+    ARCHIVE_ADMIN_ACTIONS_DAYS = 365
+    ARCHIVE_BATCH_SIZE = 500
+    
+    # Change feed for ERP sync (/admin/export/<feed>/changes, see app/changes.py).
+    # Rows younger than the lag are held back until concurrent commits settle;
+    # keep it above any read replica lag
+    CHANGE_FEED_LAG_SECONDS = 5
+    CHANGE_FEED_PAGE_SIZE = 1000
+    CHANGE_FEED_MAX_PAGE_SIZE = 10000
+    
+    # JSON API page sizes (rows per cursor page)
+    API_DEFAULT_PAGE_SIZE = 100
+    API_MAX_PAGE_SIZE = 1000
+    
+    # Response compression (see app/compression.py); brotli needs the `brotli` package
+    COMPRESSION_ENABLED = True
+    COMPRESSION_ENCODINGS = ['br', 'gzip']  # server preference order
+    COMPRESSION_LEVEL = 6
+    COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies are sent as-is
+    COMPRESSION_MIMETYPES = ['text/html', 'text/csv', 'text/plain', 'application/json', 'application/x-ndjson']
+
+    # Admission control (see app/admission.py). Requests are classed by endpoint
+    # (fnmatch patterns, first match wins; otherwise GET is 'read' and other
+    # methods 'write') and answered 503 + Retry-After at once, rather than
+    # queueing, when their class already has `limit` requests in flight or the
+    # whole server has `share` x ADMISSION_CAPACITY (None = never shed)
+    ADMISSION_ENABLED = True
+    ADMISSION_CAPACITY = 16  # requests in flight at once; serve.py uses its worker count
+    ADMISSION_CLASSES = {
+        'critical': (None, None),
+        'write': (12, 1.0),
+        'read': (16, 0.9),
+        'heavy': (2, 0.5),
+    }
+    ADMISSION_ENDPOINTS = {
+        'student.apply_drive': 'critical',
+        'admin.metrics': 'critical',
+        'admin.export*': 'heavy',
+        'admin.statistics': 'heavy',
+        'admin.cube': 'heavy',
+        'admin.tenants': 'heavy',
+        'company.analytics': 'heavy',
+    }
+    ADMISSION_RETRY_AFTER = 5  # seconds
+    # Shed requests a proxy's X-Request-Start shows waited longer than this (None = off)
+    ADMISSION_MAX_QUEUE_SECONDS = None
+    # Login attempts per client address and account: a token bucket of
+    # LOGIN_BURST tokens refilled at LOGIN_RATE_PER_MINUTE; beyond it 429 + Retry-After
+    LOGIN_BURST = 10
+    LOGIN_RATE_PER_MINUTE = 5
+    LOGIN_BUCKETS = 4096  # (address, account) pairs hash into this many buckets
+    # Reverse proxies in front of the app that append to X-Forwarded-For
+    # (e.g. 1 behind nginx); the client address is then taken from that header.
+    # Leave at 0 when clients connect directly: the header could be forged
+    PROXY_FIX_X_FOR = 0
+
+    # Background jobs (see app/jobs.py), run by `flask job-worker`. A running
+    # job renews its lease whenever it reports progress; one not heard from for
+    # JOB_LEASE_SECONDS is claimed by another worker, up to JOB_MAX_ATTEMPTS times
+    JOB_RESULTS_FOLDER = os.path.join(basedir, 'instance', 'job_results')
+    JOB_LEASE_SECONDS = 300
+    JOB_MAX_ATTEMPTS = 3
+    JOB_PROGRESS_INTERVAL = 2  # seconds between progress writes
+    JOB_PAGE_SIZE = 5000  # export rows per query
+    # Jobs of one type running at once across all workers
+    JOB_DEFAULT_CONCURRENCY = 2
+    JOB_CONCURRENCY = {'archive_cohorts': 1, 'cube_refresh': 1}
+    JOB_RESULT_RETENTION_DAYS = 7  # finished jobs and their files are then purged
+    CUBE_REFRESH_BATCH_SIZE = 200  # drives recomputed per transaction (and per progress report)
+
+    # Interview scheduler (app/interviews.py): minimum break between two
+    # interviews of the same student
+    INTERVIEW_GAP_MINUTES = 15
+
+    # Placement policies enforced by app/policies.py (remove a name to disable it).
+    # Package tiers are (name, minimum annual CTC in rupees), lowest first; a
+    # drive without a parsed CTC is in the lowest tier, but an offer from one
+    # (e.g. a stipend-only internship) puts the student in no tier
+    PLACEMENT_POLICIES = ['one_offer', 'dream_company', 'package_tier']
+    PACKAGE_TIERS = [('regular', 0), ('dream', 1000000)]
+    DREAM_COMPANY_TIER = 'dream'
+
+    # Company names at or above this trigram similarity (0-1), or sharing a
+    # website/email domain, are flagged as likely duplicates (app/duplicates.py)
+    DUPLICATE_COMPANY_THRESHOLD = 0.5
+
+    # Application cache (see app/cache.py), shared by the fragment cache and
+    # company analytics. 'sqlite' keeps one store in CACHE_PATH for every worker
+    # process on the host; 'memory' is a private LRU per process (tests);
+    # or 'package.module:Class' taking the app
+    CACHE_BACKEND = 'sqlite'
+    CACHE_PATH = os.path.join(basedir, 'instance', 'cache.db')
+    CACHE_MAX_ENTRIES = 20000  # least recently used entries are evicted beyond this
+    CACHE_TIMEOUT_MS = 200  # wait this long for a locked cache, then treat it as a miss
+    # Company analytics are recomputed at least this often. Students applying or
+    # withdrawing do not invalidate them (during a drive rush every applicant
+    # would write the company's version row), so they show up within this delay
+    ANALYTICS_MAX_AGE_SECONDS = 60
+
+    # Multi-institution mode (see app/tenants.py): tenant name -> database URI,
+    # e.g. TENANTS="college_a=sqlite:////srv/a.db;college_b=sqlite:////srv/b.db"
+    TENANT_DATABASE_URLS = dict(
+        item.split('=', 1) for item in os.environ.get('TENANTS', '').split(';') if '=' in item
+    )
+    TENANT_HOSTS = {}  # host name -> tenant, e.g. {'placements.college-a.edu': 'college_a'}
+    TENANT_PATH_PREFIX = True  # also resolve /<tenant>/... when no host matches
+    TENANT_REPORT_WORKERS = 8  # parallel connections for the cross-tenant report
+
+    # Template fragment cache ({% cache %} tag, see app/fragment_cache.py)
+    FRAGMENT_CACHE_ENABLED = True
+    # Fragments go to the app cache unless a separate backend class is named,
+    # e.g. 'mypackage.cache:RedisCache'
+    FRAGMENT_CACHE_BACKEND = None
 
 
 class DevelopmentConfig(Config):
@@ -37,11 +185,34 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production-specific configuration"""
     DEBUG = False
+    
+    # WAL lets readers run alongside a writer; busy_timeout makes writers
+    # wait for the lock instead of failing immediately
+    SQLITE_PRAGMAS = {
+        'foreign_keys': 'ON',
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,  # milliseconds
+        'synchronous': 'NORMAL',  # safe with WAL, far fewer fsyncs
+        'cache_size': -64000,  # negative value = KiB, i.e. 64MB page cache
+        'mmap_size': 268435456,  # 256MB memory-mapped reads
+    }
+    DB_POOL_SIZE = 10
+    DB_MAX_OVERFLOW = 20
+    READ_ROUTING_ENABLED = True
+
+
+class TestingConfig(Config):
+    """Test suite configuration (tests/conftest.py points databases and files at a temp folder)"""
+    TESTING = True
+    CACHE_BACKEND = 'memory'
+    ADMISSION_ENABLED = False
+    TENANT_DATABASE_URLS = {}
 
 
 # Configuration dictionary for easy access
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -8,6 +8,11 @@ from app import create_app
 app = create_app('development')
 
 if __name__ == '__main__':
+    # Single dev process: safe to create tables and the admin here
+    from app.migrations import bootstrap
+    with app.app_context():
+        bootstrap()
+    
     print("\n" + "="*60)
     print("  PLACEMENT PORTAL APPLICATION")
     print("="*60)
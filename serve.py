@@ -0,0 +1,225 @@
+"""
+Production server entry point
+Pre-forking WSGI server: the master process loads the app once, then forks
+workers that share imported modules and compiled templates copy-on-write.
+Workers are recycled after N requests or when their memory grows too large.
+
+Run `flask --app run bootstrap` once first, then:
+    python serve.py --workers 4 --port 8000
+Send SIGUSR1 to the master for a per-worker report (requests, RSS).
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing import Array
+
+from werkzeug.serving import make_server
+
+from app import create_app, db
+
+# Shared per-worker stats, one row of STAT_FIELDS per worker slot
+STAT_FIELDS = ('pid', 'requests', 'rss_kb', 'recycled')
+
+
+def current_rss_kb():
+    """
+    Resident set size of this process in KiB
+    Uses /proc on Linux, falls back to the peak RSS elsewhere
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class PreforkServer:
+    """
+    Master process: owns the listening socket, forks and supervises workers
+    """
+
+    def __init__(self, app, host, port, workers, max_requests, max_rss_mb, backlog=128):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_rss_kb = max_rss_mb * 1024 if max_rss_mb else 0
+        self.backlog = backlog
+        self.stats = Array('d', workers * len(STAT_FIELDS))
+        self.children = {}  # pid -> slot
+        self.running = True
+
+    # ---- stats -----------------------------------------------------------
+
+    def _stat(self, slot, field):
+        return self.stats[slot * len(STAT_FIELDS) + STAT_FIELDS.index(field)]
+
+    def _set_stat(self, slot, field, value):
+        self.stats[slot * len(STAT_FIELDS) + STAT_FIELDS.index(field)] = value
+
+    def worker_stats(self):
+        """List of per-worker dicts (also served by /admin/metrics)"""
+        return [
+            {field: int(self._stat(slot, field)) for field in STAT_FIELDS} | {'slot': slot}
+            for slot in range(self.workers)
+        ]
+
+    def report(self, *_):
+        print("\n" + "-"*60)
+        print(f"  {'slot':>4} {'pid':>8} {'requests':>10} {'rss (MB)':>10} {'recycled':>9}")
+        for row in self.worker_stats():
+            print(f"  {row['slot']:>4} {row['pid']:>8} {row['requests']:>10} "
+                  f"{row['rss_kb'] / 1024:>10.1f} {row['recycled']:>9}")
+        print("-"*60 + "\n", flush=True)
+
+    # ---- master ----------------------------------------------------------
+
+    def preload(self):
+        """
+        Warms everything workers should inherit instead of rebuilding
+        """
+        env = self.app.jinja_env
+        for name in env.list_templates():
+            env.get_template(name)
+        # Connections must never be shared across a fork
+        with self.app.app_context():
+            db.engine.dispose()
+            from app.engine import READ_ENGINE_KEY
+            read_engine = self.app.extensions.get(READ_ENGINE_KEY)
+            if read_engine is not None:
+                read_engine.dispose()
+            from app.tenants import dispose_tenant_engines
+            dispose_tenant_engines(self.app)
+        self.app.extensions['server_stats'] = self.worker_stats
+        # Admission limits count requests across every worker
+        self.app.extensions['admission'].share(self.workers)
+        self.app.extensions['admission_capacity'] = self.workers
+        # Move everything loaded so far out of the collector's reach, so
+        # GC passes in workers do not touch (and un-share) those pages
+        gc.collect()
+        gc.freeze()
+
+    def listen(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.backlog)
+        self.socket.set_inheritable(True)
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.run_worker(slot)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = slot
+        self._set_stat(slot, 'pid', pid)
+        self._set_stat(slot, 'requests', 0)
+
+    def stop(self, *_):
+        self.running = False
+
+    def run(self):
+        self.preload()
+        self.listen()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.report)
+        for slot in range(self.workers):
+            self.spawn(slot)
+        print(f"✓ Master {os.getpid()} serving http://{self.host}:{self.port} "
+              f"with {self.workers} workers", flush=True)
+
+        while self.running:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.children:
+                slot = self.children.pop(pid)
+                # A worker killed mid-request never released its admission places
+                self.app.extensions['admission'].reset_slot(slot)
+                if self.running:
+                    self._set_stat(slot, 'recycled', self._stat(slot, 'recycled') + 1)
+                    self.spawn(slot)
+                continue
+            time.sleep(0.2)
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.report()
+        self.socket.close()
+
+    # ---- worker ----------------------------------------------------------
+
+    def run_worker(self, slot):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+
+        self.app.extensions['admission'].bind_slot(slot)
+        wsgi_app = self.app.wsgi_app
+
+        def counted_app(environ, start_response):
+            self._set_stat(slot, 'requests', self._stat(slot, 'requests') + 1)
+            return wsgi_app(environ, start_response)
+
+        self.app.wsgi_app = counted_app
+        server = make_server(self.host, self.port, self.app, fd=self.socket.fileno())
+        # Wake up regularly to check for shutdown and recycling limits
+        server.timeout = 1.0
+        self._set_stat(slot, 'rss_kb', current_rss_kb())
+
+        while not stopping:
+            server.handle_request()
+            rss_kb = current_rss_kb()
+            self._set_stat(slot, 'rss_kb', rss_kb)
+            if self.max_requests and self._stat(slot, 'requests') >= self.max_requests:
+                break
+            if self.max_rss_kb and rss_kb > self.max_rss_kb:
+                break
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-forking production server for Placement Portal')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--max-requests', type=int, default=1000,
+                        help='recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--max-rss-mb', type=int, default=256,
+                        help='recycle a worker whose RSS exceeds this (0 = never)')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.config)
+    server = PreforkServer(app, args.host, args.port, args.workers, args.max_requests, args.max_rss_mb)
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
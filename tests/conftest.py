@@ -0,0 +1,23 @@
+"""
+Shared fixtures for the Placement Portal tests
+Apps are built from TestingConfig with every database and file in tmp_path
+"""
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Returns a factory: make_app(**settings) -> app on SQLite files under tmp_path"""
+    def make(**settings):
+        overrides = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'placement.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'NOTIFICATION_LOG_PATH': str(tmp_path / 'notifications.log'),
+            'JOB_RESULTS_FOLDER': str(tmp_path / 'job_results'),
+            'CACHE_PATH': str(tmp_path / 'cache.db'),
+        }
+        overrides.update(settings)
+        return create_app('testing', overrides)
+    return make
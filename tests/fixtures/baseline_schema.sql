@@ -0,0 +1,102 @@
+-- Schema created by the baseline release (db.create_all() before migrations existed).
+-- Used by tests/test_migrations.py to check that `flask bootstrap` upgrades it; never edit.
+
+CREATE TABLE users (
+	id INTEGER NOT NULL,
+	email VARCHAR(120) NOT NULL,
+	password_hash VARCHAR(255) NOT NULL,
+	role VARCHAR(20) NOT NULL,
+	is_active BOOLEAN NOT NULL,
+	is_approved BOOLEAN NOT NULL,
+	is_blacklisted BOOLEAN NOT NULL,
+	created_at DATETIME NOT NULL,
+	updated_at DATETIME NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+
+CREATE TABLE company_profiles (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	company_name VARCHAR(200) NOT NULL,
+	industry VARCHAR(100),
+	location VARCHAR(200),
+	website VARCHAR(200),
+	contact_person VARCHAR(100),
+	contact_phone VARCHAR(20),
+	description TEXT,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	UNIQUE (user_id),
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE TABLE student_profiles (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	full_name VARCHAR(100) NOT NULL,
+	roll_number VARCHAR(50) NOT NULL,
+	department VARCHAR(100) NOT NULL,
+	graduation_year INTEGER NOT NULL,
+	year INTEGER,
+	cgpa FLOAT,
+	tenth_marks FLOAT,
+	twelfth_marks FLOAT,
+	dob DATE,
+	resume_filename VARCHAR(200),
+	phone VARCHAR(20),
+	address TEXT,
+	skills TEXT,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	UNIQUE (user_id),
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE UNIQUE INDEX ix_student_profiles_roll_number ON student_profiles (roll_number);
+
+CREATE TABLE admin_actions (
+	id INTEGER NOT NULL,
+	admin_id INTEGER NOT NULL,
+	action_type VARCHAR(50) NOT NULL,
+	target_id INTEGER,
+	target_type VARCHAR(50),
+	remarks TEXT,
+	timestamp DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(admin_id) REFERENCES users (id)
+);
+
+CREATE TABLE placement_drives (
+	id INTEGER NOT NULL,
+	company_id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	description TEXT NOT NULL,
+	job_type VARCHAR(50),
+	location VARCHAR(200),
+	package VARCHAR(100),
+	eligibility_criteria TEXT,
+	required_skills TEXT,
+	application_deadline DATE NOT NULL,
+	is_approved BOOLEAN NOT NULL,
+	is_active BOOLEAN NOT NULL,
+	created_at DATETIME NOT NULL,
+	updated_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(company_id) REFERENCES company_profiles (id)
+);
+
+CREATE TABLE applications (
+	id INTEGER NOT NULL,
+	student_id INTEGER NOT NULL,
+	drive_id INTEGER NOT NULL,
+	status VARCHAR(20) NOT NULL,
+	remarks TEXT,
+	applied_at DATETIME NOT NULL,
+	updated_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	CONSTRAINT unique_student_drive_application UNIQUE (student_id, drive_id),
+	FOREIGN KEY(student_id) REFERENCES student_profiles (id),
+	FOREIGN KEY(drive_id) REFERENCES placement_drives (id)
+);
@@ -0,0 +1,99 @@
+"""
+Admission control: load shedding and login rate limits (app/admission.py)
+"""
+import time
+
+import pytest
+
+from app.admission import admission_stats
+from app.migrations import bootstrap
+
+LOGIN = {'email': 'someone@college.test', 'password': 'wrong'}
+
+
+@pytest.fixture
+def admitting(make_app):
+    """Factory for apps with admission control on (TestingConfig turns it off)"""
+    def make(**settings):
+        app = make_app(ADMISSION_ENABLED=True, **settings)
+        with app.app_context():
+            bootstrap()
+        return app
+    return make
+
+
+def _login(client, email=LOGIN['email'], **kwargs):
+    return client.post('/login', data=dict(LOGIN, email=email), **kwargs)
+
+
+def test_login_attempts_are_limited_per_address_and_account(admitting):
+    app = admitting(LOGIN_BURST=2, LOGIN_RATE_PER_MINUTE=1)
+    client = app.test_client()
+    assert [_login(client).status_code for _ in range(2)] == [200, 200]
+
+    refused = _login(client)
+    assert refused.status_code == 429
+    assert 1 <= int(refused.headers['Retry-After']) <= 60
+    # Another student on the same address, or the same account from elsewhere, still gets in
+    assert _login(client, email='other@college.test').status_code == 200
+    assert _login(client, environ_base={'REMOTE_ADDR': '10.0.0.9'}).status_code == 200
+    with app.app_context():
+        assert admission_stats()['login_limited'] == 1
+
+
+def test_forwarded_address_is_used_behind_a_proxy(admitting):
+    app = admitting(LOGIN_BURST=1, LOGIN_RATE_PER_MINUTE=1, PROXY_FIX_X_FOR=1)
+    client = app.test_client()
+    proxy = {'REMOTE_ADDR': '127.0.0.1'}
+
+    def attempt(address):
+        return _login(client, environ_base=proxy, headers={'X-Forwarded-For': address}).status_code
+
+    assert attempt('203.0.113.1') == 200
+    assert attempt('203.0.113.1') == 429
+    assert attempt('203.0.113.2') == 200
+
+
+def test_full_class_is_shed_with_retry_after(admitting):
+    app = admitting(ADMISSION_CAPACITY=4, ADMISSION_RETRY_AFTER=7, ADMISSION_CLASSES={
+        'critical': (None, None), 'write': (4, 1.0), 'read': (2, 1.0), 'heavy': (1, 0.5),
+    })
+    client = app.test_client()
+    state = app.extensions['admission']
+    for _ in range(2):
+        assert state.admit('read', 2, 4)
+
+    shed = client.get('/login')
+    assert shed.status_code == 503
+    assert shed.headers['Retry-After'] == '7'
+    assert shed.headers['Cache-Control'] == 'no-store'
+    # Critical requests are admitted while reads are shed
+    assert client.get('/admin/metrics').status_code != 503
+
+    state.release('read')
+    assert client.get('/login').status_code == 200
+    with app.app_context():
+        classes = admission_stats()['classes']
+    # Places are given back when each request ends
+    assert classes['read']['in_flight'] == 1
+    assert classes['read']['shed'] == 1
+    assert classes['critical'] == {'in_flight': 0, 'admitted': 1, 'shed': 0}
+
+
+def test_busy_server_sheds_lower_classes_first(admitting):
+    app = admitting(ADMISSION_CAPACITY=4)
+    client = app.test_client()
+    state = app.extensions['admission']
+    for _ in range(2):
+        assert state.admit('write', None, None)
+    # heavy gives way at half the capacity, reads only at 90%
+    assert client.get('/admin/statistics').status_code == 503
+    assert client.get('/login').status_code == 200
+
+
+def test_requests_queued_too_long_are_shed(admitting):
+    app = admitting(ADMISSION_MAX_QUEUE_SECONDS=1)
+    client = app.test_client()
+    started = time.time()
+    assert client.get('/login', headers={'X-Request-Start': f't={(started - 5) * 1000:.0f}'}).status_code == 503
+    assert client.get('/login', headers={'X-Request-Start': f't={started:.3f}'}).status_code == 200
@@ -0,0 +1,75 @@
+"""
+Cached company analytics (app/analytics.py)
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import analytics, db
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, PlacementDrive, CacheVersion
+
+
+class Clock(datetime):
+    now = datetime(2025, 3, 10, 23, 0)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(Clock, 'now', Clock.now)
+    monkeypatch.setattr(analytics, 'datetime', Clock)
+    return Clock
+
+
+def test_cached_window_moves_with_the_date(make_app, monkeypatch, clock):
+    app = make_app(ANALYTICS_MAX_AGE_SECONDS=86400)
+    computed = []
+    compute = analytics.compute_company_analytics
+    monkeypatch.setattr(analytics, 'compute_company_analytics',
+                        lambda *args: computed.append(args[-1]) or compute(*args))
+    with app.app_context():
+        bootstrap()
+        analytics.company_analytics(1, days=30)
+        analytics.company_analytics(1, days=30)
+        # No writes, but a new day: the 30-day window has moved on
+        clock.now += timedelta(hours=2)
+        analytics.company_analytics(1, days=30)
+    assert [str(today) for today in computed] == ['2025-03-10', '2025-03-11']
+
+
+def test_applying_does_not_write_the_version_row(make_app, clock):
+    app = make_app(ANALYTICS_MAX_AGE_SECONDS=60)
+    with app.app_context():
+        bootstrap()
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        drive = PlacementDrive(company_id=profile.id, title='SDE', description='Build things',
+                               application_deadline=date(2030, 1, 1), is_approved=True)
+        db.session.add(drive)
+        db.session.commit()
+        company_id, drive_id = profile.id, drive.id
+        versions = CacheVersion.query.count()
+        assert analytics.company_analytics(company_id)['stats']['total_applications'] == 0
+
+    client = app.test_client()
+    client.post('/student/register', data={
+        'email': 'stu@college.test', 'password': 'secret1', 'full_name': 'Stu Dent',
+        'roll_number': 'R001', 'department': 'CSE', 'graduation_year': str(date.today().year + 1),
+    })
+    client.post('/login', data={'email': 'stu@college.test', 'password': 'secret1'})
+    client.post(f'/student/drives/{drive_id}/apply')
+
+    with app.app_context():
+        assert CacheVersion.query.count() == versions
+        assert analytics.company_analytics(company_id)['stats']['total_applications'] == 0
+        clock.now += timedelta(seconds=60)
+        assert analytics.company_analytics(company_id)['stats']['total_applications'] == 1
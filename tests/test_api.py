@@ -0,0 +1,49 @@
+"""
+JSON API cursor pagination (app/api/routes.py)
+"""
+from datetime import date
+
+from app import db
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, PlacementDrive
+
+
+def _walk(client, url):
+    """Follows next_cursor to the end; returns every row and the number of pages"""
+    rows, pages, cursor = [], 0, None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200, response.get_data(as_text=True)
+        body = response.get_json()
+        rows.extend(body['data'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return rows, pages
+
+
+def test_pages_with_a_custom_field_list(make_app):
+    app = make_app()
+    with app.app_context():
+        bootstrap()
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        for i in range(5):
+            db.session.add(PlacementDrive(company_id=profile.id, title=f'SDE{i}', description='Build things',
+                                          application_deadline=date(2030, 1, 1), is_approved=True))
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'admin@placement.com', 'password': 'admin123'})
+    # id listed after another field is still the pagination key
+    for fields in ('title,id', 'company_name,title'):
+        rows, pages = _walk(client, f'/api/v1/drives?fields={fields}&limit=2')
+        assert pages == 3
+        assert [row['title'] for row in rows] == [f'SDE{i}' for i in range(5)]
+        assert set(rows[0]) == {'id'} | set(fields.split(','))
+    assert client.get('/api/v1/drives?cursor=bogus').status_code == 400
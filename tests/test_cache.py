@@ -0,0 +1,60 @@
+"""
+SQLite app cache behaviour while another process holds the write lock (app/cache.py)
+"""
+import sqlite3
+
+import pytest
+
+from app.cache import SQLiteCache, CacheNamespace
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteCache(str(tmp_path / 'cache.db'), maxsize=100, timeout_ms=20)
+
+
+@pytest.fixture
+def write_lock(cache):
+    """Holds the cache file's write lock from a second connection, as a busy process would"""
+    cache.get_version('warm-up')  # creates the schema
+    connection = sqlite3.connect(cache.path, isolation_level=None)
+
+    class Lock:
+        def __enter__(self):
+            connection.execute('BEGIN IMMEDIATE')
+
+        def __exit__(self, *exc):
+            connection.execute('ROLLBACK')
+
+    yield Lock()
+    connection.close()
+
+
+def test_hit_survives_a_busy_lru_touch(cache, write_lock):
+    cache.set('key', 'value')
+    cache.TOUCH_SECONDS = -1  # every read wants to refresh the access time
+    with write_lock:
+        assert cache.get('key') == 'value'
+
+
+def test_unreadable_version_bypasses_the_namespace(cache, monkeypatch):
+    with_stamp = CacheNamespace(cache, 'analytics')
+    with_stamp.set('report', 'old')
+    with_stamp.invalidate()
+    with_stamp.set('report', 'new')
+
+    monkeypatch.setattr(cache, 'get_version', lambda namespace: None)
+    # Never falls back to version 0, which still holds 'old'
+    assert with_stamp.get('report') is None
+    with_stamp.set('report', 'ignored')
+    monkeypatch.undo()
+    assert with_stamp.get('report') == 'new'
+
+
+def test_bump_raises_instead_of_losing_the_invalidation(cache, write_lock, monkeypatch):
+    monkeypatch.setattr(cache, 'BUMP_ATTEMPTS', 2)
+    assert cache.bump_version('|fragments|') == 1
+    with write_lock, pytest.raises(sqlite3.OperationalError):
+        cache.bump_version('|fragments|')
+    assert cache.get_version('|fragments|') == 1
+    assert cache.bump_version('|fragments|') == 2
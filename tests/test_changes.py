@@ -0,0 +1,82 @@
+"""
+Change feed for ERP sync (app/changes.py)
+"""
+from datetime import date
+
+from app import db
+from app.applications import update_statuses
+from app.changes import changes
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+
+STUDENT = {
+    'email': 'stu@college.test', 'password': 'secret1', 'full_name': 'Stu Dent',
+    'roll_number': 'R001', 'department': 'CSE', 'graduation_year': '2027',
+}
+
+
+def test_user_change_reaches_the_students_feed(make_app):
+    app = make_app(CHANGE_FEED_LAG_SECONDS=0)
+    with app.app_context():
+        bootstrap()
+    app.test_client().post('/student/register', data=STUDENT)
+
+    with app.app_context():
+        page = changes('students')
+        assert [record['email'] for record in page.records] == [STUDENT['email']]
+        assert changes('students', page.cursor).records == []
+
+        User.query.filter_by(email=STUDENT['email']).one().email = 'new@college.test'
+        db.session.commit()
+        later = changes('students', page.cursor)
+        assert [record['email'] for record in later.records] == ['new@college.test']
+
+        # Other users have no student row to move
+        User.query.filter_by(role='admin').one().is_blacklisted = True
+        db.session.commit()
+        assert changes('students', later.cursor).records == []
+
+
+def test_joined_columns_reach_the_applications_feed(make_app):
+    app = make_app(CHANGE_FEED_LAG_SECONDS=0)
+    with app.app_context():
+        bootstrap()
+    app.test_client().post('/student/register', data=STUDENT)
+
+    with app.app_context():
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        drive = PlacementDrive(company_id=profile.id, title='SDE', description='Build things',
+                               application_deadline=date(2030, 1, 1), is_approved=True)
+        db.session.add(drive)
+        db.session.flush()
+        student = StudentProfile.query.one()
+        db.session.add(Application(student_id=student.id, drive_id=drive.id))
+        db.session.commit()
+        update_statuses(profile.id, 'rejected', drive_id=drive.id)
+        db.session.commit()
+        decided = Application.query.one().decided_at
+        cursor = changes('applications').cursor
+
+        for entity, attribute, value, field in (
+            (drive, 'title', 'SDE II', 'drive_title'),
+            (profile, 'company_name', 'Acme Labs', 'company_name'),
+            (student, 'roll_number', 'R002', 'roll_number'),
+        ):
+            setattr(entity, attribute, value)
+            db.session.commit()
+            page = changes('applications', cursor)
+            assert [record[field] for record in page.records] == [value]
+            cursor = page.cursor
+
+        # Columns the feed does not carry leave the applications alone
+        drive.location = 'Pune'
+        db.session.commit()
+        assert changes('applications', cursor).records == []
+        # and moving updated_at leaves the decision time as it was
+        assert Application.query.one().decided_at == decided
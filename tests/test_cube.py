@@ -0,0 +1,59 @@
+"""
+Placement cube API (app/cube.py, /admin/cube)
+"""
+from app import db
+from app.cube import mark_cube_dirty, refresh_cube
+from app.migrations import bootstrap
+from app.models import PlacementCubeDirty
+
+
+def test_get_serves_the_cube_without_refreshing(make_app):
+    app = make_app()
+    with app.app_context():
+        bootstrap()
+        mark_cube_dirty([1, 2])
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'admin@placement.com', 'password': 'admin123'})
+    response = client.get('/admin/cube?by=department')
+    assert response.status_code == 200
+    assert response.get_json()['pending_drives'] == 2
+
+    with app.app_context():
+        # GET is safe: the dirty marks wait for the refresh job or command
+        assert PlacementCubeDirty.query.count() == 2
+        assert refresh_cube() == 2
+    assert client.get('/admin/cube?by=department').get_json()['pending_drives'] == 0
+
+
+def test_refresh_job_reports_every_batch(make_app, monkeypatch):
+    from app.jobs import JobContext, enqueue_job, run_next_job, cancel_job
+    app = make_app(CUBE_REFRESH_BATCH_SIZE=1, JOB_PROGRESS_INTERVAL=0)
+    reports = []
+    progress = JobContext.progress
+
+    def record(ctx, done, total=None, message=None, force=False):
+        reports.append((done, total))
+        progress(ctx, done, total, message, force)
+        if done == 2:
+            # Taken away after the second batch: the refresh stops at the next report
+            cancel_job(ctx.job_id)
+            db.session.commit()
+
+    monkeypatch.setattr(JobContext, 'progress', record)
+    with app.app_context():
+        bootstrap()
+        mark_cube_dirty([1, 2, 3, 4])
+        enqueue_job('cube_refresh')
+        db.session.commit()
+        assert run_next_job()[1] == 'interrupted'
+        # Each report renewed the lease; batches before the cancel stay committed
+        assert reports == [(0, None), (1, 4), (2, 4), (3, 4)]
+        assert {mark.drive_id for mark in PlacementCubeDirty.query} == {4}
+
+        enqueue_job('cube_refresh', {'full': True})
+        db.session.commit()
+        reports.clear()
+        assert run_next_job()[1] == 'done'
+        assert PlacementCubeDirty.query.count() == 0
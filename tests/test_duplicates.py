@@ -0,0 +1,117 @@
+"""
+Duplicate company detection (app/duplicates.py)
+"""
+import random
+from itertools import combinations
+
+import pytest
+
+from app import db
+from app.duplicates import (normalize_name, normalize_domain, trigrams, similarity, index_company,
+                            find_duplicates, dedup_report)
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile
+
+SYLLABLES = ['in', 'fo', 'sys', 'tek', 'ma', 'hin', 'dra', 'wip', 'ro', 'zen', 'sar', 'ac', 'me', 'qu']
+
+
+def test_names_and_domains_are_normalized():
+    assert normalize_name('Infosys Ltd.') == normalize_name('INFOSYS Limited') == 'infosys'
+    assert normalize_name('Infosys Technologies Pvt Ltd') == 'infosys'
+    # A name made only of generic words is kept as it is
+    assert normalize_name('Global Solutions') == 'global solutions'
+    assert normalize_domain('https://www.Acme.test/careers') == 'acme.test'
+    assert normalize_domain('', 'hr@acme.test') == 'acme.test'
+    assert normalize_domain(None, 'acme.hr@gmail.com') is None
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+
+
+def _random_name(rng, names):
+    if names and rng.random() < 0.5:
+        # A near-duplicate of an earlier name: one syllable changed, added or dropped
+        words = rng.choice(names).split()
+        word = rng.randrange(len(words))
+        parts = [words[word][i:i + 2] for i in range(0, len(words[word]), 2)]
+        edit = rng.choice(['change', 'add', 'drop'])
+        if edit == 'change' or len(parts) == 1:
+            parts[rng.randrange(len(parts))] = rng.choice(SYLLABLES)
+        elif edit == 'add':
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(SYLLABLES))
+        else:
+            parts.pop(rng.randrange(len(parts)))
+        words[word] = ''.join(parts)
+        return ' '.join(words)
+    return ' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                    for _ in range(rng.randint(1, 2)))
+
+
+@pytest.fixture
+def companies(make_app):
+    """
+    80 companies with random, often near-duplicate names; yields {id: name key}
+    Nobody logs in, so the password hash is a placeholder
+    """
+    app = make_app()
+    rng = random.Random(11)
+    with app.app_context():
+        bootstrap()
+        names = []
+        for i in range(80):
+            names.append(_random_name(rng, names))
+            # Webmail addresses: no domain, so only names can match
+            user = User(email=f'hr{i}@gmail.com', password_hash='-', role='company', is_active=True,
+                        is_approved=True)
+            db.session.add(user)
+            db.session.flush()
+            profile = CompanyProfile(user_id=user.id, company_name=names[-1].title() + ' Pvt Ltd')
+            db.session.add(profile)
+            index_company(profile)
+        db.session.commit()
+        yield {row.id: row.name_key for row in CompanyProfile.query}
+
+
+def _brute_force(keys, threshold):
+    return {
+        (first, second) for first, second in combinations(sorted(keys), 2)
+        if similarity(trigrams(keys[first]), trigrams(keys[second])) >= threshold - 1e-9
+    }
+
+
+@pytest.mark.parametrize('threshold', [0.3, 0.5, 0.6, 0.8])
+def test_report_finds_every_pair_found_by_brute_force(companies, threshold):
+    expected = _brute_force(companies, threshold)
+    assert expected  # the fixture makes near-duplicates at every threshold
+    found = {(first[0], second[0]) for _, _, first, second in dedup_report(threshold)}
+    assert found == expected
+
+
+@pytest.mark.parametrize('threshold', [0.4, 0.6])
+def test_lookup_matches_brute_force(companies, threshold):
+    expected = _brute_force(companies, threshold)
+    found = find_duplicates(companies, threshold)
+    for company_id in companies:
+        matches = {other for pair in expected if company_id in pair for other in pair if other != company_id}
+        assert {d.company_id for d in found.get(company_id, [])} == matches
+
+
+def test_shared_domain_always_matches(make_app):
+    app = make_app()
+    with app.app_context():
+        bootstrap()
+        ids = []
+        for i, (name, website) in enumerate([('Acme', 'acme.test'), ('Zeta Corp', 'https://www.acme.test'),
+                                             ('Acme Labs', None)]):
+            user = User(email=f'hr{i}@gmail.com', password_hash='-', role='company', is_active=True,
+                        is_approved=True)
+            db.session.add(user)
+            db.session.flush()
+            profile = CompanyProfile(user_id=user.id, company_name=name, website=website)
+            db.session.add(profile)
+            index_company(profile)
+            ids.append(profile.id)
+        db.session.commit()
+
+        report = {(first[0], second[0]): reason for _, reason, first, second in dedup_report(0.5)}
+        assert report == {(ids[0], ids[1]): 'domain', (ids[0], ids[2]): 'name'}
+        reasons = {d.company_id: d.reason for d in find_duplicates([ids[0]], 0.5)[ids[0]]}
+        assert reasons == {ids[1]: 'domain', ids[2]: 'name'}
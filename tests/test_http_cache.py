@@ -0,0 +1,50 @@
+"""
+Conditional GETs on the student pages (app/http_cache.py)
+"""
+from datetime import date
+
+from app import db
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, PlacementDrive
+
+STUDENT = {
+    'email': 'stu@college.test', 'password': 'secret1', 'full_name': 'Stu Dent',
+    'roll_number': 'R001', 'department': 'CSE', 'graduation_year': str(date.today().year + 1),
+}
+LATER = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+
+def test_student_pages_revalidate_on_the_etag(make_app):
+    app = make_app()
+    with app.app_context():
+        bootstrap()
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        drive = PlacementDrive(company_id=profile.id, title='SDE', description='Build things',
+                               application_deadline=date(2030, 1, 1), is_approved=True)
+        db.session.add(drive)
+        db.session.commit()
+        drive_id = drive.id
+    client = app.test_client()
+    client.post('/student/register', data=STUDENT)
+    client.post('/login', data={'email': STUDENT['email'], 'password': STUDENT['password']})
+
+    pages = ['/student/drives', f'/student/drives/{drive_id}']
+    etags = {}
+    for url in pages:
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.last_modified is None
+        etags[url] = first.headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etags[url]}).status_code == 304
+
+    client.post(f'/student/drives/{drive_id}/apply')
+    for url in pages:
+        # Applying changes both pages although no drive row changed
+        assert client.get(url, headers={'If-None-Match': etags[url]}).status_code == 200
+        assert client.get(url, headers={'If-Modified-Since': LATER}).status_code == 200
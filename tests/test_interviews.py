@@ -0,0 +1,197 @@
+"""
+Interview scheduling (app/interviews.py)
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from flask import current_app
+
+from app import db
+from app.applications import update_statuses
+from app.interviews import (_match, add_slot, schedule_interviews, cancel_assignment, cancel_slot,
+                            SlotConflict)
+from app.migrations import bootstrap
+from app.models import (User, CompanyProfile, StudentProfile, PlacementDrive, Application,
+                        InterviewSlot, InterviewAssignment)
+
+
+def _most_placed(applications, feasible, free):
+    """Brute force: the largest number of applications that can be seated"""
+    if not applications:
+        return 0
+    first, rest = applications[0], applications[1:]
+    best = _most_placed(rest, feasible, free)
+    for slot in feasible[first]:
+        if free[slot]:
+            free[slot] -= 1
+            best = max(best, 1 + _most_placed(rest, feasible, free))
+            free[slot] += 1
+    return best
+
+
+def test_match_moves_earlier_candidates_to_seat_later_ones():
+    # First come would take slot 1 and leave application 2 nowhere to go
+    assert _match([1, 2], {1: [1, 2], 2: [1]}, {1: 1, 2: 1}) == {1: 2, 2: 1}
+
+
+def test_match_is_maximum_against_brute_force():
+    rng = random.Random(7)
+    for _ in range(300):
+        slots = list(range(rng.randint(1, 4)))
+        free = {slot: rng.randint(1, 2) for slot in slots}
+        applications = list(range(100, 100 + rng.randint(1, 6)))
+        feasible = {application: sorted(rng.sample(slots, rng.randint(0, len(slots))))
+                    for application in applications}
+        placed = _match(applications, feasible, free)
+        assert all(slot in feasible[application] for application, slot in placed.items())
+        assert all(list(placed.values()).count(slot) <= free[slot] for slot in slots)
+        assert len(placed) == _most_placed(applications, feasible, dict(free))
+
+
+@pytest.fixture
+def campus(make_app):
+    """
+    Two drives of one company (A closes first) and three students; every
+    student is shortlisted for B, students 1 and 2 also for A
+    Yields the ids: {'company', 'drives': [A, B], 'students', 'applications': {(drive, student): id}}
+    """
+    app = make_app(INTERVIEW_GAP_MINUTES=15)
+    with app.app_context():
+        bootstrap()
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        drives = []
+        for title, deadline in (('A', date(2030, 1, 1)), ('B', date(2030, 2, 1))):
+            drive = PlacementDrive(company_id=profile.id, title=title, description='Work',
+                                   application_deadline=deadline, is_approved=True)
+            db.session.add(drive)
+            db.session.flush()
+            drives.append(drive.id)
+        students = []
+        for i in range(1, 4):
+            user = User(email=f'stu{i}@college.test', role='student', is_active=True, is_approved=True)
+            user.set_password('secret1')
+            db.session.add(user)
+            db.session.flush()
+            student = StudentProfile(user_id=user.id, full_name=f'Stu {i}', roll_number=f'R00{i}',
+                                     department='CSE', graduation_year=2030)
+            db.session.add(student)
+            db.session.flush()
+            students.append(student.id)
+        applications = {}
+        for drive_id, shortlisted in zip(drives, (students[:2], students)):
+            for student_id in shortlisted:
+                application = Application(student_id=student_id, drive_id=drive_id, status='shortlisted')
+                db.session.add(application)
+                db.session.flush()
+                applications[drive_id, student_id] = application.id
+        db.session.commit()
+        yield {'company': profile.id, 'drives': drives, 'students': students, 'applications': applications}
+
+
+def _at(minutes):
+    base = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=2)
+    return base + timedelta(minutes=minutes)
+
+
+def _schedule():
+    """{application id: slot id} of every scheduled interview, checked for clashes and overbooking"""
+    rows = db.session.execute(
+        db.select(InterviewAssignment.application_id, InterviewAssignment.student_id, InterviewSlot.id,
+                  InterviewSlot.starts_at, InterviewSlot.ends_at, InterviewSlot.capacity)
+        .join(InterviewSlot, InterviewSlot.id == InterviewAssignment.slot_id)
+        .where(InterviewAssignment.status == 'scheduled')
+    ).all()
+    gap = timedelta(minutes=current_app.config['INTERVIEW_GAP_MINUTES'])
+    for row in rows:
+        assert sum(1 for other in rows if other.id == row.id) <= row.capacity
+        for other in rows:
+            if other is not row and other.student_id == row.student_id:
+                assert other.starts_at >= row.ends_at + gap or row.starts_at >= other.ends_at + gap
+    return {row.application_id: row.id for row in rows}
+
+
+def test_schedule_places_everyone_without_clashes(campus):
+    a, b = campus['drives']
+    s1, s2, s3 = campus['students']
+    apps = campus['applications']
+    a1 = add_slot(a, _at(0), _at(30), 'R1', 1).id
+    a2 = add_slot(a, _at(60), _at(90), 'R1', 1).id
+    b1 = add_slot(b, _at(0), _at(30), 'R2', 2).id
+    b2 = add_slot(b, _at(120), _at(150), 'R2', 1).id
+
+    result = schedule_interviews(full=True)
+    db.session.commit()
+    assert (result['assigned'], result['unassigned']) == (5, 0)
+    assert _schedule() == {apps[a, s1]: a1, apps[a, s2]: a2,
+                           apps[b, s1]: b2, apps[b, s2]: b1, apps[b, s3]: b1}
+    # Rerunning from scratch gives the same plan; incrementally there is nothing to do
+    schedule_interviews(full=True)
+    db.session.commit()
+    assert _schedule()[apps[b, s1]] == b2
+    assert schedule_interviews()['assigned'] == 0
+
+    with pytest.raises(SlotConflict):
+        add_slot(b, _at(10), _at(40), 'R1', 1)  # R1 is taken by A at that time
+
+
+def test_incremental_runs_leave_existing_interviews_alone(campus):
+    a, b = campus['drives']
+    s3 = campus['students'][2]
+    add_slot(a, _at(0), _at(30), 'R1', 1)
+    add_slot(a, _at(60), _at(90), 'R1', 1)
+    add_slot(b, _at(0), _at(30), 'R2', 2)
+    add_slot(b, _at(120), _at(150), 'R2', 1)
+    schedule_interviews()
+    db.session.commit()
+    before = _schedule()
+
+    # Student 3 is shortlisted for A too, but A has no seat left
+    application = Application(student_id=s3, drive_id=a, status='pending')
+    db.session.add(application)
+    db.session.flush()
+    update_statuses(campus['company'], 'shortlisted', application_ids=[application.id])
+    db.session.commit()
+    assert _schedule() == before
+
+    a3 = add_slot(a, _at(200), _at(230), 'R1', 1).id
+    assert schedule_interviews(drive_ids=[a])['assigned'] == 1
+    db.session.commit()
+    assert _schedule() == {**before, application.id: a3}
+
+
+def test_cancelled_seats_go_to_waiting_candidates(campus):
+    a, b = campus['drives']
+    s1, s2, _ = campus['students']
+    apps = campus['applications']
+    add_slot(a, _at(0), _at(30), 'R1', 1)
+    a2 = add_slot(a, _at(60), _at(90), 'R1', 1).id
+    add_slot(b, _at(0), _at(30), 'R2', 2)
+    add_slot(b, _at(120), _at(150), 'R2', 1)
+    schedule_interviews()
+    db.session.commit()
+
+    # Student 1 gives up a1: a2 is full, so they wait and a1 is not offered again
+    assignment = InterviewAssignment.query.filter_by(application_id=apps[a, s1], status='scheduled').one()
+    assert cancel_assignment(assignment.id)['assigned'] == 0
+    db.session.commit()
+    assert apps[a, s1] not in _schedule()
+
+    # Student 2 is rejected from A: their a2 seat goes to student 1
+    update_statuses(campus['company'], 'rejected', application_ids=[apps[a, s2]])
+    db.session.commit()
+    schedule = _schedule()
+    assert apps[a, s2] not in schedule
+    assert schedule[apps[a, s1]] == a2
+
+    # Deleting a2 puts student 1 back on the waiting list (a1 stays declined)
+    cancel_slot(a2)
+    db.session.commit()
+    assert apps[a, s1] not in _schedule()
+    assert db.session.get(InterviewSlot, a2) is None
@@ -0,0 +1,119 @@
+"""
+Background job queue: leases, concurrency limits and results (app/jobs.py)
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import current_app
+
+from app import db, jobs
+from app.jobs import (JobContext, JobInterrupted, enqueue_job, claim_job, run_job, run_next_job, cancel_job,
+                      purge_jobs, result_path)
+from app.migrations import bootstrap
+from app.models import Job
+
+
+@pytest.fixture
+def queue(make_app):
+    app = make_app(JOB_CONCURRENCY={'dedup_companies': 1}, JOB_DEFAULT_CONCURRENCY=2, JOB_MAX_ATTEMPTS=2,
+                   JOB_PROGRESS_INTERVAL=0)
+    with app.app_context():
+        bootstrap()
+        yield app
+
+
+def _enqueue(*job_types):
+    ids = [enqueue_job(job_type).id for job_type in job_types]
+    db.session.commit()
+    return ids
+
+
+def _expire(job_id):
+    """What a crashed worker leaves behind: a running job whose lease ran out"""
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+        lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_concurrency_limit_is_per_type(queue):
+    first, second, export = _enqueue('dedup_companies', 'dedup_companies', 'export_students')
+    assert claim_job('w1')[0] == first
+    # The second report waits for the first; other types go ahead
+    assert claim_job('w2')[0] == export
+    assert claim_job('w3') is None
+
+    _expire(first)
+    # The expired job no longer counts as running and is due again itself, oldest first
+    job_id, token = claim_job('w3')
+    assert job_id == first
+    assert run_job(job_id, token) == 'done'
+    assert claim_job('w1')[0] == second
+
+
+def test_expired_lease_is_taken_over(queue):
+    job_id, = _enqueue('dedup_companies')
+    _, lost_token = claim_job('w1')
+    _expire(job_id)
+
+    _, token = claim_job('w2')
+    assert token != lost_token
+    job = db.session.get(Job, job_id)
+    assert (job.worker, job.attempts, job.status) == ('w2', 2, 'running')
+    # The first worker finds out at its next progress report and cannot finish the job
+    with pytest.raises(JobInterrupted):
+        JobContext(job, lost_token).progress(1, force=True)
+    assert not jobs._finish(job_id, lost_token, status='done')
+
+    assert run_job(job_id, token) == 'done'
+    job = db.session.get(Job, job_id)
+    assert job.status == 'done' and job.lease_token is None
+    with open(result_path(job)) as result:
+        assert result.readline().startswith('Similarity,')
+
+
+def test_job_lost_too_often_fails(queue):
+    job_id, = _enqueue('export_students')
+    for worker in ('w1', 'w2'):
+        assert claim_job(worker)[0] == job_id
+        _expire(job_id)
+    assert claim_job('w3') is None
+    job = db.session.get(Job, job_id)
+    assert job.status == 'failed'
+    assert 'Lost by its worker 2 times' in job.error
+
+
+def test_cancelled_and_failing_jobs(queue, monkeypatch):
+    cancelled, failing = _enqueue('export_students', 'dedup_companies')
+    assert cancel_job(cancelled)
+    db.session.commit()
+
+    def broken(ctx):
+        ctx.open_result('partial.csv').close()
+        raise ValueError('disk on fire')
+
+    monkeypatch.setitem(jobs.JOB_TYPES, 'dedup_companies', jobs.JOB_TYPES['dedup_companies']._replace(handler=broken))
+    assert run_next_job('w1') == (failing, 'failed')
+    assert run_next_job('w1') is None
+    job = db.session.get(Job, failing)
+    assert job.error == 'ValueError: disk on fire'
+    assert result_path(job) is None
+    assert os.listdir(current_app.config['JOB_RESULTS_FOLDER']) == []  # the partial file is removed
+
+    # Finished jobs are purged after the retention period
+    db.session.execute(db.update(Job).values(created_at=datetime.utcnow() - timedelta(days=30)))
+    db.session.commit()
+    assert purge_jobs(days=7) == 2
+    assert not cancel_job(cancelled)
+
+
+def test_running_job_is_cancelled_at_its_next_report(queue):
+    job_id, = _enqueue('dedup_companies')
+    job_id, token = claim_job('w1')
+    ctx = JobContext(db.session.get(Job, job_id), token)
+    ctx.progress(1, 10)
+    assert cancel_job(job_id)
+    db.session.commit()
+    with pytest.raises(JobInterrupted):
+        ctx.progress(2, 10)
+    assert db.session.get(Job, job_id).status == 'cancelled'
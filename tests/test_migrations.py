@@ -0,0 +1,108 @@
+"""
+Upgrading databases created by earlier releases with `flask bootstrap`
+"""
+import os
+import sqlite3
+
+import pytest
+
+from app import db, migrations
+from app.diagnostics import run_diagnostics
+from app.migrations import MIGRATIONS, bootstrap
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), 'fixtures', 'baseline_schema.sql')
+NOW = '2024-01-15 09:30:00'
+
+
+def _baseline_database(path):
+    """A database as the baseline release left it, with one company, student, drive and application"""
+    connection = sqlite3.connect(path)
+    with open(BASELINE_SCHEMA) as f:
+        connection.executescript(f.read())
+    connection.executemany(
+        'INSERT INTO users (id, email, password_hash, role, is_active, is_approved, is_blacklisted, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, 1, 1, 0, ?, ?)',
+        [(10, 'hr@acme.test', 'x', 'company', NOW, NOW), (11, 'stu@college.test', 'x', 'student', NOW, NOW)])
+    connection.execute("INSERT INTO company_profiles (id, user_id, company_name, website, created_at) "
+                       "VALUES (1, 10, 'Acme', 'https://acme.test', ?)", (NOW,))
+    connection.execute("INSERT INTO student_profiles (id, user_id, full_name, roll_number, department, graduation_year, "
+                       "created_at) VALUES (1, 11, 'Stu Dent', 'R001', 'CSE', 2024, ?)", (NOW,))
+    connection.execute("INSERT INTO placement_drives (id, company_id, title, description, package, application_deadline, "
+                       "is_approved, is_active, created_at, updated_at) "
+                       "VALUES (1, 1, 'SDE', 'Build things', '10-12 LPA', '2030-01-01', 1, 1, ?, ?)", (NOW, NOW))
+    connection.execute("INSERT INTO applications (id, student_id, drive_id, status, applied_at, updated_at) "
+                       "VALUES (1, 1, 1, 'selected', ?, ?)", (NOW, NOW))
+    connection.commit()
+    connection.close()
+
+
+def _query(path, sql, *params):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def baseline(make_app, tmp_path):
+    path = str(tmp_path / 'placement.db')
+    _baseline_database(path)
+    return make_app(), path
+
+
+def test_bootstrap_upgrades_baseline_database(baseline):
+    app, path = baseline
+    with app.app_context():
+        assert bootstrap() == [version for version, _, _ in MIGRATIONS]
+        assert bootstrap() == []
+
+    for table in ('company_profiles', 'student_profiles', 'placement_drives', 'applications'):
+        assert _query(path, f'SELECT count(*) FROM {table}') == [(1,)]
+        assert 'ON DELETE CASCADE' in _query(path, 'SELECT sql FROM sqlite_master WHERE name = ?', table)[0][0]
+    assert _query(path, "SELECT name FROM sqlite_master WHERE name LIKE '%\\_\\_old' ESCAPE '\\'") == []
+    assert _query(path, 'PRAGMA foreign_key_check') == []
+    # Indexes of rebuilt tables survive, and later columns are backfilled
+    assert _query(path, "SELECT count(*) FROM sqlite_master WHERE name = 'ix_student_profiles_roll_number'") == [(1,)]
+    assert _query(path, 'SELECT updated_at FROM student_profiles') == [(NOW,)]
+    # Filled later by `flask backfill-packages`
+    assert _query(path, 'SELECT ctc_min, ctc_max FROM placement_drives') == [(None, None)]
+    assert _query(path, 'SELECT selected_at, decided_at FROM applications') == [(NOW, NOW)]
+    assert _query(path, 'SELECT name_key, domain FROM company_profiles') == [('acme', 'acme.test')]
+    # Cascading deletes find a company's drives and a drive's applications by index
+    for index in ('ix_placement_drives_company_id', 'ix_applications_drive_id'):
+        assert _query(path, 'SELECT count(*) FROM sqlite_master WHERE name = ?', index) == [(1,)]
+    with app.app_context():
+        flagged = [query['name'] for query in run_diagnostics(db.engine)['queries'] if query['flagged']]
+    assert 'company_drives' not in flagged and 'drive_applicants' not in flagged
+
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA foreign_keys=ON')
+    connection.execute('DELETE FROM users WHERE id = 10')
+    connection.commit()
+    connection.close()
+    assert _query(path, 'SELECT count(*) FROM placement_drives') == [(0,)]
+    assert _query(path, 'SELECT count(*) FROM applications') == [(0,)]
+
+
+def test_failed_migration_is_rolled_back(baseline, monkeypatch):
+    app, path = baseline
+
+    def broken(connection):
+        migrations._m3_on_delete_cascade(connection)
+        raise ValueError('disk on fire')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [
+        (version, description, broken if version == 3 else migrate) for version, description, migrate in MIGRATIONS
+    ])
+    with app.app_context(), pytest.raises(RuntimeError, match='Migration 3'):
+        bootstrap()
+
+    assert _query(path, 'SELECT version FROM schema_migrations ORDER BY version') == [(1,), (2,)]
+    assert _query(path, 'SELECT count(*) FROM company_profiles') == [(1,)]
+    assert 'CASCADE' not in _query(path, "SELECT sql FROM sqlite_master WHERE name = 'company_profiles'")[0][0]
+    assert _query(path, "SELECT name FROM sqlite_master WHERE name LIKE '%\\_\\_old' ESCAPE '\\'") == []
+
+    monkeypatch.undo()
+    with app.app_context():
+        assert bootstrap() == [version for version, _, _ in MIGRATIONS if version > 2]
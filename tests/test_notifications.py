@@ -0,0 +1,48 @@
+"""
+Outbox metrics (app/notifications.py)
+"""
+from datetime import date
+
+from app import db
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, PlacementDrive
+from app.notifications import enqueue_event, drain_outbox, outbox_stats
+
+
+def test_metrics_process_sees_worker_progress(make_app):
+    worker = make_app()
+    client = worker.test_client()
+    with worker.app_context():
+        bootstrap()
+    for i in range(2):
+        client.post('/student/register', data={
+            'email': f'stu{i}@college.test', 'password': 'secret1', 'full_name': f'Stu {i}',
+            'roll_number': f'R00{i}', 'department': 'CSE', 'graduation_year': str(date.today().year + 1),
+        })
+
+    with worker.app_context():
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        company.set_password('secret1')
+        db.session.add(company)
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        db.session.add(profile)
+        db.session.flush()
+        drive = PlacementDrive(company_id=profile.id, title='SDE', description='Build things',
+                               application_deadline=date(2030, 1, 1), is_approved=True, is_active=True)
+        db.session.add(drive)
+        db.session.flush()
+        enqueue_event('drive_approved', {'drive_id': drive.id})
+        enqueue_event('application_status_changed', {})  # malformed: fails and is retried
+        db.session.commit()
+        batch = drain_outbox()
+        assert (batch.events, batch.messages) == (2, 2)
+
+    # Another process (a web worker serving /admin/metrics) reads the same numbers
+    web = make_app()
+    with web.app_context():
+        stats = outbox_stats()
+    assert stats['done_total'] == 1
+    assert stats['retrying'] == 1
+    assert stats['backlog'] == 1
+    assert stats['messages_sent_in_window'] == 2
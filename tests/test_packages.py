@@ -0,0 +1,30 @@
+"""
+Package text parsing (app/packages.py)
+"""
+import pytest
+
+from app.packages import PackageRange, parse_package
+
+L = 100_000
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('6-8 LPA', PackageRange(6 * L, 8 * L, None, None)),
+    ('1.2 Cr', PackageRange(120 * L, 120 * L, None, None)),
+    ('Package: 6', PackageRange(6 * L, 6 * L, None, None)),
+    ('12,00,000 per annum', PackageRange(12 * L, 12 * L, None, None)),
+    ('Rs. 25,000/month', PackageRange(None, None, 25_000, 25_000)),
+    ('15k-20k per month', PackageRange(None, None, 15_000, 20_000)),
+    ('6 LPA + 25k/month during internship', PackageRange(6 * L, 6 * L, 25_000, 25_000)),
+    # Durations, bond terms and parenthesised inclusions are not amounts
+    ('2 years bond, 6 LPA', PackageRange(6 * L, 6 * L, None, None)),
+    ('10-12 LPA (incl. 2L bonus)', PackageRange(10 * L, 12 * L, None, None)),
+    ('10 LPA including 2L variable, 2 year bond', PackageRange(10 * L, 10 * L, None, None)),
+    ('Stipend 25000 for 6 months', PackageRange(None, None, 25_000, 25_000)),
+    ('8 LPA, 10% variable', PackageRange(8 * L, 8 * L, None, None)),
+    ('6 LPA with 1L joining bonus', PackageRange(6 * L, 6 * L, None, None)),
+    ('As per company norms', PackageRange(None, None, None, None)),
+    ('', PackageRange(None, None, None, None)),
+])
+def test_parse_package(text, expected):
+    assert parse_package(text) == expected
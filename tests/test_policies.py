@@ -0,0 +1,111 @@
+"""
+Placement policies (app/policies.py)
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.migrations import bootstrap
+from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application
+from app.policies import check_application, enforce_policies
+
+PACKAGES = {
+    'internship': '25000 per month stipend',
+    'regular': '6 LPA',
+    'regular_b': '7 LPA',
+    'dream': '12 LPA',
+}
+
+
+@pytest.fixture
+def placement(make_app):
+    """A student and one approved drive per PACKAGES entry; yields (student id, {name: drive id})"""
+    app = make_app()
+    with app.app_context():
+        bootstrap()
+        company = User(email='hr@acme.test', role='company', is_active=True, is_approved=True)
+        student = User(email='stu@college.test', role='student', is_active=True, is_approved=True)
+        for user in (company, student):
+            user.set_password('secret1')
+        db.session.add_all([company, student])
+        db.session.flush()
+        profile = CompanyProfile(user_id=company.id, company_name='Acme')
+        student_profile = StudentProfile(user_id=student.id, full_name='Stu Dent', roll_number='R001',
+                                         department='CSE', graduation_year=date.today().year + 1)
+        db.session.add_all([profile, student_profile])
+        db.session.flush()
+        drives = {}
+        for name, package in PACKAGES.items():
+            drive = PlacementDrive(company_id=profile.id, title=name, description='Work', package=package,
+                                   application_deadline=date(2030, 1, 1), is_approved=True)
+            db.session.add(drive)
+            db.session.flush()
+            drives[name] = drive.id
+        db.session.commit()
+        yield student_profile.id, drives
+
+
+def _apply(student_id, drive_id, applied_at, status='pending'):
+    application = Application(student_id=student_id, drive_id=drive_id, status=status, applied_at=applied_at)
+    if status == 'selected':
+        application.selected_at = applied_at + timedelta(days=1)
+    db.session.add(application)
+    db.session.flush()
+    return application
+
+
+def _policy(student_id, drive_id):
+    policy = check_application(student_id, drive_id)
+    return policy.name if policy else None
+
+
+def test_internship_offer_places_student_in_no_tier(placement):
+    student_id, drives = placement
+    offered = datetime.utcnow() - timedelta(days=10)
+    _apply(student_id, drives['internship'], offered, 'selected')
+    open_regular = _apply(student_id, drives['regular'], offered + timedelta(days=2))
+    db.session.commit()
+
+    assert _policy(student_id, drives['regular_b']) is None
+    assert _policy(student_id, drives['dream']) is None
+    assert enforce_policies() == []
+    assert db.session.get(Application, open_regular.id).status == 'pending'
+
+
+def test_regular_offer_limits_to_higher_tiers(placement):
+    student_id, drives = placement
+    offered = datetime.utcnow() - timedelta(days=10)
+    before = _apply(student_id, drives['internship'], offered - timedelta(days=1))
+    _apply(student_id, drives['regular'], offered, 'selected')
+    same_tier = _apply(student_id, drives['regular_b'], offered + timedelta(days=2))
+    higher_tier = _apply(student_id, drives['dream'], offered + timedelta(days=2))
+    db.session.commit()
+
+    assert _policy(student_id, drives['regular_b']) == 'package_tier'
+    # A drive without a parsed CTC is in the lowest tier
+    assert _policy(student_id, drives['internship']) == 'package_tier'
+    assert _policy(student_id, drives['dream']) is None
+
+    withdrawn = enforce_policies()
+    db.session.commit()
+    # one_offer: applied before the offer; package_tier: same tier as the offer
+    assert sorted(withdrawn) == sorted([before.id, same_tier.id])
+    assert db.session.get(Application, higher_tier.id).status == 'pending'
+    assert enforce_policies() == []
+
+
+def test_dream_offer_blocks_further_applications(placement):
+    student_id, drives = placement
+    _apply(student_id, drives['dream'], datetime.utcnow() - timedelta(days=10), 'selected')
+    db.session.commit()
+    assert _policy(student_id, drives['regular']) == 'dream_company'
+
+
+def test_disabled_policies_are_skipped(placement, monkeypatch):
+    from flask import current_app
+    student_id, drives = placement
+    _apply(student_id, drives['regular'], datetime.utcnow() - timedelta(days=10), 'selected')
+    db.session.commit()
+    monkeypatch.setitem(current_app.config, 'PLACEMENT_POLICIES', ['dream_company'])
+    assert _policy(student_id, drives['regular_b']) is None
@@ -0,0 +1,143 @@
+"""
+Multi-institution routing with one SQLite file per tenant (app/tenants.py)
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app import db
+from app.cache import get_cache
+from app.migrations import bootstrap
+from app.models import User, StudentProfile
+from app.tenants import (TENANT_ENGINES_KEY, tenant_context, tenant_engine, tenant_names, cross_tenant_report,
+                         dispose_tenant_engines)
+
+STUDENT = {
+    'email': 'stu@college.test', 'password': 'secret1', 'full_name': 'Stu Dent',
+    'roll_number': 'R001', 'department': 'CSE', 'graduation_year': '2027',
+}
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    app = make_app(
+        TENANT_DATABASE_URLS={
+            'college_a': f"sqlite:///{tmp_path / 'college_a.db'}",
+            'college_b': f"sqlite:///{tmp_path / 'college_b.db'}",
+        },
+        TENANT_HOSTS={'placements.college-a.edu': 'college_a'},
+    )
+    for name in [None] + tenant_names(app):
+        with tenant_context(app, name):
+            bootstrap()
+    yield app
+    dispose_tenant_engines(app)
+
+
+def _students(app, tenant):
+    with tenant_context(app, tenant):
+        return [u.email for u in User.query.filter_by(role='student')]
+
+
+def test_engine_registry(app, tmp_path):
+    assert tenant_names(app) == ['college_a', 'college_b']
+    assert tenant_engine(app, 'college_a').url.database == str(tmp_path / 'college_a.db')
+    assert tenant_engine(app, 'college_b').url.database == str(tmp_path / 'college_b.db')
+    with app.app_context():
+        assert tenant_engine(app, None) is db.engine
+    with pytest.raises(KeyError):
+        tenant_engine(app, 'college_z')
+    with pytest.raises(KeyError):
+        with tenant_context(app, 'college_z'):
+            pass
+
+
+def test_session_binds_to_the_tenant_engine(app):
+    with tenant_context(app, 'college_a'):
+        assert db.session.get_bind() is tenant_engine(app, 'college_a')
+    with tenant_context(app, None):
+        assert db.session.get_bind() is tenant_engine(app, None)
+
+
+def test_path_prefix_routes_to_the_tenant_database(app):
+    client = app.test_client()
+    response = client.post('/college_a/student/register', data=STUDENT)
+    assert response.status_code == 302
+    # url_for() keeps the tenant prefix
+    assert response.headers['Location'].startswith('/college_a/')
+    assert _students(app, 'college_a') == [STUDENT['email']]
+    assert _students(app, 'college_b') == []
+    assert _students(app, None) == []
+
+
+def test_host_routes_to_the_tenant_database(app):
+    client = app.test_client()
+    client.post('/student/register', data=STUDENT, base_url='http://placements.college-a.edu')
+    assert _students(app, 'college_a') == [STUDENT['email']]
+    assert _students(app, None) == []
+
+
+def test_login_does_not_carry_across_tenants(app):
+    client = app.test_client()
+    client.post('/college_a/student/register', data=STUDENT)
+    # The same account does not exist in college_b
+    response = client.post('/college_b/login', data={'email': STUDENT['email'], 'password': STUDENT['password']})
+    assert 'dashboard' not in response.headers.get('Location', '')
+
+    response = client.post('/college_a/login', data={'email': STUDENT['email'], 'password': STUDENT['password']})
+    assert response.headers['Location'].endswith('/college_a/student/dashboard')
+    assert client.get('/college_a/student/dashboard').status_code == 200
+    # A session made under college_a is dropped when used against college_b
+    response = client.get('/college_b/student/dashboard')
+    assert response.status_code == 302
+    assert '/college_b/login' in response.headers['Location']
+
+
+def test_cache_keys_are_per_tenant(app):
+    with tenant_context(app, 'college_a'):
+        get_cache('analytics').set('company:1', 'college a')
+    with tenant_context(app, 'college_b'):
+        assert get_cache('analytics').get('company:1') is None
+        get_cache('analytics').set('company:1', 'college b')
+    with tenant_context(app, 'college_a'):
+        assert get_cache('analytics').get('company:1') == 'college a'
+    with tenant_context(app, None):
+        assert get_cache('analytics').get('company:1') is None
+
+
+def test_fragment_keys_are_per_tenant(app):
+    template = app.jinja_env.from_string('{% cache "row", 7 %}{{ value }}{% endcache %}')
+    with tenant_context(app, 'college_a'):
+        assert template.render(value='a') == 'a'
+    with tenant_context(app, 'college_b'):
+        assert template.render(value='b') == 'b'
+    with tenant_context(app, 'college_a'):
+        # Served from college_a's cached fragment
+        assert template.render(value='changed') == 'a'
+
+
+def test_cross_tenant_report(app, tmp_path):
+    with tenant_context(app, 'college_a'):
+        for i in range(2):
+            user = User(email=f'stu{i}@a.test', role='student', is_active=True, is_approved=True)
+            user.set_password('secret1')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(StudentProfile(user_id=user.id, full_name=f'Stu {i}', roll_number=f'A{i}',
+                                          department='CSE', graduation_year=2027))
+        db.session.commit()
+
+    report = cross_tenant_report(app)
+    rows = {row['tenant']: row for row in report['tenants']}
+    assert sorted(rows) == ['college_a', 'college_b']
+    assert rows['college_a']['students'] == 2
+    assert rows['college_b']['students'] == 0
+    assert report['totals']['students'] == 2
+
+    # A tenant whose database is missing its tables is reported, not fatal
+    broken = app.extensions[TENANT_ENGINES_KEY]
+    broken['college_c'] = create_engine(f"sqlite:///{tmp_path / 'college_c.db'}")
+    report = cross_tenant_report(app)
+    rows = {row['tenant']: row for row in report['tenants']}
+    assert 'error' in rows['college_c']
+    assert report['totals']['students'] == 2
+    broken.pop('college_c').dispose()
@@ -1,38 +1,28 @@
 """
-Database verification script
-Checks tables, relationships, and admin user
+Database verification and diagnostics script
+Checks tables and the admin user, reports row counts, sizes and indexes,
+and explains the app's hot queries, flagging full scans with index suggestions
+Run: python verify_db.py [--json] [--strict] [--schema] [--tenant NAME]
 """
+import argparse
+import json
+import sys
+
 from app import create_app, db
-from app.models import User, CompanyProfile, StudentProfile, PlacementDrive, Application, AdminAction
+from app.models import User
 from sqlalchemy import inspect
 
-app = create_app()
 
-with app.app_context():
-    # Get inspector
-    inspector = inspect(db.engine)
-    
-    print("\n" + "="*60)
-    print("  DATABASE VERIFICATION")
-    print("="*60)
-    
-    # List all tables
-    print("\n✓ Tables Created:")
-    for table_name in inspector.get_table_names():
-        print(f"  - {table_name}")
-    
-    # Check admin user
-    print("\n✓ Admin User:")
-    admin = User.query.filter_by(role='admin').first()
-    if admin:
-        print(f"  - Email: {admin.email}")
-        print(f"  - Role: {admin.role}")
-        print(f"  - Is Active: {admin.is_active}")
-        print(f"  - Is Approved: {admin.is_approved}")
-    else:
-        print("  - No admin user found!")
-    
-    # Check table columns
+def human_bytes(size):
+    if size is None:
+        return 'n/a'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def print_schema(inspector):
     print("\n✓ Table Structures:")
     for table_name in inspector.get_table_names():
         print(f"\n  {table_name.upper()}:")
@@ -40,14 +30,95 @@ with app.app_context():
         for col in columns:
             nullable = "NULL" if col['nullable'] else "NOT NULL"
             print(f"    - {col['name']:20} {str(col['type']):15} {nullable}")
-        
+
         # Show foreign keys
         fks = inspector.get_foreign_keys(table_name)
         if fks:
             print(f"    Foreign Keys:")
             for fk in fks:
                 print(f"      → {fk['constrained_columns']} → {fk['referred_table']}.{fk['referred_columns']}")
-    
+
+
+def print_report(report):
     print("\n" + "="*60)
-    print("  Database verification complete!")
+    print("  DATABASE VERIFICATION")
+    print("="*60)
+    print(f"\n  {report['database']} ({report['dialect']})")
+
+    print("\n✓ Admin User:")
+    admin = report['admin']
+    if admin:
+        print(f"  - Email: {admin['email']}")
+        print(f"  - Is Active: {admin['is_active']}")
+        print(f"  - Is Approved: {admin['is_approved']}")
+    else:
+        print("  - No admin user found!")
+
+    print("\n✓ Tables:")
+    print(f"  {'table':32} {'rows':>10} {'data':>11} {'indexes':>11}")
+    for table in report['tables']:
+        print(f"  {table['name']:32} {table['rows']:>10} {human_bytes(table['table_bytes']):>11} "
+              f"{human_bytes(table['index_bytes']):>11}")
+
+    print("\n✓ Indexes:")
+    for table in report['tables']:
+        for index in table['indexes']:
+            unique = ' UNIQUE' if index['unique'] else ''
+            print(f"  {table['name']:28} {index['name']:40} ({', '.join(index['columns'])}){unique}")
+
+    print("\n✓ Hot Query Plans:")
+    for query in report['queries']:
+        mark = '✗' if query['flagged'] else '✓'
+        print(f"\n  {mark} {query['name']} - {query['description']}")
+        for line in query['plan']:
+            print(f"      {line}")
+        for scan in query['full_scans']:
+            note = ' (expected)' if query['expect_scan'] else ''
+            print(f"    ! full scan of {scan['table']} ({scan['rows']} rows){note}")
+        if query['temp_sort']:
+            print("    ! sorts in a temporary structure (no index matches ORDER BY)")
+        for suggestion in query['suggestions']:
+            print(f"    → suggest: {suggestion}")
+
+    print("\n" + "="*60)
+    if report['problems']:
+        print(f"  {report['problems']} hot queries do full table scans")
+    else:
+        print("  Database verification complete!")
     print("="*60 + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Database diagnostics for Placement Portal')
+    parser.add_argument('--config', default='default')
+    parser.add_argument('--tenant', default=None, help='tenant database to inspect (default database if omitted)')
+    parser.add_argument('--json', action='store_true', help='machine-readable report on stdout')
+    parser.add_argument('--strict', action='store_true', help='exit with status 1 when a hot query is flagged')
+    parser.add_argument('--schema', action='store_true', help='also print every column and foreign key')
+    args = parser.parse_args(argv)
+
+    from app.diagnostics import run_diagnostics
+    from app.tenants import tenant_context, tenant_engine, tenant_names
+
+    app = create_app(args.config)
+    if args.tenant is not None and args.tenant not in tenant_names(app):
+        parser.error(f'unknown tenant {args.tenant!r} (configured: {", ".join(tenant_names(app)) or "none"})')
+    with tenant_context(app, args.tenant):
+        engine = tenant_engine(app, args.tenant)
+        report = run_diagnostics(engine)
+        admin = User.query.filter_by(role='admin').first()
+        report['admin'] = admin and {
+            'email': admin.email, 'is_active': admin.is_active, 'is_approved': admin.is_approved,
+        }
+        if args.json:
+            json.dump(report, sys.stdout, indent=2, default=str)
+            print()
+        else:
+            print_report(report)
+            if args.schema:
+                print_schema(inspect(engine))
+    return 1 if args.strict and report['problems'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())